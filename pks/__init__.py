@@ -0,0 +1 @@
+"""ПКС — движки данных и расчётов для демо-дашборда (app.py)."""
@@ -0,0 +1,287 @@
+"""Materialized home-page aggregates: counters, open-loss total, top-K risks.
+
+Every finding keeps small per-row state (category codes, loss, score) in
+NumPy arrays; counters by priority/status/vector/zone and the open-loss sum
+are adjusted per finding, and the top risks come from a lazy max-heap of
+candidates (stale entries are skipped by a per-row stamp).  ``upsert`` /
+``remove`` therefore cost O(log n); reads cost O(categories) and O(k).
+
+``sync()`` carries the aggregates from one data version to the next: rows are
+matched by (cve, asset_id) and only added, removed or changed ones are
+applied; past ``REBUILD_RATIO`` changes it rebuilds in one vectorized pass.
+"""
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pks.snapshots import KEY_SEP
+
+DIMENSIONS = ("priority", "status", "vector", "zone")
+OPEN_STATUS = "Open"
+TOP_K = 5
+CANDIDATES = 256    # кандидатов в куче сверх k; пополняется полным проходом только при исчерпании
+REBUILD_RATIO = 0.2
+
+
+def finding_keys(risks: pd.DataFrame) -> pd.Index:
+    return pd.Index(risks["cve"].astype(str).str.cat(risks["asset_id"].astype(str), sep=KEY_SEP))
+
+
+def _zones(risks: pd.DataFrame, assets: pd.DataFrame) -> np.ndarray:
+    meta = assets.drop_duplicates("asset_id", keep="last").set_index("asset_id")["zone"]
+    return meta.reindex(risks["asset_id"]).to_numpy(dtype=object)
+
+
+class Aggregates:
+    """Home-page aggregates over findings, kept current by ``sync()`` / ``upsert()``."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.token = None
+        self._reset(pd.Index([], dtype=object))
+
+    def _reset(self, keys: pd.Index) -> None:
+        n = len(keys)
+        self.keys = keys
+        self._extra = {}  # ключи, добавленные upsert() после последнего sync()
+        self._cats = {d: [] for d in DIMENSIONS}
+        self._lut = {d: {} for d in DIMENSIONS}
+        self._counts = {d: np.zeros(0, np.int64) for d in DIMENSIONS}
+        self._code = {d: np.full(n, -1, np.int32) for d in DIMENSIONS}
+        self._loss = np.zeros(n, np.float64)
+        self._score = np.full(n, -np.inf)
+        self._alive = np.zeros(n, bool)
+        self._stamp = np.zeros(n, np.int64)
+        self._row = np.full(n, -1, np.int64)  # позиция строки в текущем фрейме risks
+        self._heap = []
+        self._floor = -np.inf  # все живые строки со скором >= floor есть в куче
+        self.open_loss = 0.0
+        self.size = 0
+
+    # ---------- codes ----------
+
+    def _codes(self, dim: str, values) -> np.ndarray:
+        values = pd.Series(values, dtype=object).fillna("—")
+        uniques = pd.unique(values)
+        for u in uniques:
+            if u not in self._lut[dim]:
+                self._lut[dim][u] = len(self._cats[dim])
+                self._cats[dim].append(u)
+        grow = len(self._cats[dim]) - len(self._counts[dim])
+        if grow > 0:
+            self._counts[dim] = np.concatenate([self._counts[dim], np.zeros(grow, np.int64)])
+        return values.map(self._lut[dim]).to_numpy(dtype=np.int32)
+
+    def _code_of(self, dim: str, value) -> int:
+        value = "—" if value is None or value != value else value
+        code = self._lut[dim].get(value)
+        return self._codes(dim, [value])[0] if code is None else code
+
+    def _grow(self, extra: int) -> None:
+        for d in DIMENSIONS:
+            self._code[d] = np.concatenate([self._code[d], np.full(extra, -1, np.int32)])
+        self._loss = np.concatenate([self._loss, np.zeros(extra)])
+        self._score = np.concatenate([self._score, np.full(extra, -np.inf)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, bool)])
+        self._stamp = np.concatenate([self._stamp, np.zeros(extra, np.int64)])
+        self._row = np.concatenate([self._row, np.full(extra, -1, np.int64)])
+
+    # ---------- bulk ----------
+
+    def _load_rows(self, pos: np.ndarray, risks: pd.DataFrame, zones: np.ndarray, rows: np.ndarray) -> None:
+        """Vectorized assignment of rows ``rows`` of ``risks`` into state positions ``pos``."""
+        for d in DIMENSIONS:
+            values = zones[rows] if d == "zone" else risks[d].to_numpy(dtype=object)[rows]
+            codes = self._codes(d, values)
+            self._code[d][pos] = codes
+            self._counts[d] += np.bincount(codes, minlength=len(self._counts[d]))
+        self._loss[pos] = risks["loss_max"].to_numpy(dtype=np.float64)[rows]
+        self._score[pos] = np.nan_to_num(risks["risk_score"].to_numpy(dtype=np.float64)[rows], nan=-np.inf)
+        self._alive[pos] = True
+        self._row[pos] = rows
+        self.open_loss += self._loss[pos][self._is_open(pos)].sum()
+        self.size += len(pos)
+
+    def _unload(self, pos: np.ndarray) -> None:
+        for d in DIMENSIONS:
+            self._counts[d] -= np.bincount(self._code[d][pos], minlength=len(self._counts[d]))
+        self.open_loss -= self._loss[pos][self._is_open(pos)].sum()
+        self._alive[pos] = False
+        self._score[pos] = -np.inf
+        self._stamp[pos] += 1
+        self.size -= len(pos)
+
+    def _is_open(self, pos) -> np.ndarray:
+        code = self._lut["status"].get(OPEN_STATUS, -2)
+        return self._code["status"][pos] == code
+
+    def rebuild(self, risks: pd.DataFrame, assets: pd.DataFrame) -> None:
+        """Recompute everything from ``risks`` in one pass."""
+        keys = finding_keys(risks)
+        self._reset(keys)
+        self._load_rows(np.arange(len(keys)), risks, _zones(risks, assets), np.arange(len(keys)))
+        self._refill()
+
+    def sync(self, risks: pd.DataFrame, assets: pd.DataFrame, token=None) -> dict:
+        """Bring the aggregates to ``risks`` in place → counts of applied changes."""
+        with self.lock:
+            if token is not None and token == self.token:
+                return {}
+            self.token = token
+            if self._extra:
+                self.keys = self.keys.append(pd.Index(list(self._extra), dtype=object))
+                self._extra = {}
+            keys = finding_keys(risks)
+            if not (keys.is_unique and self.keys.is_unique):  # дубли находок — только полный пересчёт
+                self.rebuild(risks, assets)
+                self.token = token
+                return {"rebuilt": True}
+            old = self.keys.get_indexer(keys)
+            known = old >= 0
+            keep = np.zeros(len(self.keys), bool)
+            keep[old[known]] = True
+            gone = np.flatnonzero(self._alive & ~keep)
+            # сравнение полей только у совпавших строк
+            rows = np.flatnonzero(known)
+            pos = old[known]
+            zones = _zones(risks, assets)
+            changed = ~self._alive[pos]
+            changed |= self._score[pos] != np.nan_to_num(risks["risk_score"].to_numpy(np.float64)[rows], nan=-np.inf)
+            changed |= self._loss[pos] != risks["loss_max"].to_numpy(np.float64)[rows]
+            for d in DIMENSIONS:
+                values = zones[rows] if d == "zone" else risks[d].to_numpy(dtype=object)[rows]
+                cats = np.array(self._cats[d] + ["—"], dtype=object)
+                changed |= cats[self._code[d][pos]] != pd.Series(values, dtype=object).fillna("—").to_numpy()
+            added = np.flatnonzero(~known)
+            stats = {"added": len(added), "removed": len(gone), "changed": int(changed.sum())}
+            if sum(stats.values()) > REBUILD_RATIO * max(len(keys), 1) or len(self.keys) > 2 * max(len(keys), 1):
+                self.rebuild(risks, assets)
+                self.token = token
+                return {**stats, "rebuilt": True}
+
+            self._row[pos] = rows  # порядок строк в новом фрейме
+            self._row[gone] = -1
+            upd = pos[changed]
+            self._unload(np.concatenate([upd[self._alive[upd]], gone]))
+            if len(added):
+                start = len(self.keys)
+                self.keys = self.keys.append(keys[added])
+                self._grow(len(added))
+                upd = np.concatenate([upd, np.arange(start, start + len(added))])
+                rows_upd = np.concatenate([rows[changed], added])
+            else:
+                rows_upd = rows[changed]
+            self._load_rows(upd, risks, zones, rows_upd)
+            self._push(upd)
+            return stats
+
+    # ---------- single finding, O(log n) ----------
+
+    def _pos(self, cve: str, asset_id: str, create: bool = False):
+        key = f"{cve}{KEY_SEP}{asset_id}"
+        if key in self.keys:
+            loc = self.keys.get_loc(key)
+            return loc if isinstance(loc, int) else np.flatnonzero(np.asarray(self.keys == key))[0]
+        pos = self._extra.get(key)
+        if pos is None and create:
+            pos = self._extra[key] = len(self.keys) + len(self._extra)
+            self._grow(1)
+        return pos
+
+    def upsert(self, cve: str, asset_id: str, priority: str, status: str, vector: str, zone: str,
+               loss: float, score: float) -> None:
+        """Add or update one finding (e.g. a re-score or status change)."""
+        with self.lock:
+            pos = self._pos(cve, asset_id, create=True)
+            at = np.array([pos])
+            if self._alive[pos]:
+                self._unload(at)
+            for d, value in zip(DIMENSIONS, (priority, status, vector, zone)):
+                code = self._code_of(d, value)
+                self._code[d][pos] = code
+                self._counts[d][code] += 1
+            self._loss[pos], self._score[pos], self._alive[pos] = loss, score, True
+            self._row[pos] = -1
+            if status == OPEN_STATUS:
+                self.open_loss += loss
+            self.size += 1
+            self._push(at)
+
+    def remove(self, cve: str, asset_id: str) -> bool:
+        with self.lock:
+            pos = self._pos(cve, asset_id)
+            if pos is None or not self._alive[pos]:
+                return False
+            self._unload(np.array([pos]))
+            return True
+
+    # ---------- top-K heap ----------
+
+    def _push(self, pos: np.ndarray) -> None:
+        for p in pos[self._score[pos] >= self._floor]:
+            heapq.heappush(self._heap, (-self._score[p], int(p), int(self._stamp[p])))
+        if len(self._heap) > 4 * CANDIDATES:
+            self._heap = [e for e in self._heap if self._valid(e)]
+            heapq.heapify(self._heap)
+
+    def _refill(self, taken=()) -> None:
+        """Rebuild the candidate heap from the arrays, without ``taken`` (O(n), only when it runs dry)."""
+        alive = np.setdiff1d(np.flatnonzero(self._alive), np.asarray(taken, dtype=np.int64), assume_unique=True)
+        self._floor = -np.inf
+        if len(alive) > CANDIDATES:
+            alive = alive[np.argpartition(-self._score[alive], CANDIDATES - 1)[:CANDIDATES]]
+            self._floor = self._score[alive].min()
+        self._heap = [(-self._score[p], int(p), int(self._stamp[p])) for p in alive]
+        heapq.heapify(self._heap)
+
+    def _valid(self, entry) -> bool:
+        neg, p, stamp = entry
+        return self._alive[p] and self._stamp[p] == stamp and self._score[p] == -neg
+
+    def top(self, k: int = TOP_K) -> np.ndarray:
+        """State positions of the ``k`` highest risk scores (ties: earlier finding first)."""
+        with self.lock:
+            out = []
+            while len(out) < k:
+                if not self._heap:
+                    if self.size <= len(out):
+                        break
+                    self._refill(out)  # уже взятые не возвращаются в кучу, иначе при k > CANDIDATES — цикл
+                    continue
+                entry = heapq.heappop(self._heap)
+                if self._valid(entry):
+                    out.append(entry[1])
+            for p in out:  # вернуть взятых кандидатов
+                heapq.heappush(self._heap, (-self._score[p], p, int(self._stamp[p])))
+            return np.array(out, dtype=np.int64)
+
+    def top_rows(self, k: int = TOP_K) -> np.ndarray:
+        """Positions in the last synced ``risks`` frame of the top ``k`` findings."""
+        rows = self._row[self.top(k)]
+        return rows[rows >= 0]
+
+    # ---------- reads ----------
+
+    def counts(self, dim: str) -> pd.DataFrame:
+        """``[dim, count]`` for non-empty categories, sorted like ``groupby`` (O(categories))."""
+        with self.lock:
+            c = self._counts[dim].copy()
+            cats = np.array(self._cats[dim], dtype=object)
+        nz = np.flatnonzero(c)
+        return pd.DataFrame({dim: cats[nz], "count": c[nz]}).sort_values(dim, ignore_index=True)
+
+    def count(self, dim: str, value: str) -> int:
+        code = self._lut[dim].get(value)
+        return 0 if code is None else int(self._counts[dim][code])
+
+    def kpis(self) -> dict:
+        """Home-page counters: open findings, P1/P2 risks, open potential loss."""
+        with self.lock:
+            return {
+                "open_vulns": self.count("status", OPEN_STATUS),
+                "p1": self.count("priority", "P1 (Critical)"),
+                "p2": self.count("priority", "P2 (High)"),
+                "loss": int(round(self.open_loss)),
+            }
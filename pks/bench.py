@@ -0,0 +1,287 @@
+"""Headless rerun-latency benchmark of ``app.py`` on synthetic data.
+
+Every page and a set of typical interactions are driven with Streamlit's
+``AppTest`` against ``seed:<N>`` data (see ``pks.data.synthetic_data``).
+Each size runs in its own process (clean caches and peak-RSS accounting)
+with throw-away stores.  Per step we record rerun wall time (median of
+``--repeat``), peak/current RSS and the serialized size of every chart and
+table sent to the browser.  Results go to JSON; with ``--baseline`` the run
+fails (exit 1) on regressions beyond the tolerances.  Wall time is gated
+only with at least ``GATE_REPEAT`` repeats: a single rerun is too noisy.
+The pure engines are covered by the pytest suite (``python -m pytest``).
+
+    python -m pks.bench --sizes 1k,100k --baseline bench/baseline.json
+    python -m pks.bench --sizes 1k,100k --update-baseline bench/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Допуски сравнения с базовой линией
+WALL_TOLERANCE = 0.5
+WALL_NOISE_MS = 100.0  # меньшие абсолютные приросты — шум общих CI-машин
+PAYLOAD_TOLERANCE = 0.10
+RSS_TOLERANCE = 0.25
+GATE_REPEAT = 3  # меньше повторов — медиана не гасит выбросы, время не сравнивается
+
+PAYLOAD_TYPES = ("arrow_data_frame", "plotly_chart")
+
+
+# ============================
+# SCENARIO
+# ============================
+
+def _widget(at, kind: str, label: str):
+    for w in getattr(at, kind):
+        if w.label == label:
+            return w
+    raise LookupError(f"{kind} {label!r} не найден")
+
+
+def _set(kind: str, label: str, value):
+    return lambda at: _widget(at, kind, label).set_value(value)
+
+
+def _click(label: str):
+    return lambda at: _widget(at, "button", label).click()
+
+
+def _measures(at):
+    w = _widget(at, "multiselect", "Меры")
+    return w.set_value(w.options[:2])
+
+
+# (раздел, шаг, действие перед rerun; None — просто rerun)
+STEPS = [
+    ("Главная", "rerun", None),
+    ("Активы", "rerun", None),
+    ("Уязвимости", "rerun", None),
+    ("Уязвимости", "min_cvss=5", _set("slider", "Минимальный CVSS", 5.0)),
+    ("Уязвимости", "status=Open", _set("selectbox", "Статус", "Open")),
+    ("Риски", "rerun", None),
+    ("Риски", "measures", _measures),
+    ("Compliance", "rerun", None),
+    ("Меры и задачи", "rerun", None),
+    ("Меры и задачи", "create_task", _click("Создать")),
+    ("Каталоги", "rerun", None),
+    ("Каталоги", "lookup", _set("text_input", "Поиск по CVE / BDU", "CVE-2024-1111")),
+    ("Интеграции", "rerun", None),
+    ("LLM / RAG объяснение", "rerun", None),
+    ("LLM / RAG объяснение", "ask", _click("Сгенерировать ответ (демо)")),
+]
+
+
+def _elements(node):
+    from streamlit.testing.v1.element_tree import Block
+
+    if isinstance(node, Block):
+        for child in node.children.values():
+            yield from _elements(child)
+    else:
+        yield node
+
+
+def _payload(at) -> dict:
+    sizes = {t: 0 for t in PAYLOAD_TYPES}
+    total = 0
+    for el in _elements(at._tree):
+        proto = getattr(el, "proto", None)
+        if proto is None or not hasattr(proto, "ByteSize"):
+            continue
+        n = proto.ByteSize()
+        total += n
+        if el.type in sizes:
+            sizes[el.type] += n
+    sizes["total"] = total
+    return sizes
+
+
+def _rss_mb() -> tuple:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: КБ
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        current = float("nan")
+    return round(peak, 1), round(current, 1)
+
+
+def _measure(at, action, repeat: int):
+    walls = []
+    for _ in range(repeat):
+        if action is not None:
+            action(at)
+        t = time.perf_counter()
+        at.run()
+        walls.append((time.perf_counter() - t) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return statistics.median(walls)
+
+
+def run_size(findings: int, repeat: int, timeout: float) -> list:
+    """Drive all steps in this process (expects a fresh interpreter)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    rows = []
+    t = time.perf_counter()
+    at.run()
+    rows.append(_row("Главная", "cold_start", (time.perf_counter() - t) * 1000, at))
+    current = "Главная"
+    for page, step, action in STEPS:
+        try:
+            if page != current:
+                _widget(at.sidebar, "radio", "Раздел").set_value(page)
+                t = time.perf_counter()
+                at.run()
+                rows.append(_row(page, "open", (time.perf_counter() - t) * 1000, at))
+                current = page
+            rows.append(_row(page, step, _measure(at, action, repeat), at))
+        except Exception as exc:  # шаг сломан — фиксируем и продолжаем
+            rows.append({"page": page, "step": step, "error": f"{type(exc).__name__}: {exc}"})
+    for r in rows:
+        r["findings"] = findings
+    return rows
+
+
+def _row(page: str, step: str, wall_ms: float, at) -> dict:
+    peak, current = _rss_mb()
+    return {"page": page, "step": step, "wall_ms": round(wall_ms, 1),
+            "peak_rss_mb": peak, "rss_mb": current, "payload": _payload(at)}
+
+
+def _spawn(label: str, findings: int, repeat: int, timeout: float) -> list:
+    with tempfile.TemporaryDirectory(prefix="pks-bench-") as tmp:
+        env = dict(os.environ,
+                   PKS_DATA_SOURCE=f"seed:{findings}",
+                   PKS_SNAPSHOT_DIR=f"{tmp}/snapshots",
+                   PKS_TASKS_DB=f"{tmp}/tasks.db",
+                   PKS_SERIES_DB=f"{tmp}/series.db",
+                   PKS_CATALOG_DB=f"{tmp}/catalog.db",
+                   PKS_EMBED_CACHE=f"{tmp}/embeddings.db",
+                   PKS_EXPORT_DIR=f"{tmp}/exports",
+                   PKS_SYNC_DB=f"{tmp}/sync.db")
+        proc = subprocess.run(
+            [sys.executable, "-m", "pks.bench", "_worker", "--findings", str(findings),
+             "--repeat", str(repeat), "--timeout", str(timeout)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode:
+        return [{"page": "*", "step": "*", "error": proc.stderr.strip().splitlines()[-1:]}]
+    rows = json.loads(proc.stdout.strip().splitlines()[-1])
+    for r in rows:
+        r["size"] = label
+    return rows
+
+
+# ============================
+# BASELINE
+# ============================
+
+def _key(r: dict) -> tuple:
+    return r.get("size"), r["page"], r["step"]
+
+
+def compare(results: list, baseline: list, wall_tolerance: float = WALL_TOLERANCE, wall: bool = True) -> list:
+    """Human-readable regression messages (empty — no regressions)."""
+    base = {_key(r): r for r in baseline}
+    out = []
+    for r in results:
+        if "error" in r:
+            out.append(f"{'/'.join(map(str, _key(r)))}: ошибка — {r['error']}")
+            continue
+        b = base.get(_key(r))
+        if b is None or "error" in b:
+            continue
+        name = "/".join(map(str, _key(r)))
+        if wall and r["wall_ms"] > b["wall_ms"] * (1 + wall_tolerance) and r["wall_ms"] - b["wall_ms"] > WALL_NOISE_MS:
+            out.append(f"{name}: время {b['wall_ms']:.0f} → {r['wall_ms']:.0f} мс")
+        if r["payload"]["total"] > b["payload"]["total"] * (1 + PAYLOAD_TOLERANCE):
+            out.append(f"{name}: payload {b['payload']['total']:,} → {r['payload']['total']:,} байт")
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + RSS_TOLERANCE):
+            out.append(f"{name}: пик RSS {b['peak_rss_mb']:.0f} → {r['peak_rss_mb']:.0f} МБ")
+    return out
+
+
+def _print_table(rows: list) -> None:
+    print(f"{'size':>5} {'page':<22} {'step':<13} {'wall ms':>9} {'peak MB':>8} {'tables B':>10} {'charts B':>10}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r.get('size', ''):>5} {r['page']:<22} {r['step']:<13} ERROR {r['error']}")
+            continue
+        p = r["payload"]
+        print(f"{r['size']:>5} {r['page'][:22]:<22} {r['step']:<13} {r['wall_ms']:>9.1f} {r['peak_rss_mb']:>8.0f} "
+              f"{p['arrow_data_frame']:>10,} {p['plotly_chart']:>10,}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m pks.bench", description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1k,100k", help=f"через запятую: {', '.join(SIZES)} или число находок")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=900.0, help="таймаут одного rerun, с")
+    ap.add_argument("--out", default=".pks/bench/results.json")
+    ap.add_argument("--baseline", help="сравнить с базовой линией; регрессии → код 1")
+    ap.add_argument("--update-baseline", metavar="PATH", help="записать результаты как базовую линию")
+    ap.add_argument("--wall-tolerance", type=float, default=WALL_TOLERANCE, help="допустимый рост времени (доля)")
+    sub = ap.add_subparsers(dest="cmd")
+    w = sub.add_parser("_worker", help=argparse.SUPPRESS)
+    w.add_argument("--findings", type=int, required=True)
+    w.add_argument("--repeat", type=int, default=3)
+    w.add_argument("--timeout", type=float, default=900.0)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "_worker":
+        print(json.dumps(run_size(args.findings, args.repeat, args.timeout), ensure_ascii=False))
+        return 0
+
+    rows = []
+    for label in args.sizes.split(","):
+        label = label.strip().lower()
+        findings = SIZES[label] if label in SIZES else int(label)
+        t = time.perf_counter()
+        rows += _spawn(label, findings, args.repeat, args.timeout)
+        print(f"[{label}] {time.perf_counter() - t:.0f} с", file=sys.stderr)
+    _print_table(rows)
+
+    doc = {
+        "meta": {"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "repeat": args.repeat},
+        "results": rows,
+    }
+    for path in filter(None, [args.out, args.update_baseline]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(doc, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+        wall = args.repeat >= GATE_REPEAT
+        if not wall:
+            print(f"Время не сравнивается: --repeat {args.repeat} < {GATE_REPEAT}", file=sys.stderr)
+        regressions = compare(rows, baseline, args.wall_tolerance, wall)
+        for msg in regressions:
+            print("REGRESSION", msg)
+        if regressions:
+            return 1
+        print("OK: без регрессий относительно", args.baseline)
+    elif any("error" in r for r in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""Offline CVE (NVD) / БДУ ФСТЭК catalog with bulk enrichment of findings.
+
+Feeds are imported in a streaming way (NVD JSON 1.1 ``CVE_Items`` or API 2.0
+``vulnerabilities`` arrays, optionally gzipped; FSTEC ``vulxml`` export) and
+upserted into SQLite keyed by CVE / BDU id, so a "modified" feed is applied
+as a delta instead of a re-import.  Enrichment loads the compact key columns
+once per catalog version and joins all findings with ``Index.get_indexer``.
+
+    python -m pks.catalog --db catalog.db nvd nvdcve-1.1-2024.json.gz
+    python -m pks.catalog --db catalog.db bdu vulxml.xml
+"""
+import argparse
+import gzip
+import json
+import re
+import sqlite3
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BATCH_ROWS = 5_000
+READ_CHUNK = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nvd (
+    cve TEXT PRIMARY KEY, cvss REAL, cvss_vector TEXT, vendor TEXT, product TEXT, modified TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bdu (
+    bdu_id TEXT PRIMARY KEY, name TEXT, severity TEXT, vendor TEXT, product TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bdu_cve (
+    cve TEXT NOT NULL, bdu_id TEXT NOT NULL, PRIMARY KEY (cve, bdu_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bdu_cve_bdu ON bdu_cve(bdu_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+SEVERITY_RANK = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+BDU_SEVERITY = {"Критический": "Critical", "Высокий": "High", "Средний": "Medium", "Низкий": "Low"}
+CPE_RE = re.compile(r"^cpe:2\.3:[aho]:([^:]*):([^:]*)")
+
+ENRICH_COLUMNS = ["cvss_vector", "vendor", "product", "bdu_id", "bdu_severity"]
+
+# Демо-витрина БДУ: используется, пока каталог не импортирован.
+DEMO_BDU = pd.DataFrame([
+    {"bdu_id":"BDU:2024-001", "vendor":"VendorX", "product":"VPN Gateway", "severity":"Critical", "mapped_cve":"CVE-2024-1111"},
+    {"bdu_id":"BDU:2023-014", "vendor":"VendorY", "product":"DB Engine", "severity":"High", "mapped_cve":"CVE-2023-2222"},
+    {"bdu_id":"BDU:2022-207", "vendor":"VendorZ", "product":"App Server", "severity":"Medium", "mapped_cve":"CVE-2022-3333"},
+])
+
+DEMO_MITRE = pd.DataFrame([
+    {"technique":"T1190", "name":"Exploit Public-Facing Application", "coverage":"Partially", "note":"Есть контроль WAF/patching, но нет SLA и инвентаря версий"},
+    {"technique":"T1566", "name":"Phishing", "coverage":"No", "note":"Нужна платформа контрфишинга, обучение, симуляции"},
+    {"technique":"T1078", "name":"Valid Accounts", "coverage":"Partially", "note":"Нужен JML, review доступов, MFA, контроль привилегий"},
+    {"technique":"T1486", "name":"Data Encrypted for Impact", "coverage":"Partially", "note":"Нужно резервирование, сегментация, EDR, IR-процедуры"},
+])
+
+
+# ============================
+# STREAMING PARSERS
+# ============================
+
+def _open_text(path):
+    path = str(path)
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+
+def iter_json_array(fp, keys=("CVE_Items", "vulnerabilities")):
+    """Yield items of the first top-level array named in ``keys`` without loading the file."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", -1
+    pattern = re.compile(r'"(%s)"\s*:\s*\[' % "|".join(map(re.escape, keys)))
+    while pos < 0:
+        chunk = fp.read(READ_CHUNK)
+        if not chunk:
+            return
+        buf += chunk
+        m = pattern.search(buf)
+        if m:
+            buf, pos = buf[m.end():], 0
+        else:
+            buf = buf[-256:]
+    while True:
+        # позиция двигается по буферу; сдвиг (копирование) — только при дочитывании
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            chunk = fp.read(READ_CHUNK)
+            if not chunk:
+                return
+            buf, pos = chunk, 0
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            chunk = fp.read(READ_CHUNK)
+            if not chunk:
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+
+
+def _nvd_row(item: dict):
+    if "cve" in item and "CVE_data_meta" in item["cve"]:  # JSON 1.1
+        cve = item["cve"]["CVE_data_meta"]["ID"]
+        impact = item.get("impact", {})
+        metric = impact.get("baseMetricV3", {}).get("cvssV3") or impact.get("baseMetricV2", {}).get("cvssV2") or {}
+        cpes = [m.get("cpe23Uri", "") for node in item.get("configurations", {}).get("nodes", [])
+                for m in node.get("cpe_match", [])]
+        modified = item.get("lastModifiedDate")
+    else:  # API 2.0
+        c = item.get("cve", item)
+        cve = c["id"]
+        metrics = c.get("metrics", {})
+        metric = {}
+        for key in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+            if metrics.get(key):
+                metric = metrics[key][0].get("cvssData", {})
+                break
+        cpes = [m.get("criteria", "") for conf in c.get("configurations", []) for node in conf.get("nodes", [])
+                for m in node.get("cpeMatch", [])]
+        modified = c.get("lastModified")
+    vendor = product = None
+    for cpe in cpes:
+        m = CPE_RE.match(cpe)
+        if m:
+            vendor, product = m.group(1), m.group(2)
+            break
+    return (cve, metric.get("baseScore"), metric.get("vectorString"), vendor, product, modified)
+
+
+def iter_nvd(path):
+    with _open_text(path) as fp:
+        for item in iter_json_array(fp):
+            yield _nvd_row(item)
+
+
+def _bdu_severity(text) -> str:
+    for prefix, sev in BDU_SEVERITY.items():
+        if (text or "").startswith(prefix):
+            return sev
+    return None
+
+
+def iter_bdu(path):
+    """Yield (bdu_row, [cve, …]) per <vul> of the FSTEC vulxml export."""
+    parent = None
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as fp:
+        for event, elem in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "vulnerabilities":
+                    parent = elem
+                continue
+            if elem.tag != "vul":
+                continue
+            soft = elem.find("vulnerable_software/soft")
+            vendor = soft.findtext("vendor") if soft is not None else None
+            product = soft.findtext("name") if soft is not None else None
+            cves = [i.text.strip() for i in elem.iter("identifier")
+                    if i.get("type") == "CVE" and i.text]
+            yield ((elem.findtext("identifier"), elem.findtext("name"), _bdu_severity(elem.findtext("severity")),
+                    vendor, product), cves)
+            if parent is not None:
+                parent.remove(elem)
+
+
+# ============================
+# STORE
+# ============================
+
+class Catalog:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._con().executescript(SCHEMA)
+
+    def _con(self) -> sqlite3.Connection:
+        # Одно соединение на поток: version() вызывается на каждом rerun
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def version(self) -> int:
+        row = self._con().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _bump(self, con) -> None:
+        con.execute("INSERT INTO meta(key, value) VALUES ('version', '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def import_nvd(self, path) -> int:
+        """Upsert an NVD feed (full or "modified"); older records never overwrite newer ones."""
+        con = self._con()
+        n, batch = 0, []
+        sql = ("INSERT INTO nvd(cve, cvss, cvss_vector, vendor, product, modified) VALUES (?, ?, ?, ?, ?, ?) "
+               "ON CONFLICT(cve) DO UPDATE SET cvss=excluded.cvss, cvss_vector=excluded.cvss_vector, "
+               "vendor=excluded.vendor, product=excluded.product, modified=excluded.modified "
+               "WHERE excluded.modified IS NULL OR nvd.modified IS NULL OR excluded.modified >= nvd.modified")
+        for row in iter_nvd(path):
+            batch.append(row)
+            if len(batch) >= BATCH_ROWS:
+                n += self._flush(con, sql, batch)
+        n += self._flush(con, sql, batch)
+        self._bump(con)
+        return n
+
+    def import_bdu(self, path) -> int:
+        """Upsert the FSTEC БДУ export (or a partial export with changed entries)."""
+        con = self._con()
+        n, rows, links = 0, [], []
+        sql = ("INSERT INTO bdu(bdu_id, name, severity, vendor, product) VALUES (?, ?, ?, ?, ?) "
+               "ON CONFLICT(bdu_id) DO UPDATE SET name=excluded.name, severity=excluded.severity, "
+               "vendor=excluded.vendor, product=excluded.product")
+        for row, cves in iter_bdu(path):
+            if not row[0]:
+                continue
+            rows.append(row)
+            links.extend((cve, row[0]) for cve in cves)
+            if len(rows) >= BATCH_ROWS:
+                n += self._flush_bdu(con, sql, rows, links)
+        n += self._flush_bdu(con, sql, rows, links)
+        self._bump(con)
+        return n
+
+    def _flush(self, con, sql, batch) -> int:
+        if not batch:
+            return 0
+        con.execute("BEGIN")
+        try:
+            con.executemany(sql, batch)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")  # соединение общее для потока: транзакцию не оставляем открытой
+            raise
+        n = len(batch)
+        batch.clear()
+        return n
+
+    def _flush_bdu(self, con, sql, rows, links) -> int:
+        if not rows:
+            return 0
+        con.execute("BEGIN")
+        try:
+            con.executemany(sql, rows)
+            # связи CVE пересобираются только для пришедших записей
+            con.executemany("DELETE FROM bdu_cve WHERE bdu_id = ?", [(r[0],) for r in rows])
+            con.executemany("INSERT OR IGNORE INTO bdu_cve(cve, bdu_id) VALUES (?, ?)", links)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        n = len(rows)
+        rows.clear()
+        links.clear()
+        return n
+
+    # ---------- lookups ----------
+
+    def counts(self) -> dict:
+        con = self._con()
+        return {t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("nvd", "bdu", "bdu_cve")}
+
+    def lookup(self, key: str) -> pd.DataFrame:
+        """Point lookup by CVE or BDU id (primary-key seek)."""
+        key = key.strip().upper()
+        if key.startswith("BDU"):
+            q = ("SELECT b.bdu_id, b.name, b.severity, b.vendor, b.product, l.cve, n.cvss, n.cvss_vector "
+                 "FROM bdu b LEFT JOIN bdu_cve l ON l.bdu_id = b.bdu_id LEFT JOIN nvd n ON n.cve = l.cve "
+                 "WHERE b.bdu_id = ?")
+        else:
+            q = ("SELECT n.cve, n.cvss, n.cvss_vector, n.vendor, n.product, b.bdu_id, b.severity "
+                 "FROM nvd n LEFT JOIN bdu_cve l ON l.cve = n.cve LEFT JOIN bdu b ON b.bdu_id = l.bdu_id "
+                 "WHERE n.cve = ?")
+        return pd.read_sql_query(q, self._con(), params=(key,))
+
+    def bdu_documents(self) -> pd.DataFrame:
+        """BDU records with their CVE list (demo records while the catalog is empty)."""
+        df = pd.read_sql_query(
+            "SELECT b.bdu_id, b.name, b.severity, b.vendor, b.product, GROUP_CONCAT(l.cve, ', ') AS cves "
+            "FROM bdu b LEFT JOIN bdu_cve l ON l.bdu_id = b.bdu_id GROUP BY b.bdu_id", self._con())
+        if df.empty:
+            df = DEMO_BDU.rename(columns={"mapped_cve": "cves"}).assign(name=None)
+        return df
+
+    def frames(self):
+        """(nvd by CVE, best BDU per CVE) frames for bulk joins."""
+        con = self._con()
+        nvd = pd.read_sql_query("SELECT cve, cvss_vector, vendor, product FROM nvd", con)
+        bdu = pd.read_sql_query(
+            "SELECT l.cve, b.bdu_id, b.severity, b.vendor, b.product FROM bdu_cve l JOIN bdu b ON b.bdu_id = l.bdu_id", con)
+        if nvd.empty and bdu.empty:
+            bdu = DEMO_BDU.rename(columns={"mapped_cve": "cve"})[["cve", "bdu_id", "severity", "vendor", "product"]]
+        return nvd.set_index("cve"), _best_bdu(bdu)
+
+
+def _best_bdu(bdu: pd.DataFrame) -> pd.DataFrame:
+    # Несколько БДУ на один CVE → берём самую высокую опасность.
+    rank = bdu["severity"].map(SEVERITY_RANK).fillna(0)
+    return bdu.assign(_r=rank).sort_values("_r", ascending=False).drop_duplicates("cve").drop(columns="_r").set_index("cve")
+
+
+def _take(frame: pd.DataFrame, col: str, pos: np.ndarray) -> np.ndarray:
+    values = frame[col].to_numpy(dtype=object)
+    out = np.full(len(pos), None, dtype=object)
+    hit = pos >= 0
+    out[hit] = values[pos[hit]]
+    return out
+
+
+def enrich(vulns: pd.DataFrame, nvd: pd.DataFrame, bdu: pd.DataFrame) -> pd.DataFrame:
+    """Add CVSS vector, vendor/product and BDU id/severity to every finding in one pass."""
+    keys = vulns["cve"]
+    npos = nvd.index.get_indexer(keys) if len(nvd) else np.full(len(keys), -1)
+    bpos = bdu.index.get_indexer(keys) if len(bdu) else np.full(len(keys), -1)
+    out = vulns.copy(deep=False)
+    out["cvss_vector"] = _take(nvd, "cvss_vector", npos) if len(nvd) else None
+    vendor = _take(nvd, "vendor", npos) if len(nvd) else np.full(len(keys), None, dtype=object)
+    product = _take(nvd, "product", npos) if len(nvd) else np.full(len(keys), None, dtype=object)
+    if len(bdu):
+        # вендор/продукт из БДУ — если в NVD их нет
+        miss = pd.isna(vendor)
+        vendor[miss] = _take(bdu, "vendor", bpos)[miss]
+        miss = pd.isna(product)
+        product[miss] = _take(bdu, "product", bpos)[miss]
+    out["vendor"], out["product"] = vendor, product
+    out["bdu_id"] = _take(bdu, "bdu_id", bpos) if len(bdu) else None
+    out["bdu_severity"] = _take(bdu, "severity", bpos) if len(bdu) else None
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Импорт фидов NVD / БДУ ФСТЭК в локальный каталог ПКС")
+    ap.add_argument("--db", required=True)
+    ap.add_argument("kind", choices=["nvd", "bdu"])
+    ap.add_argument("files", nargs="+")
+    args = ap.parse_args(argv)
+    cat = Catalog(args.db)
+    for f in args.files:
+        n = cat.import_nvd(f) if args.kind == "nvd" else cat.import_bdu(f)
+        print(f"{f}: {n} записей")
+    print(cat.counts())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
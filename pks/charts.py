@@ -0,0 +1,107 @@
+"""Large-data Plotly helpers: WebGL scatter, min–max bands, server-side binning.
+
+Every helper keeps the figure payload bounded regardless of the input size:
+lines are drawn from pre-aggregated buckets, histograms and dense scatters are
+pre-binned with NumPy and only the bins (plus a few extreme points) are sent.
+``x_range`` re-aggregates inside a window, which is how a zoomed view gets
+finer bins instead of a stretched coarse picture.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from pks.model import widen
+
+WEBGL_THRESHOLD = 5_000
+SCATTER_MAX_POINTS = 50_000
+DENSITY_BINS = 120
+OUTLIER_POINTS = 1_000
+
+
+def _window(df: pd.DataFrame, x: str, x_range):
+    if x_range is None:
+        return df
+    lo, hi = x_range
+    col = df[x]
+    return df[(col >= lo) & (col <= hi)]
+
+
+def band(df: pd.DataFrame, x: str, y: str, lo: str, hi: str, title=None):
+    """Line of pre-aggregated means with a min–max band (band hidden when lo == hi)."""
+    fig = go.Figure()
+    if (df[lo] != df[hi]).any():
+        fig.add_trace(go.Scatter(x=df[x], y=df[hi], mode="lines", line=dict(width=0), showlegend=False,
+                                 hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=df[x], y=df[lo], mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor="rgba(46,134,222,0.18)", name="min–max", hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=df[x], y=df[y], mode="lines+markers" if len(df) <= 200 else "lines",
+                             line=dict(width=3, color="#2E86DE"), name=y))
+    fig.update_layout(title=title, showlegend=False, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+# ============================
+# HISTOGRAMS
+# ============================
+
+def binned_histogram(counts: np.ndarray, edges: np.ndarray, x: str, title=None):
+    """Bar figure from precomputed (counts, edges)."""
+    bins = pd.DataFrame({x: (edges[:-1] + edges[1:]) / 2, "count": counts})
+    fig = px.bar(bins, x=x, y="count", title=title)
+    fig.update_traces(width=float(edges[1] - edges[0]), marker_line_width=0)
+    fig.update_layout(bargap=0.02)
+    return fig
+
+
+def compare_histograms(series: dict, nbins: int = 60, x: str = "value", title=None):
+    """Overlayed server-binned histograms of several samples on shared bins."""
+    allv = np.concatenate([np.asarray(v, dtype=np.float64) for v in series.values()])
+    edges = np.histogram_bin_edges(allv[~np.isnan(allv)], bins=nbins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    frames = [pd.DataFrame({x: centers, "count": np.histogram(v, bins=edges)[0], "series": name})
+              for name, v in series.items()]
+    fig = px.bar(pd.concat(frames, ignore_index=True), x=x, y="count", color="series",
+                 barmode="overlay", opacity=0.6, title=title)
+    fig.update_traces(width=float(edges[1] - edges[0]), marker_line_width=0)
+    fig.update_layout(legend_title_text="")
+    return fig
+
+
+# ============================
+# SCATTER
+# ============================
+
+def scatter(df: pd.DataFrame, x: str, y: str, hover_data=None, title=None, x_range=None,
+            max_points: int = SCATTER_MAX_POINTS, bins: int = DENSITY_BINS, **kwargs):
+    """WebGL scatter above ``WEBGL_THRESHOLD``; server-binned density above ``max_points``."""
+    # Только нужные столбцы: окно копирует их, а не весь фрейм
+    df = _window(df[list(dict.fromkeys([x, y, *(hover_data or [])]))], x, x_range)
+    if len(df) <= max_points:
+        mode = "webgl" if len(df) > WEBGL_THRESHOLD else "auto"
+        return px.scatter(widen(df), x=x, y=y, hover_data=hover_data, title=title, render_mode=mode, **kwargs)
+
+    xs, ys = df[x].to_numpy(dtype=np.float64), df[y].to_numpy(dtype=np.float64)
+    ok = ~(np.isnan(xs) | np.isnan(ys))
+    counts, xe, ye = np.histogram2d(xs[ok], ys[ok], bins=bins)
+    z = np.where(counts > 0, counts, np.nan).T  # пустые ячейки прозрачны
+    fig = go.Figure(go.Heatmap(
+        x=(xe[:-1] + xe[1:]) / 2, y=(ye[:-1] + ye[1:]) / 2, z=z,
+        colorscale="Blues", colorbar=dict(title="N"), hoverongaps=False,
+    ))
+    # Поверх плотности — самые «дальние» точки, чтобы выбросы оставались видимы с подсказками.
+    top = widen(df.nlargest(OUTLIER_POINTS, x))
+    fig.add_traces(px.scatter(top, x=x, y=y, hover_data=hover_data, render_mode="webgl").data)
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def zoom_slider(container, df: pd.DataFrame, x: str, key: str, threshold: int = WEBGL_THRESHOLD, bounds=None):
+    """Range slider for re-aggregating a large chart; None for small data."""
+    if len(df) <= threshold:
+        return None
+    lo, hi = bounds or (float(df[x].min()), float(df[x].max()))
+    if lo == hi:
+        return None
+    sel = container.slider(f"Диапазон {x}", lo, hi, (lo, hi), key=key)
+    return None if sel == (lo, hi) else sel
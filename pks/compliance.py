@@ -0,0 +1,302 @@
+"""Compliance coverage engine over requirements, controls and their many-to-many mapping.
+
+``Coverage`` indexes the mapping once (CSR arrays in both directions) and
+keeps per-requirement coverage — the mean of ``min(maturity / target, 1)``
+over the mapped controls — with per-framework status counters.  A maturity
+change of one control touches only the requirements mapped to it; the
+framework counters are adjusted by the difference.
+
+Controls reach risks through a scope (zone / asset type / owner / vector).
+``RiskLinks`` groups the open findings of one data version into cells of
+those attributes, so "which open risks does this gap affect" is an OR over
+a few hundred cells instead of a scan of every finding.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pks.aggregates import OPEN_STATUS
+
+# --- Мок-данные комплаенса (можно расширять) ---
+REQUIREMENTS = [
+    {"framework":"ISO 27001", "req_id":"A.5.1", "requirement":"Политики ИБ утверждены и актуальны", "status":"Partially"},
+    {"framework":"ISO 27001", "req_id":"A.8.1", "requirement":"Инвентаризация активов ведётся централизованно", "status":"Yes"},
+    {"framework":"ISO 27001", "req_id":"A.12.6", "requirement":"Управление тех. уязвимостями", "status":"No"},
+    {"framework":"КИИ-профиль", "req_id":"KII-01", "requirement":"Сегментация и изоляция критических зон", "status":"Partially"},
+    {"framework":"КИИ-профиль", "req_id":"KII-02", "requirement":"Журналирование и контроль админ-действий", "status":"Yes"},
+    {"framework":"Внутр. регламент", "req_id":"REG-07", "requirement":"Управление изменениями (approval/CAB)", "status":"No"},
+]
+
+CONTROLS = [
+    {"control_id":"C-01", "control":"Сегментация зон (T0/T1/T2)", "type":"Technical", "owner":"NetSec", "maturity":2},
+    {"control_id":"C-02", "control":"Hardening CI/репозитория + секреты", "type":"Technical", "owner":"DevOps", "maturity":1},
+    {"control_id":"C-03", "control":"Управление уязвимостями (SLA/patch mgmt)", "type":"Process", "owner":"SecOps", "maturity":1},
+    {"control_id":"C-04", "control":"Управление доступами (review/JML)", "type":"Process", "owner":"IT", "maturity":2},
+    {"control_id":"C-05", "control":"Контроль обновлений и защиты от отката", "type":"Technical", "owner":"Product", "maturity":1},
+]
+
+REQ_MAP = [
+    {"req_id":"A.8.1", "control_id":"C-01"},
+    {"req_id":"A.12.6", "control_id":"C-03"},
+    {"req_id":"KII-01", "control_id":"C-01"},
+    {"req_id":"KII-02", "control_id":"C-04"},
+    {"req_id":"REG-07", "control_id":"C-02"},
+    {"req_id":"REG-07", "control_id":"C-03"},
+]
+
+
+# Область действия мер: на какие находки влияет мера (пусто — на все открытые)
+CONTROL_SCOPES = {
+    "C-01": {"vector": ["Network", "Adjacent"]},
+    "C-02": {"type": ["CI/CD"]},
+    "C-03": {},
+    "C-04": {"zone": ["T0"]},
+    "C-05": {"owner": ["Product"]},
+}
+SCOPE_ATTRS = ("zone", "type", "owner", "vector")
+
+TARGET_MATURITY = 3  # целевой уровень зрелости (шкала 0–5)
+MATURITY_LEVELS = range(0, 6)
+COVERAGE_STATUSES = ["Yes", "Partially", "No"]
+_EPS = 1e-9
+
+
+def frames():
+    """(requirements, controls, req_map) as DataFrames."""
+    return pd.DataFrame(REQUIREMENTS), pd.DataFrame(CONTROLS), pd.DataFrame(REQ_MAP)
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n: int):
+    """Group ``values`` by ``keys`` in [0, n) → (ptr, values sorted by key)."""
+    order = np.argsort(keys, kind="stable")
+    return np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n))]), values[order]
+
+
+def _status(coverage: np.ndarray) -> np.ndarray:
+    """Codes into ``COVERAGE_STATUSES``."""
+    return np.where(coverage >= 1 - _EPS, 0, np.where(coverage > _EPS, 1, 2))
+
+
+class RiskLinks:
+    """Open findings of one data version grouped into scope cells, linked to controls and requirements."""
+
+    def __init__(self, cells: pd.DataFrame, cell_of_row: np.ndarray, control_cells: np.ndarray,
+                 req_cells: np.ndarray):
+        self.cells = cells                  # zone/type/owner/vector, count, loss
+        self.cell_of_row = cell_of_row      # ячейка каждой строки risks; -1 — не открыта
+        self.control_cells = control_cells  # bool [мер × ячеек]
+        self.req_cells = req_cells          # bool [требований × ячеек]
+        self._count = cells["count"].to_numpy(np.int64)
+        self._loss = cells["loss"].to_numpy(np.float64)
+
+    def totals(self, mask: np.ndarray):
+        """(open findings, potential loss) over the cells in ``mask`` ([..., cells] → [...])."""
+        return mask @ self._count, mask @ self._loss
+
+    def rows(self, mask: np.ndarray) -> np.ndarray:
+        """Positions in ``risks`` of the open findings in the cells of ``mask``."""
+        return np.flatnonzero(np.append(mask, False)[self.cell_of_row])
+
+
+class Coverage:
+    """Shared coverage state: indexed requirement ↔ control mapping plus incrementally kept rollups."""
+
+    def __init__(self, reqs: pd.DataFrame = None, controls: pd.DataFrame = None, req_map: pd.DataFrame = None,
+                 scopes: dict = None, target: float = TARGET_MATURITY):
+        if reqs is None:
+            reqs, controls, req_map = frames()
+            scopes = CONTROL_SCOPES if scopes is None else scopes
+        self.lock = threading.RLock()
+        self.version = 0
+        self.target = target
+        self.scopes = scopes or {}
+        self.reqs = reqs.rename(columns={"status": "declared"}).reset_index(drop=True)
+        self._controls = controls.reset_index(drop=True)
+        self._req_pos = pd.Index(self.reqs["req_id"])
+        self._ctl_pos = pd.Index(self._controls["control_id"])
+
+        edges = pd.DataFrame({"r": self._req_pos.get_indexer(req_map["req_id"]),
+                              "c": self._ctl_pos.get_indexer(req_map["control_id"])})
+        edges = edges[(edges["r"] >= 0) & (edges["c"] >= 0)].drop_duplicates()
+        self._edge_r, self._edge_c = edges["r"].to_numpy(np.int64), edges["c"].to_numpy(np.int64)
+        n_req, n_ctl = len(self.reqs), len(self._controls)
+        self._req_ptr, self._req_ctls = _csr(self._edge_r, self._edge_c, n_req)
+        self._ctl_ptr, self._ctl_reqs = _csr(self._edge_c, self._edge_r, n_ctl)
+        self._req_n = np.diff(self._req_ptr)
+
+        fw = pd.Categorical(self.reqs["framework"])
+        self.frameworks = list(fw.categories)
+        self._fw = fw.codes.astype(np.int64)
+        self._fw_rows = {name: np.flatnonzero(self._fw == i) for i, name in enumerate(self.frameworks)}
+
+        self._maturity = self._controls["maturity"].to_numpy(np.float64)
+        self._contrib = np.minimum(self._maturity / target, 1.0)
+        self._req_sum = np.bincount(self._edge_r, self._contrib[self._edge_c], minlength=n_req)
+        self._coverage = np.divide(self._req_sum, self._req_n, out=np.zeros(n_req), where=self._req_n > 0)
+        self._status = _status(self._coverage)
+        self._fw_status = np.zeros((len(self.frameworks), len(COVERAGE_STATUSES)), np.int64)
+        np.add.at(self._fw_status, (self._fw, self._status), 1)
+        self._fw_cov = np.bincount(self._fw, self._coverage, minlength=len(self.frameworks))
+        self._mapping = None
+
+    # ---------- updates ----------
+
+    def set_maturity(self, control_id: str, maturity: float) -> int:
+        """Change one control's maturity; only its requirements are recomputed → their number."""
+        with self.lock:
+            c = self._ctl_pos.get_loc(control_id)
+            self._maturity[c] = maturity
+            new = min(max(maturity, 0) / self.target, 1.0)
+            delta, self._contrib[c] = new - self._contrib[c], new
+            reqs = self._ctl_reqs[self._ctl_ptr[c]:self._ctl_ptr[c + 1]]
+            if delta and len(reqs):
+                old_cov, old_status = self._coverage[reqs], self._status[reqs]
+                self._req_sum[reqs] += delta
+                self._coverage[reqs] = self._req_sum[reqs] / self._req_n[reqs]
+                self._status[reqs] = _status(self._coverage[reqs])
+                fw = self._fw[reqs]
+                np.add.at(self._fw_status, (fw, old_status), -1)
+                np.add.at(self._fw_status, (fw, self._status[reqs]), 1)
+                np.add.at(self._fw_cov, fw, self._coverage[reqs] - old_cov)
+            self._mapping = None
+            self.version += 1
+            return len(reqs)
+
+    # ---------- risk links ----------
+
+    def link(self, risks: pd.DataFrame, assets: pd.DataFrame) -> RiskLinks:
+        """Scope cells of the open findings in ``risks`` (build once per data version)."""
+        meta = assets.drop_duplicates("asset_id", keep="last").set_index("asset_id")
+        attrs = {a: (risks[a] if a in risks.columns else meta[a].reindex(risks["asset_id"]))
+                 for a in SCOPE_ATTRS}
+        codes, uniques = [], []
+        for a in SCOPE_ATTRS:
+            code, values = pd.factorize(pd.Series(attrs[a]).astype(object).to_numpy(), use_na_sentinel=False)
+            codes.append(code.astype(np.int64))
+            uniques.append(values)
+        key = np.zeros(len(risks), np.int64)
+        for code, values in zip(codes, uniques):
+            key = key * len(values) + code
+        is_open = (risks["status"] == OPEN_STATUS).to_numpy()
+        cell_key, cell_of_row = np.unique(key[is_open], return_inverse=True)
+        row_cell = np.full(len(risks), -1, np.int64)
+        row_cell[is_open] = cell_of_row
+        cells = {}
+        rest = cell_key
+        for a, values in reversed(list(zip(SCOPE_ATTRS, uniques))):
+            cells[a] = np.asarray(values, dtype=object)[rest % len(values)]
+            rest = rest // len(values)
+        cells = pd.DataFrame({a: cells[a] for a in SCOPE_ATTRS})
+        cells["count"] = np.bincount(cell_of_row, minlength=len(cells))
+        loss = risks["loss_max"].to_numpy(np.float64)[is_open] if "loss_max" in risks.columns else np.zeros(is_open.sum())
+        cells["loss"] = np.bincount(cell_of_row, loss, minlength=len(cells))
+
+        control_cells = np.ones((len(self._controls), len(cells)), bool)
+        for c, cid in enumerate(self._controls["control_id"]):
+            for attr, allowed in self.scopes.get(cid, {}).items():
+                control_cells[c] &= cells[attr].isin(allowed).to_numpy()
+        req_cells = np.zeros((len(self.reqs), len(cells)), bool)
+        mapped = self._req_n > 0
+        if mapped.any():  # OR по мерам каждого требования — один проход по рёбрам
+            req_cells[mapped] = np.logical_or.reduceat(control_cells[self._req_ctls], self._req_ptr[:-1][mapped])
+        return RiskLinks(cells, row_cell, control_cells, req_cells)
+
+    # ---------- reads ----------
+
+    def _gaps(self, rows: np.ndarray) -> np.ndarray:
+        return rows[self._status[rows] != 0]
+
+    def requirements(self, links: RiskLinks, framework: str = None) -> pd.DataFrame:
+        """Requirements (of ``framework``) with coverage and the open risks their gap affects."""
+        with self.lock:
+            rows = self._fw_rows.get(framework, np.arange(len(self.reqs))) if framework else np.arange(len(self.reqs))
+            gap = self._status[rows] != 0
+            risks, loss = links.totals(links.req_cells[rows])
+            out = self.reqs.iloc[rows].assign(
+                status=np.asarray(COVERAGE_STATUSES, dtype=object)[self._status[rows]],
+                coverage=np.round(self._coverage[rows] * 100, 1),
+                controls=self._req_n[rows],
+                gap_risks=np.where(gap, risks, 0),
+                gap_loss=np.where(gap, loss, 0),
+            )
+        return out[["framework", "req_id", "requirement", "status", "declared", "coverage", "controls", "gap_risks",
+                    "gap_loss"]]
+
+    def status_counts(self, framework: str = None) -> pd.DataFrame:
+        """Coverage statuses of ``framework`` (or all) from the maintained counters."""
+        with self.lock:
+            counts = self._fw_status.sum(axis=0) if not framework else self._fw_status[self.frameworks.index(framework)]
+        return pd.DataFrame({"status": COVERAGE_STATUSES, "count": counts})
+
+    def gap_rows(self, links: RiskLinks, req_id: str) -> np.ndarray:
+        """Positions in ``risks`` of the open findings affected by ``req_id`` (score order)."""
+        return links.rows(links.req_cells[self._req_pos.get_loc(req_id)])
+
+    def by_framework(self, links: RiskLinks) -> pd.DataFrame:
+        with self.lock:
+            n = self._fw_status.sum(axis=1)
+            masks = np.array([links.req_cells[self._gaps(self._fw_rows[f])].any(axis=0) for f in self.frameworks],
+                             dtype=bool).reshape(len(self.frameworks), -1)
+            risks, loss = links.totals(masks)
+            out = pd.DataFrame({"framework": self.frameworks, "requirements": n})
+            for i, status in enumerate(COVERAGE_STATUSES):
+                out[status] = self._fw_status[:, i]
+            out["coverage"] = np.round(np.divide(self._fw_cov, n, out=np.zeros(len(n)), where=n > 0) * 100, 1)
+        return out.assign(gap_risks=risks, gap_loss=loss)
+
+    def by_control(self, links: RiskLinks) -> pd.DataFrame:
+        """Controls with maturity, mapped requirements/frameworks, gaps and open risks in scope."""
+        with self.lock:
+            n_ctl = len(self._controls)
+            gap_edge = self._status[self._edge_r] != 0
+            frameworks = pd.DataFrame({"c": self._edge_c, "f": self._fw[self._edge_r]}).drop_duplicates()
+            risks, loss = links.totals(links.control_cells)
+            out = self._controls.assign(
+                maturity=self._maturity.copy(),
+                requirements=np.bincount(self._edge_c, minlength=n_ctl),
+                frameworks=np.bincount(frameworks["c"].to_numpy(), minlength=n_ctl),
+                gaps=np.bincount(self._edge_c[gap_edge], minlength=n_ctl),
+                open_risks=risks, loss=loss,
+            )
+        return out
+
+    def by_owner(self, links: RiskLinks) -> pd.DataFrame:
+        """Control owners: controls, mean maturity, requirements and gaps touched, open risks in scope."""
+        with self.lock:
+            owner = pd.Categorical(self._controls["owner"])
+            o, n_own = owner.codes.astype(np.int64), len(owner.categories)
+            pairs = pd.DataFrame({"o": o[self._edge_c], "r": self._edge_r}).drop_duplicates()
+            gap_pairs = pairs[self._status[pairs["r"].to_numpy()] != 0]
+            masks = np.zeros((n_own, links.control_cells.shape[1]), bool)
+            np.logical_or.at(masks, o, links.control_cells)
+            risks, loss = links.totals(masks)
+            controls = np.bincount(o, minlength=n_own)
+            out = pd.DataFrame({
+                "owner": list(owner.categories), "controls": controls,
+                "maturity": np.round(np.bincount(o, self._maturity, minlength=n_own) / np.maximum(controls, 1), 2),
+                "requirements": np.bincount(pairs["o"].to_numpy(), minlength=n_own),
+                "gaps": np.bincount(gap_pairs["o"].to_numpy(), minlength=n_own),
+                "open_risks": risks, "loss": loss,
+            })
+        return out
+
+    def controls(self) -> pd.DataFrame:
+        """Control registry with the current maturity."""
+        with self.lock:
+            return self._controls.assign(maturity=self._maturity.copy())
+
+    def mapping(self) -> pd.DataFrame:
+        """Requirement ↔ control rows (joined once; maturity and coverage follow updates)."""
+        with self.lock:
+            if self._mapping is None:
+                r, c = self._edge_r, self._edge_c
+                req, ctl = self.reqs.iloc[r].reset_index(drop=True), self._controls.iloc[c].reset_index(drop=True)
+                self._mapping = pd.DataFrame({
+                    "req_id": req["req_id"], "control_id": ctl["control_id"], "requirement": req["requirement"],
+                    "framework": req["framework"],
+                    "status": np.asarray(COVERAGE_STATUSES, dtype=object)[self._status[r]],
+                    "control": ctl["control"], "owner": ctl["owner"], "maturity": self._maturity[c],
+                    "type": ctl["type"], "coverage": np.round(self._coverage[r] * 100, 1),
+                })
+            return self._mapping
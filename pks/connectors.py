@@ -0,0 +1,784 @@
+"""Source connectors (AD, CMDB, SIEM, ITSM): concurrent polling with delta sync.
+
+``Scheduler`` runs one asyncio task per connector on its own event loop.  A
+poll pages through the changes since the stored cursor — delta token,
+``updated`` watermark or ``search_after``, whatever the source offers — and
+normalizes each page to the ``assets``/``vulns`` schema of
+:mod:`pks.ingest`.  The page and the new cursor are written in one SQLite
+transaction, so an interrupted poll resumes without skipping or re-applying
+a page.  Upserts only touch rows whose values change, and a poll that
+brings nothing new leaves the data file untouched (the dashboard does not
+reload).
+
+HTTP goes through a keep-alive connection pool per source, a token-bucket
+rate limit and retries with exponential backoff and jitter (``Retry-After``
+is honoured).  Poll statistics go to a separate log (``SyncLog``) that feeds
+the readiness matrix: lag since the last successful poll, throughput,
+retries and errors.  :mod:`pks.standins` serves local stand-ins of all four
+sources.
+
+    PKS_CONNECTORS="ad=http://…,siem=https://…?rate=5" python -m pks.connectors --db data.db --once
+    python -m pks.connectors --db data.db --standin 5000 --once
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import sqlite3
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pandas as pd
+
+from pks.ingest import NEW_ASSET, av_vector, connect
+
+PAGE_SIZE = 500
+RATE = 20.0  # запросов/с на источник
+POOL_SIZE = 2
+RETRIES = 5
+TIMEOUT_S = 15.0
+BACKOFF_S = 0.5
+BACKOFF_MAX_S = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SYNC_INTERVAL = 60.0
+LAG_FACTOR = 3  # «отстаёт», если успешного опроса не было дольше LAG_FACTOR интервалов
+RUN_RETENTION_S = 7 * 86400
+
+ZONES = ("Edge", "T0", "T1", "T2")
+ZONE_RE = re.compile(r"\bOU=(" + "|".join(ZONES) + r")\b", re.IGNORECASE)
+IP_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+class SyncError(RuntimeError):
+    """A source request failed after all retries (or with a non-retryable status)."""
+
+
+def host_id(name) -> str:
+    """Asset key of a host name: lower case, short name for FQDNs."""
+    name = str(name or "").strip().lower()
+    return name if IP_RE.match(name) else name.split(".", 1)[0]
+
+
+# ============================
+# HTTP
+# ============================
+
+class RateLimiter:
+    """Token bucket: ``rate`` requests/s, bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self._tokens, self._stamp = self.capacity, time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HttpPool:
+    """Keep-alive HTTP/1.1 connections to one origin, at most ``size`` in use at a time."""
+
+    def __init__(self, base_url: str, size: int = POOL_SIZE, timeout: float = TIMEOUT_S, headers: dict = None):
+        u = urlsplit(base_url)
+        if u.scheme not in ("http", "https") or not u.hostname:
+            raise ValueError(f"Некорректный адрес источника: {base_url!r}")
+        self.host, self.port = u.hostname, u.port or (443 if u.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if u.scheme == "https" else None
+        self.prefix = u.path.rstrip("/")
+        self.headers = {"Host": u.netloc, "Accept": "application/json", "Accept-Encoding": "identity",
+                        "User-Agent": "pks-connector", **(headers or {})}
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(max(size, 1))
+
+    async def _open(self):
+        self.opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+
+    @staticmethod
+    async def _exchange(reader, writer, request: bytes):
+        writer.write(request)
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("соединение закрыто источником")
+        status = int(line.split(None, 2)[1])
+        head = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            k, _, v = line.decode("latin-1").partition(":")
+            head[k.strip().lower()] = v.strip()
+        if "chunked" in head.get("transfer-encoding", "").lower():
+            body = bytearray()
+            while size := int((await reader.readline()).split(b";", 1)[0], 16):
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            while await reader.readline() not in (b"\r\n", b"\n", b""):  # трейлеры
+                pass
+        elif "content-length" in head:
+            body = await reader.readexactly(int(head["content-length"]))
+        else:
+            body = await reader.read()
+            head["connection"] = "close"
+        return status, head, bytes(body)
+
+    async def get(self, target: str, headers: dict = None):
+        """GET ``prefix + target`` → (status, lower-case headers, body)."""
+        lines = [f"GET {self.prefix}{target} HTTP/1.1", *(f"{k}: {v}" for k, v in {**self.headers, **(headers or {})}.items())]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await self._open()
+                try:
+                    status, head, body = await asyncio.wait_for(self._exchange(reader, writer, request), self.timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+                    writer.close()
+                    if reused:  # простаивавшее соединение закрыто источником — берём следующее
+                        continue
+                    raise
+                if head.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self._idle.append((reader, writer))
+                return status, head, body
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+
+def _retry_after(value):
+    try:
+        return min(max(float(value), 0.0), BACKOFF_MAX_S)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX_S, BACKOFF_S * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+# ============================
+# CONNECTORS
+# ============================
+
+@dataclass
+class ConnectorConfig:
+    name: str
+    url: str
+    token: str = ""
+    page_size: int = PAGE_SIZE
+    rate: float = RATE
+    pool: int = POOL_SIZE
+    retries: int = RETRIES
+    timeout: float = TIMEOUT_S
+
+
+@dataclass
+class Batch:
+    """One source page normalized to the store schema."""
+    received: int = 0
+    assets: list = field(default_factory=list)    # (asset_id, type, zone, criticality, owner)
+    vulns: list = field(default_factory=list)     # (cve, asset_id, cvss, vector, status)
+    statuses: list = field(default_factory=list)  # (status, cve, asset_id)
+
+
+@dataclass
+class RunStats:
+    connector: str
+    started: float
+    finished: float = 0.0
+    received: int = 0
+    applied: int = 0
+    pages: int = 0
+    requests: int = 0
+    retries: int = 0
+    error: str = None
+
+
+class Connector:
+    """Base: HTTP session of one source plus its delta protocol (``pages``) and mapping (``normalize``)."""
+    name = label = ""
+    assets_mode = "discovery"  # "authoritative" — поля активов из источника перекрывают имеющиеся
+
+    def __init__(self, config: ConnectorConfig):
+        self.config = config
+        self.stats = RunStats(config.name, time.time())
+        self._http = self._limiter = None
+
+    def open(self) -> None:
+        auth = {"Authorization": f"Bearer {self.config.token}"} if self.config.token else None
+        self._http = HttpPool(self.config.url, self.config.pool, self.config.timeout, auth)
+        self._limiter = RateLimiter(self.config.rate)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.close()
+
+    async def fetch(self, target: str, params: dict = None, headers: dict = None) -> dict:
+        """GET JSON with the rate limit and retry/backoff."""
+        if params:
+            target += ("&" if "?" in target else "?") + urlencode(params)
+        cfg, stats = self.config, self.stats
+        for attempt in range(cfg.retries + 1):
+            await self._limiter.acquire()
+            stats.requests += 1
+            wait = None
+            try:
+                status, head, body = await self._http.get(target, headers)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if status == 200:
+                    return json.loads(body)
+                if status not in RETRY_STATUS:
+                    raise SyncError(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+                error, wait = f"HTTP {status}", _retry_after(head.get("retry-after"))
+            if attempt == cfg.retries:
+                raise SyncError(f"{error} (попыток: {attempt + 1})")
+            stats.retries += 1
+            await asyncio.sleep(_backoff(attempt) if wait is None else wait)
+
+    def _relative(self, link: str) -> str:
+        u = urlsplit(link)
+        path = u.path[len(self._http.prefix):] if u.path.startswith(self._http.prefix) else u.path
+        return f"{path}?{u.query}" if u.query else path
+
+    async def pages(self, cursor):
+        """Async iterator of (Batch, cursor after the page), starting after ``cursor`` (None — full sync)."""
+        raise NotImplementedError
+        yield
+
+    def normalize(self, items: list) -> Batch:
+        raise NotImplementedError
+
+
+class WatermarkConnector(Connector):
+    """``updated >= watermark`` queries; every page restarts at the newest watermark seen, upserts are idempotent.
+
+    An offset into a moving result set skips rows: a record updated while the
+    round pages moves to the end and shifts the rest back.  Restarting at the
+    last watermark re-reads only its tie group; the offset advances only while
+    a whole page shares one watermark (more changes per tick than a page).
+    """
+    epoch = ""
+
+    async def query(self, since: str, offset: int) -> list:
+        raise NotImplementedError
+
+    def watermark(self, item: dict) -> str:
+        raise NotImplementedError
+
+    async def pages(self, cursor):
+        since, offset = (cursor["since"], cursor.get("offset", 0)) if cursor else (self.epoch, 0)
+        size = self.config.page_size
+        while True:
+            items = await self.query(since, offset)
+            top = max(map(self.watermark, items), default="") or since
+            if len(items) < size:  # раунд закончен: следующий опрос — от самого свежего изменения
+                yield self.normalize(items), {"since": top, "offset": 0}
+                return
+            since, offset = (top, 0) if top > since else (since, offset + len(items))
+            yield self.normalize(items), {"since": since, "offset": offset}
+
+
+def _display(value) -> str:
+    if isinstance(value, dict):
+        value = value.get("display_value") or value.get("value")
+    return str(value) if value else ""
+
+
+def _value(value) -> str:
+    """Internal value of a ``sysparm_display_value=all`` field (dates — UTC ``YYYY-MM-DD HH:MM:SS``)."""
+    if isinstance(value, dict):
+        value = value.get("value")
+    return str(value) if value else ""
+
+
+def _zone(text: str) -> str:
+    return next((z for z in ZONES if z.lower() == text.strip().lower()), NEW_ASSET[1])
+
+
+def _device_type(os_name: str) -> str:
+    os_name = (os_name or "").lower()
+    if "server" in os_name or any(s in os_name for s in ("linux", "ubuntu", "rhel", "debian")):
+        return "Server"
+    if "windows" in os_name or "macos" in os_name:
+        return "Workstation"
+    return "Network" if any(s in os_name for s in ("fortios", "ios", "junos", "panos")) else NEW_ASSET[0]
+
+
+class GraphDevices(Connector):
+    """AD/Entra computers via the Microsoft Graph delta query (``/devices/delta``, delta/skip tokens)."""
+    name, label = "ad", "AD/LDAP"
+    DELTA = "/v1.0/devices/delta"
+
+    async def pages(self, cursor):
+        link = cursor or self.DELTA
+        headers = {"Prefer": f"odata.maxpagesize={self.config.page_size}"}
+        while True:
+            page = await self.fetch(link, headers=headers)
+            more = "@odata.nextLink" in page
+            link = self._relative(page["@odata.nextLink"] if more else page["@odata.deltaLink"])
+            yield self.normalize(page.get("value", [])), link
+            if not more:
+                return
+
+    def normalize(self, items: list) -> Batch:
+        batch = Batch(received=len(items))
+        for d in items:
+            if "@removed" in d or not d.get("displayName"):  # удаление из каталога не удаляет актив
+                continue
+            ou = ZONE_RE.search(d.get("onPremisesDistinguishedName") or "")
+            owner = (d.get("extensionAttributes") or {}).get("extensionAttribute1") or NEW_ASSET[3]
+            batch.assets.append((host_id(d["displayName"]), _device_type(d.get("operatingSystem")),
+                                 _zone(ou.group(1) if ou else ""), NEW_ASSET[2], owner))
+        return batch
+
+
+CMDB_CLASSES = {"cmdb_ci_win_server": "Server", "cmdb_ci_linux_server": "Server", "cmdb_ci_server": "Server",
+                "cmdb_ci_netgear": "Network", "cmdb_ci_computer": "Workstation", "cmdb_ci_vm_instance": "VM"}
+
+
+class ServiceNowCmdb(WatermarkConnector):
+    """CMDB CIs via the ServiceNow Table API, ``sys_updated_on`` watermark (authoritative for asset fields)."""
+    name, label = "cmdb", "CMDB/Invent"
+    assets_mode = "authoritative"
+    epoch = "1970-01-01 00:00:00"
+    TABLE = "/api/now/table/cmdb_ci"
+
+    async def query(self, since: str, offset: int) -> list:
+        page = await self.fetch(self.TABLE, {
+            "sysparm_query": f"sys_updated_on>={since}^ORDERBYsys_updated_on",
+            "sysparm_limit": self.config.page_size, "sysparm_offset": offset,
+            "sysparm_display_value": "all"})
+        return page.get("result", [])
+
+    def watermark(self, item: dict) -> str:
+        # display_value — в поясе и формате пользователя; в запросе сравнивается внутреннее значение
+        return _value(item.get("sys_updated_on"))
+
+    def normalize(self, items: list) -> Batch:
+        batch = Batch(received=len(items))
+        for ci in items:
+            name = host_id(_display(ci.get("name")))
+            if not name:
+                continue
+            try:
+                crit = min(max(int(_display(ci.get("u_criticality"))), 1), 5)
+            except ValueError:
+                crit = NEW_ASSET[2]
+            batch.assets.append((name, CMDB_CLASSES.get(_display(ci.get("sys_class_name")), NEW_ASSET[0]),
+                                 _zone(_display(ci.get("u_zone"))), crit, _display(ci.get("support_group")) or NEW_ASSET[3]))
+        return batch
+
+
+class WazuhVulns(Connector):
+    """Vulnerability states from the Wazuh indexer, paged with ``search_after`` on (@timestamp, _id)."""
+    name, label = "siem", "SIEM (Wazuh)"
+    SEARCH = "/wazuh-states-vulnerabilities/_search"
+
+    async def pages(self, cursor):
+        after = cursor
+        while True:
+            params = {"size": self.config.page_size, "sort": "@timestamp:asc,_id:asc"}
+            if after:
+                params["search_after"] = ",".join(map(str, after))
+            hits = (await self.fetch(self.SEARCH, params)).get("hits", {}).get("hits", [])
+            if hits:
+                after = hits[-1].get("sort", after)
+            yield self.normalize(hits), after
+            if len(hits) < self.config.page_size:
+                return
+
+    def normalize(self, items: list) -> Batch:
+        batch = Batch(received=len(items))
+        for hit in items:
+            src = hit.get("_source", {})
+            vuln, agent = src.get("vulnerability", {}), host_id(src.get("agent", {}).get("name"))
+            if not agent or not str(vuln.get("id", "")).startswith("CVE-"):
+                continue
+            score = vuln.get("score", {})
+            status = "Mitigated" if str(vuln.get("status", "")).lower() in ("solved", "fixed") else "Open"
+            batch.vulns.append((vuln["id"], agent, score.get("base"), av_vector(score.get("vector")), status))
+        return batch
+
+
+JIRA_STATUS = {"done": "Mitigated", "closed": "Mitigated", "resolved": "Mitigated", "in progress": "In progress"}
+CVE_LABEL = re.compile(r"^CVE-\d{4}-\d{4,}$", re.IGNORECASE)
+
+
+class JiraIssues(WatermarkConnector):
+    """Remediation tickets from Jira search, JQL ``updated`` watermark (minute precision) + ``startAt``."""
+    name, label = "itsm", "ITSM (Jira/SD)"
+    epoch = "1970/01/01 00:00"
+    SEARCH = "/rest/api/2/search"
+
+    async def query(self, since: str, offset: int) -> list:
+        page = await self.fetch(self.SEARCH, {
+            "jql": f'updated >= "{since}" ORDER BY updated ASC, key ASC',
+            "startAt": offset, "maxResults": self.config.page_size,
+            "fields": "status,labels,updated"})
+        return page.get("issues", [])
+
+    def watermark(self, item: dict) -> str:
+        updated = item.get("fields", {}).get("updated") or ""  # 2024-05-01T12:34:56.000+0000
+        return updated[:16].replace("-", "/").replace("T", " ")
+
+    def normalize(self, items: list) -> Batch:
+        batch = Batch(received=len(items))
+        for issue in items:
+            f = issue.get("fields", {})
+            status = JIRA_STATUS.get(str((f.get("status") or {}).get("name", "")).lower())
+            labels = f.get("labels") or []
+            cves = [l.upper() for l in labels if CVE_LABEL.match(l)]
+            hosts = [host_id(l) for l in labels if not CVE_LABEL.match(l)]
+            if status is None or not cves or not hosts:  # открытый тикет статус находки не меняет
+                continue
+            batch.statuses += [(status, cve, host) for cve in cves for host in hosts]
+        return batch
+
+
+CONNECTORS = {c.name: c for c in (GraphDevices, ServiceNowCmdb, WazuhVulns, JiraIssues)}
+
+
+def parse_spec(spec: str) -> list:
+    """``"ad=http://…,siem=https://…?rate=5&page_size=1000"`` → configs; tokens from ``PKS_<NAME>_TOKEN``."""
+    configs = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, url = part.partition("=")
+        if name not in CONNECTORS:
+            raise ValueError(f"Неизвестный коннектор: {name!r} (есть: {', '.join(CONNECTORS)})")
+        u = urlsplit(url)
+        options = {}
+        for key, values in parse_qs(u.query).items():
+            if key in ("name", "url") or not hasattr(ConnectorConfig, key):
+                raise ValueError(f"{name}: неизвестный параметр {key!r}")
+            options[key] = type(getattr(ConnectorConfig, key))(values[-1])
+        options.setdefault("token", os.environ.get(f"PKS_{name.upper()}_TOKEN", ""))
+        configs.append(ConnectorConfig(name, u._replace(query="").geturl(), **options))
+    return configs
+
+
+# ============================
+# STORE
+# ============================
+
+SYNC_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    connector TEXT PRIMARY KEY, cursor TEXT NOT NULL, updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ticket_statuses (
+    cve TEXT NOT NULL, asset_id TEXT NOT NULL, status TEXT NOT NULL,
+    PRIMARY KEY (cve, asset_id)
+) WITHOUT ROWID;
+"""
+_CHANGED = "assets.type IS NOT excluded.type OR assets.zone IS NOT excluded.zone OR assets.owner IS NOT excluded.owner"
+ASSET_UPSERT = {
+    "authoritative": (
+        "INSERT INTO assets(asset_id, type, zone, criticality, owner) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(asset_id) DO UPDATE SET type = excluded.type, zone = excluded.zone, "
+        "criticality = excluded.criticality, owner = excluded.owner "
+        f"WHERE {_CHANGED} OR assets.criticality IS NOT excluded.criticality"),
+    # Каталог дополняет только активы, которых CMDB ещё не видела
+    "discovery": (
+        "INSERT INTO assets(asset_id, type, zone, criticality, owner) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(asset_id) DO UPDATE SET type = excluded.type, zone = excluded.zone, owner = excluded.owner "
+        f"WHERE assets.zone = '{NEW_ASSET[1]}' AND ({_CHANGED})"),
+}
+# Детектор решает «открыта/устранена»; «In progress» из ITSM повторным «Open» не сбрасывается
+VULN_UPSERT = (
+    "INSERT INTO vulns(cve, asset_id, cvss, vector, status, source, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(cve, asset_id) DO UPDATE SET cvss = excluded.cvss, vector = excluded.vector, "
+    "status = CASE WHEN excluded.status = 'Open' AND vulns.status = 'In progress' THEN vulns.status "
+    "ELSE excluded.status END "
+    "WHERE vulns.cvss IS NOT excluded.cvss OR vulns.vector IS NOT excluded.vector "
+    "OR (vulns.status IS NOT excluded.status AND NOT (excluded.status = 'Open' AND vulns.status = 'In progress'))")
+STATUS_UPDATE = "UPDATE vulns SET status = ? WHERE cve = ? AND asset_id = ? AND status IS NOT ?"
+# Статус тикета хранится отдельно: находка может прийти из SIEM позже тикета (курсор ITSM к тому времени ушёл)
+TICKET_UPSERT = (
+    "INSERT INTO ticket_statuses(status, cve, asset_id) VALUES (?, ?, ?) "
+    "ON CONFLICT(cve, asset_id) DO UPDATE SET status = excluded.status "
+    "WHERE ticket_statuses.status IS NOT excluded.status")
+# ...и применяется к находке, вставленной этой же транзакцией (first_seen — её отметка времени)
+TICKET_APPLY = (
+    "UPDATE vulns SET status = t.status FROM ticket_statuses t "
+    "WHERE vulns.cve = ? AND vulns.asset_id = ? AND vulns.first_seen = ? "
+    "AND t.cve = vulns.cve AND t.asset_id = vulns.asset_id AND vulns.status IS NOT t.status")
+CURSOR_UPSERT = (
+    "INSERT INTO sync_cursors(connector, cursor, updated) VALUES (?, ?, ?) "
+    "ON CONFLICT(connector) DO UPDATE SET cursor = excluded.cursor, updated = excluded.updated "
+    "WHERE sync_cursors.cursor IS NOT excluded.cursor")
+
+
+class Sink:
+    """Applies normalized pages to the SQLite data store together with the connector cursor."""
+
+    def __init__(self, db_path):
+        self.path = str(db_path)
+        self._local = threading.local()
+        self._con().executescript(SYNC_SCHEMA)
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = connect(self.path)
+        return con
+
+    def cursor(self, name: str):
+        row = self._con().execute("SELECT cursor FROM sync_cursors WHERE connector = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def save_cursor(self, name: str, cursor) -> None:
+        self._con().execute(CURSOR_UPSERT, (name, json.dumps(cursor, ensure_ascii=False), time.time()))
+
+    def apply(self, connector: Connector, batch: Batch, cursor) -> int:
+        """Write ``batch`` and ``cursor`` atomically → rows actually changed.
+
+        A page that changes nothing does not write the cursor either: the file
+        stays untouched and the caller saves the final cursor of the round.
+        """
+        con, now = self._con(), time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            before = con.total_changes
+            if batch.assets:
+                con.executemany(ASSET_UPSERT[connector.assets_mode], batch.assets)
+            if batch.vulns:
+                con.executemany(VULN_UPSERT, [(*v, connector.name, now) for v in batch.vulns])
+                con.executemany(TICKET_APPLY, [(v[0], v[1], now) for v in batch.vulns])
+                con.executemany(
+                    "INSERT OR IGNORE INTO assets(asset_id, type, zone, criticality, owner) VALUES (?, ?, ?, ?, ?)",
+                    [(h, *NEW_ASSET) for h in {v[1] for v in batch.vulns}])
+            if batch.statuses:
+                con.executemany(TICKET_UPSERT, batch.statuses)
+                con.executemany(STATUS_UPDATE, [(*s, s[0]) for s in batch.statuses])
+            changed = con.total_changes - before
+            if changed:
+                con.execute(CURSOR_UPSERT, (connector.name, json.dumps(cursor, ensure_ascii=False), now))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return changed
+
+
+# ============================
+# RUN LOG / READINESS
+# ============================
+
+LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    connector TEXT NOT NULL,
+    started   REAL NOT NULL,
+    finished  REAL NOT NULL,
+    received  INTEGER NOT NULL,
+    applied   INTEGER NOT NULL,
+    pages     INTEGER NOT NULL,
+    requests  INTEGER NOT NULL,
+    retries   INTEGER NOT NULL,
+    error     TEXT,
+    PRIMARY KEY (connector, started)
+) WITHOUT ROWID;
+"""
+
+READINESS_COLUMNS = ["integration", "status", "last_sync", "lag_s", "rows_per_s", "rows_1h", "applied_1h",
+                     "retries_1h", "error"]
+
+
+class SyncLog:
+    """Per-poll statistics of every connector (separate from the data store: polls do not bump its version)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._con().executescript(LOG_SCHEMA)
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def record(self, s: RunStats) -> None:
+        con = self._con()
+        con.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (s.connector, s.started, s.finished, s.received, s.applied, s.pages, s.requests, s.retries,
+                     s.error))
+        con.execute("DELETE FROM runs WHERE connector = ? AND started < ?", (s.connector, s.finished - RUN_RETENTION_S))
+
+    def readiness(self, configured=(), interval: float = SYNC_INTERVAL, now: float = None) -> pd.DataFrame:
+        """One row per known connector: status, last successful poll, lag and last-hour throughput."""
+        now = time.time() if now is None else now
+        con, rows = self._con(), []
+        for name, cls in CONNECTORS.items():
+            last = con.execute("SELECT finished, error FROM runs WHERE connector = ? ORDER BY started DESC LIMIT 1",
+                               (name,)).fetchone()
+            ok = con.execute("SELECT MAX(finished) FROM runs WHERE connector = ? AND error IS NULL",
+                             (name,)).fetchone()[0]
+            received, applied, retries, busy = con.execute(
+                "SELECT COALESCE(SUM(received), 0), COALESCE(SUM(applied), 0), COALESCE(SUM(retries), 0), "
+                "COALESCE(SUM(CASE WHEN received > 0 THEN finished - started END), 0) "
+                "FROM runs WHERE connector = ? AND started >= ?", (name, now - 3600)).fetchone()
+            lag = None if ok is None else now - ok
+            if last is None:
+                status = "Pending" if name in configured else "Not configured"
+            elif last[1] is not None:
+                status = "Error"
+            elif lag > LAG_FACTOR * interval:
+                status = "Lagging"
+            else:
+                status = "OK"
+            rows.append({
+                "integration": cls.label, "status": status,
+                "last_sync": None if ok is None else pd.Timestamp.fromtimestamp(ok).floor("s"),
+                "lag_s": None if lag is None else round(lag), "rows_per_s": round(received / busy) if busy else 0,
+                "rows_1h": int(received), "applied_1h": int(applied), "retries_1h": int(retries),
+                "error": last[1] if last is not None and last[1] else "",
+            })
+        return pd.DataFrame(rows, columns=READINESS_COLUMNS)
+
+
+# ============================
+# SCHEDULER
+# ============================
+
+class Scheduler:
+    """Polls every connector concurrently: one asyncio task per source, each every ``interval`` seconds."""
+
+    def __init__(self, connectors: list, sink: Sink, log: SyncLog, interval: float = SYNC_INTERVAL):
+        self.connectors = {c.name: c for c in connectors}
+        self.sink, self.log, self.interval = sink, log, interval
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pks-sync-db")  # один писатель SQLite
+        self._loop = None
+        self._wake = {}
+
+    @classmethod
+    def from_spec(cls, spec: str, db_path, log_path, interval: float = SYNC_INTERVAL) -> "Scheduler":
+        connectors = [CONNECTORS[c.name](c) for c in parse_spec(spec)]
+        return cls(connectors, Sink(db_path), SyncLog(log_path), interval)
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db, fn, *args)
+
+    async def poll(self, connector: Connector) -> RunStats:
+        """One delta round of ``connector``; failures end up in the stats, never in the caller."""
+        stats = connector.stats = RunStats(connector.name, time.time())
+        try:
+            cursor = await self._call(self.sink.cursor, connector.name)
+            saved = True
+            async for batch, cursor in connector.pages(cursor):
+                stats.pages += 1
+                stats.received += batch.received
+                changed = await self._call(self.sink.apply, connector, batch, cursor)
+                stats.applied += changed
+                saved = changed > 0
+            if not saved:  # страницы без изменений: курсор сдвигается один раз в конце раунда
+                await self._call(self.sink.save_cursor, connector.name, cursor)
+        except Exception as e:
+            stats.error = f"{type(e).__name__}: {e}"
+        stats.finished = time.time()
+        await self._call(self.log.record, stats)
+        return stats
+
+    async def run_once(self) -> list:
+        """Poll all connectors once, concurrently → their ``RunStats``."""
+        for c in self.connectors.values():
+            c.open()
+        try:
+            return await asyncio.gather(*(self.poll(c) for c in self.connectors.values()))
+        finally:
+            await asyncio.gather(*(c.close() for c in self.connectors.values()))
+
+    async def _every(self, connector: Connector) -> None:
+        wake = self._wake[connector.name] = asyncio.Event()
+        while True:
+            await self.poll(connector)
+            with contextlib.suppress(asyncio.TimeoutError):
+                # Разброс ±10%, чтобы источники с одинаковым интервалом не опрашивались синхронно
+                await asyncio.wait_for(wake.wait(), self.interval * random.uniform(0.9, 1.1))
+            wake.clear()
+
+    async def serve(self) -> None:
+        for c in self.connectors.values():
+            c.open()
+        try:
+            await asyncio.gather(*(self._every(c) for c in self.connectors.values()))
+        finally:
+            await asyncio.gather(*(c.close() for c in self.connectors.values()))
+
+    def start(self) -> "Scheduler":
+        """Run :meth:`serve` on a daemon thread with its own event loop."""
+        def main():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve())
+
+        threading.Thread(target=main, name="pks-sync", daemon=True).start()
+        return self
+
+    def trigger(self) -> None:
+        """Poll every connector now instead of waiting for the interval (thread-safe)."""
+        if self._loop is not None:
+            for wake in list(self._wake.values()):
+                self._loop.call_soon_threadsafe(wake.set)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m pks.connectors", description=__doc__.splitlines()[0])
+    ap.add_argument("--db", required=True, help="путь к SQLite (PKS_DATA_SOURCE=sqlite:<путь>)")
+    ap.add_argument("--spec", default=os.environ.get("PKS_CONNECTORS", ""), help="коннекторы, как в PKS_CONNECTORS")
+    ap.add_argument("--log", default=os.environ.get("PKS_SYNC_DB", ".pks/sync.db"))
+    ap.add_argument("--standin", type=int, default=0, metavar="HOSTS", help="поднять локальные стенды источников")
+    ap.add_argument("--interval", type=float, default=SYNC_INTERVAL)
+    ap.add_argument("--once", action="store_true", help="один опрос и выход")
+    args = ap.parse_args(argv)
+    spec = args.spec
+    if args.standin:
+        from pks import standins
+        spec = standins.spec(standins.serve(standins.Estate(args.standin), churn_s=args.interval / 2))
+    if not spec:
+        ap.error("не заданы коннекторы: --spec, PKS_CONNECTORS или --standin")
+    scheduler = Scheduler.from_spec(spec, args.db, args.log, args.interval)
+    if not args.once:
+        asyncio.run(scheduler.serve())
+        return 0
+    failed = 0
+    for s in asyncio.run(scheduler.run_once()):
+        seconds = s.finished - s.started
+        print(f"{s.connector}: {s.received} записей, изменено {s.applied}, страниц {s.pages}, "
+              f"запросов {s.requests}, повторов {s.retries}, {seconds:.2f} с"
+              + (f" — ОШИБКА {s.error}" if s.error else ""))
+        failed += s.error is not None
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
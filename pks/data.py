@@ -0,0 +1,690 @@
+"""Data-source layer: pluggable backends + Streamlit-side memoization.
+
+Every backend exposes ``version()`` (a cheap ETag-like token) and ``load()``.
+``load_dataset()`` keys the cached result on that token, so a rerun that only
+changes a widget value never touches the backend beyond the version probe.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pks import compliance, metrics, standins
+from pks.aggregates import Aggregates
+from pks.catalog import DEMO_MITRE, Catalog, enrich
+from pks.connectors import Scheduler, SyncLog
+from pks.export import Exporter, frame_source, report_source, summary_report
+from pks.filter_index import FilterIndex
+from pks.graph import EDGE_COLUMNS, AttackGraph, empty_edges
+from pks.ingest import Importer
+from pks.model import ASSET_DTYPES, EDGE_DTYPES, ENRICH_DTYPES, RISK_DTYPES, compact
+from pks.retrieval import Corpus, EmbeddingCache, Retriever, dynamic_documents, make_embedder, static_documents
+from pks.scoring import RESCORE_MIN_ROWS, rescore_changed, risk_indices, score_frame
+from pks.simulation import Simulator
+from pks.snapshots import SnapshotStore, to_frame
+from pks.tasks import STATUSES, TaskStore
+from pks.timeseries import RiskSeries
+
+# ============================
+# CONFIG
+# ============================
+
+# "seed" | "seed:<N находок>" | "file:<dir>" | "sqlite:<path.db>"
+DATA_SOURCE = os.environ.get("PKS_DATA_SOURCE", "seed")
+DATA_TTL = int(os.environ.get("PKS_DATA_TTL", "600"))  # сек.
+SNAPSHOT_DIR = os.environ.get("PKS_SNAPSHOT_DIR", ".pks/snapshots")
+TASKS_DB = os.environ.get("PKS_TASKS_DB", ".pks/tasks.db")
+SERIES_DB = os.environ.get("PKS_SERIES_DB", ".pks/series.db")
+CATALOG_DB = os.environ.get("PKS_CATALOG_DB", ".pks/catalog.db")
+EMBEDDER = os.environ.get("PKS_EMBEDDER", "hash")  # "hash" | "st:<модель>"
+EMBED_CACHE = os.environ.get("PKS_EMBED_CACHE", ".pks/embeddings.db")
+METRICS_SAMPLE = float(os.environ.get("PKS_METRICS_SAMPLE", "0.1"))  # доля трассируемых reruns
+METRICS_FILE = os.environ.get("PKS_METRICS_FILE", "")  # *.prom | *.json; пусто — не писать
+METRICS_PORT = int(os.environ.get("PKS_METRICS_PORT", "0"))  # /metrics на 127.0.0.1; 0 — выкл.
+EXPORT_DIR = os.environ.get("PKS_EXPORT_DIR", ".pks/exports")
+EXPORT_WORKERS = int(os.environ.get("PKS_EXPORT_WORKERS", "2"))
+# "ad=<url>,cmdb=<url>,siem=<url>,itsm=<url>" | "standin[:<хостов>]"; пусто — коннекторы выключены
+CONNECTORS = os.environ.get("PKS_CONNECTORS", "")
+SYNC_INTERVAL = float(os.environ.get("PKS_SYNC_INTERVAL", "60"))  # сек.
+SYNC_DB = os.environ.get("PKS_SYNC_DB", ".pks/sync.db")
+
+SNAPSHOT_OFFSETS = {"Текущий": 0, "7 дней назад": 7, "30 дней назад": 30}
+
+ASSET_COLUMNS = ["asset_id", "type", "zone", "criticality", "owner"]
+VULN_COLUMNS = ["cve", "asset_id", "cvss", "vector", "status"]
+REGISTER_COLUMNS = ["priority", "asset_id", "cve", "cvss", "vector", "criticality", "exposure", "risk_score",
+                    "loss_max", "status"]
+REPORT_TOP = 20
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Read-only bundle shared by every session (compact dtypes, see :mod:`pks.model`).
+
+    ``vulns`` is a column view of ``risks`` (same row order), not a second copy.
+    """
+    assets: pd.DataFrame
+    vulns: pd.DataFrame
+    risks: pd.DataFrame
+    risk_index: pd.DataFrame
+    version: str
+    edges: pd.DataFrame = None
+
+
+# ============================
+# RISK FORMULA
+# ============================
+
+@metrics.timed("score")
+def compute_risks(assets: pd.DataFrame, vulns: pd.DataFrame, exposure: pd.Series = None,
+                  prev: pd.DataFrame = None) -> pd.DataFrame:
+    """Score ``vulns``; from ``RESCORE_MIN_ROWS`` rows only rows changed since ``prev`` are rescored."""
+    if prev is not None and len(vulns) >= RESCORE_MIN_ROWS:
+        scored = rescore_changed(prev, vulns, assets, exposure)
+    else:
+        scored = score_frame(vulns, assets, exposure=exposure, workers=os.cpu_count() or 1)
+    risks = compact(scored, RISK_DTYPES)
+    return risks.sort_values("risk_score", ascending=False)
+
+
+def _empty_index() -> pd.DataFrame:
+    return pd.DataFrame({"date": pd.Series(dtype="object"), "risk_index": pd.Series(dtype="float64")})
+
+
+# ============================
+# BACKENDS
+# ============================
+
+# Профиль синтетической инфраструктуры для seed:<N> (нагрузочные прогоны)
+ZONE_MIX = {"Edge": 0.03, "T0": 0.02, "T1": 0.30, "T2": 0.65}
+ZONE_TYPES = {
+    "Edge": ["VPN", "Firewall", "Proxy", "Web"],
+    "T0": ["AD DC", "PKI", "Backup"],
+    "T1": ["DB", "App", "File"],
+    "T2": ["Workstation", "CI/CD", "Print"],
+}
+ZONE_CRITICALITY = {"Edge": (4, 5), "T0": (5, 5), "T1": (3, 5), "T2": (1, 4)}
+OWNERS = ["IT", "SecOps", "NetSec", "DevOps", "Product"]
+VECTOR_MIX = {"Network": 0.55, "Internal": 0.30, "Adjacent": 0.15}
+STATUS_MIX = {"Open": 0.60, "In progress": 0.15, "Mitigated": 0.25}
+FINDINGS_PER_ASSET = 20
+EDGES_PER_ASSET = 3
+
+
+def _pick(rng, mix: dict, n: int) -> np.ndarray:
+    return np.asarray(list(mix), dtype=object)[rng.choice(len(mix), n, p=list(mix.values()))]
+
+
+def _zipf_weights(n: int, a: float) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** a
+    return w / w.sum()
+
+
+def synthetic_data(findings: int, seed: int = 0):
+    """Realistic-looking estate with ~``findings`` findings → (assets, vulns, idx, edges).
+
+    Findings per asset and CVE popularity are power-law; CVSS and vector are
+    per CVE; edges go mostly one tier deeper (Edge → T2 → T1 → T0).  String
+    columns reference a small set of shared objects, so 10M rows stay compact.
+    """
+    rng = np.random.default_rng(seed)
+    n_assets = max(findings // FINDINGS_PER_ASSET, 10)
+    zone = _pick(rng, ZONE_MIX, n_assets)
+    zone[:1] = "Edge"  # хотя бы одна точка входа и одна цель
+    zone[1:2] = "T0"
+    ids = np.array([f"host-{i:07d}" for i in range(n_assets)], dtype=object)
+    kind = np.empty(n_assets, dtype=object)
+    crit = np.empty(n_assets, dtype=np.int64)
+    for z, types in ZONE_TYPES.items():
+        m = zone == z
+        kind[m] = np.asarray(types, dtype=object)[rng.integers(0, len(types), m.sum())]
+        lo, hi = ZONE_CRITICALITY[z]
+        crit[m] = rng.integers(lo, hi + 1, m.sum())
+    assets = pd.DataFrame({"asset_id": ids, "type": kind, "zone": zone, "criticality": crit,
+                           "owner": np.asarray(OWNERS, dtype=object)[rng.integers(0, len(OWNERS), n_assets)]})
+
+    n_cve = max(findings // 50, 100)
+    cve_ids = np.array([f"CVE-{y}-{n:05d}" for y, n in zip(rng.integers(2015, 2026, n_cve),
+                                                            rng.permutation(n_cve) + 10_000)], dtype=object)
+    cve_cvss = np.where(rng.random(n_cve) < 0.6, rng.normal(7.5, 1.2, n_cve), rng.normal(5.0, 1.3, n_cve))
+    cve_cvss = np.clip(np.round(cve_cvss, 1), 0.1, 10.0)
+    cve_vector = _pick(rng, VECTOR_MIX, n_cve)
+
+    asset_p = _zipf_weights(n_assets, 0.8)[rng.permutation(n_assets)]
+    cve_p = _zipf_weights(n_cve, 1.1)
+    keys = np.empty(0, dtype=np.int64)
+    for _ in range(20):  # пары (asset, cve) уникальны — добираем, пока не наберём нужное число
+        short = findings - len(keys)
+        if short <= 0:
+            break
+        draw = rng.choice(n_assets, 2 * short + 10, p=asset_p).astype(np.int64) * n_cve \
+            + rng.choice(n_cve, 2 * short + 10, p=cve_p)
+        keys = np.concatenate([keys, draw])
+        keys = keys[~pd.Series(keys).duplicated().to_numpy()]
+    keys = keys[:findings]
+    a_code, c_code = keys // n_cve, keys % n_cve
+    vulns = pd.DataFrame({"cve": cve_ids[c_code], "asset_id": ids[a_code], "cvss": cve_cvss[c_code],
+                          "vector": cve_vector[c_code], "status": _pick(rng, STATUS_MIX, len(a_code))})
+
+    tier = pd.Series(zone).map({"Edge": 0, "T2": 1, "T1": 2, "T0": 3}).to_numpy()
+    members = [np.flatnonzero(tier == t) for t in range(4)]
+    src = np.repeat(np.arange(n_assets), EDGES_PER_ASSET)
+    # 80% — на уровень глубже, остальное — латерально; T0 связан только с T0
+    to_tier = np.minimum(tier[src] + (rng.random(len(src)) < 0.8), 3)
+    dst = np.empty(len(src), dtype=np.int64)
+    for t in range(4):
+        m = to_tier == t
+        dst[m] = members[t][rng.integers(0, len(members[t]), m.sum())]
+    edges = pd.DataFrame({"src": ids[src], "dst": ids[dst]})
+
+    days = 365
+    idx = pd.DataFrame({
+        "date": [datetime.now().date() - timedelta(days=i) for i in range(days)][::-1],
+        "risk_index": np.clip(60 + np.cumsum(rng.normal(0, 1.0, days)), 0, 100),
+    })
+    return assets, vulns, idx, edges
+
+
+def seed_data(findings: int = 0, seed: int = 0):
+    """Demo estate; ``findings`` > 0 appends a synthetic estate of that size."""
+    assets = pd.DataFrame([
+        {"asset_id": "srv-ad-01", "type": "AD DC", "zone": "T0", "criticality": 5, "owner": "IT"},
+        {"asset_id": "srv-db-01", "type": "DB", "zone": "T1", "criticality": 5, "owner": "Product"},
+        {"asset_id": "srv-app-01", "type": "App", "zone": "T1", "criticality": 4, "owner": "Product"},
+        {"asset_id": "gw-vpn-01", "type": "VPN", "zone": "Edge", "criticality": 5, "owner": "NetSec"},
+        {"asset_id": "srv-git-01", "type": "CI/CD", "zone": "T2", "criticality": 4, "owner": "DevOps"},
+    ])
+
+    vulns = pd.DataFrame([
+        {"cve": "CVE-2024-1111", "asset_id": "gw-vpn-01", "cvss": 9.4, "vector": "Network", "status": "Open"},
+        {"cve": "CVE-2023-2222", "asset_id": "srv-db-01", "cvss": 8.7, "vector": "Internal", "status": "Open"},
+        {"cve": "CVE-2022-3333", "asset_id": "srv-app-01", "cvss": 7.2, "vector": "Adjacent", "status": "Open"},
+        {"cve": "CVE-2021-4444", "asset_id": "srv-ad-01", "cvss": 6.5, "vector": "Internal", "status": "Mitigated"},
+    ])
+
+    days = 30
+    idx = pd.DataFrame({
+        "date": [datetime.now().date() - timedelta(days=i) for i in range(days)][::-1],
+        "risk_index": np.linspace(76, 62, days) + np.random.default_rng(0).normal(0, 1.5, days)
+    })
+
+    # src → dst: с src есть сетевой/учётный доступ к dst
+    edges = pd.DataFrame([
+        {"src": "gw-vpn-01", "dst": "srv-app-01"},
+        {"src": "gw-vpn-01", "dst": "srv-git-01"},
+        {"src": "srv-git-01", "dst": "srv-app-01"},
+        {"src": "srv-git-01", "dst": "srv-db-01"},
+        {"src": "srv-app-01", "dst": "srv-db-01"},
+        {"src": "srv-app-01", "dst": "srv-ad-01"},
+    ])
+
+    if findings > 0:
+        s_assets, s_vulns, idx, s_edges = synthetic_data(findings, seed)
+        assets = pd.concat([assets, s_assets], ignore_index=True)
+        vulns = pd.concat([vulns, s_vulns], ignore_index=True)
+        edges = pd.concat([edges, s_edges], ignore_index=True)
+
+    return assets, vulns, idx, edges
+
+
+class SeedSource:
+    """Built-in synthetic demo data (``seed:<N>`` — plus N synthetic findings)."""
+
+    def __init__(self, findings: int = 0):
+        self.findings = findings
+        self.key = f"seed:{findings}" if findings else "seed"
+
+    def version(self) -> str:
+        return f"seed-v2-{self.findings}"
+
+    def load(self):
+        return seed_data(self.findings)
+
+
+class FileSource:
+    """Directory with assets/vulns[/risk_index/edges] as .parquet or .csv."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.key = f"file:{self.directory}"
+
+    def _path(self, name):
+        for ext in (".parquet", ".csv"):
+            p = self.directory / f"{name}{ext}"
+            if p.exists():
+                return p
+        return None
+
+    def version(self) -> str:
+        parts = []
+        for name in ("assets", "vulns", "risk_index", "edges"):
+            p = self._path(name)
+            if p is not None:
+                s = p.stat()
+                parts.append(f"{p.name}:{s.st_mtime_ns}:{s.st_size}")
+        return "|".join(parts)
+
+    def _read(self, name, columns=None):
+        p = self._path(name)
+        if p is None:
+            if columns is None:
+                return None
+            raise FileNotFoundError(f"{self.directory}: нет файла {name}.parquet/.csv")
+        df = pd.read_parquet(p) if p.suffix == ".parquet" else pd.read_csv(p)
+        return df if columns is None else df[columns]
+
+    def load(self):
+        assets = self._read("assets", ASSET_COLUMNS)
+        vulns = self._read("vulns", VULN_COLUMNS)
+        idx = self._read("risk_index")
+        edges = self._read("edges")
+        return (assets, vulns, idx if idx is not None else _empty_index(),
+                edges[EDGE_COLUMNS] if edges is not None else empty_edges())
+
+
+class SQLiteSource:
+    """SQLite database with ``assets``/``vulns`` tables (``risk_index``/``edges`` optional)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.key = f"sqlite:{self.path}"
+
+    def version(self) -> str:
+        # WAL-файл меняется раньше основного — учитываем оба.
+        parts = []
+        for p in (self.path, self.path.with_name(self.path.name + "-wal")):
+            if p.exists():
+                s = p.stat()
+                parts.append(f"{s.st_mtime_ns}:{s.st_size}")
+        return "|".join(parts)
+
+    def load(self):
+        with sqlite3.connect(f"file:{self.path}?mode=ro", uri=True) as con:
+            assets = pd.read_sql_query(f"SELECT {', '.join(ASSET_COLUMNS)} FROM assets", con)
+            vulns = pd.read_sql_query(f"SELECT {', '.join(VULN_COLUMNS)} FROM vulns", con)
+            tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            idx = pd.read_sql_query("SELECT date, risk_index FROM risk_index ORDER BY date", con) if "risk_index" in tables else _empty_index()
+            edges = pd.read_sql_query("SELECT src, dst FROM edges", con) if "edges" in tables else empty_edges()
+        return assets, vulns, idx, edges
+
+
+def make_source(spec: str):
+    kind, _, location = spec.partition(":")
+    if kind == "seed":
+        return SeedSource(int(location or 0))
+    if kind == "file":
+        return FileSource(location)
+    if kind == "sqlite":
+        return SQLiteSource(location)
+    raise ValueError(f"Неизвестный источник данных: {spec!r}")
+
+
+# ============================
+# STREAMLIT CACHING
+# ============================
+
+@st.cache_resource
+def get_source(spec: str = DATA_SOURCE):
+    return make_source(spec)
+
+
+@st.cache_resource
+def _scored(spec: str) -> dict:
+    """Last scored ``risks`` of the source (base for partial rescoring)."""
+    return {}
+
+
+@st.cache_resource(ttl=DATA_TTL, max_entries=4, show_spinner="Загрузка данных…")
+def _load(spec: str, version: str) -> Dataset:
+    # cache_resource: большие фреймы не копируются/не сериализуются на каждом rerun.
+    assets, vulns, idx, edges = get_source(spec).load()
+    # vulns не сужаются до скоринга: скор считается по float64 CVSS источника (float32 5.7 — это 5.6999998)
+    assets, edges = compact(assets, ASSET_DTYPES), compact(edges, EDGE_DTYPES)
+    graph = _attack_graph("current")
+    with graph.lock:
+        graph.sync(assets, edges, vulns, token=version)
+        exposure = graph.exposure()
+    last = _scored(spec)
+    risks = last["risks"] = compute_risks(assets, vulns, exposure, last.get("risks"))
+    # vulns — столбцы risks (copy-on-write): исходный фрейм освобождается после загрузки
+    return Dataset(assets, risks[VULN_COLUMNS], risks, idx, version, edges)
+
+
+@metrics.timed("load", rows=lambda data: len(data.vulns))
+def load_dataset(spec: str = DATA_SOURCE) -> Dataset:
+    """Return the cached dataset; reloads only when the source version changes."""
+    return _load(spec, get_source(spec).version())
+
+
+@st.cache_resource(max_entries=4, show_spinner="Индексация уязвимостей…")
+def _vuln_index(version: str, _vulns: pd.DataFrame) -> FilterIndex:
+    return FilterIndex(_vulns)
+
+
+@metrics.timed("load", rows=None)
+def vuln_index(data: Dataset) -> FilterIndex:
+    """Filter index over ``data.vulns``, built once per data version."""
+    return _vuln_index(data.version, data.vulns)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _simulator(version: str, _risks: pd.DataFrame, _assets: pd.DataFrame) -> Simulator:
+    return Simulator(_risks, _assets, workers=os.cpu_count() or 1)
+
+
+@metrics.timed("load", rows=None)
+def simulator(data: Dataset) -> Simulator:
+    """Monte Carlo engine shared by all sessions for this data version."""
+    return _simulator(data.version, data.risks, data.assets)
+
+
+@st.cache_resource(max_entries=len(SNAPSHOT_OFFSETS))
+def _attack_graph(lineage: str) -> AttackGraph:
+    return AttackGraph()
+
+
+@metrics.timed("load", rows=lambda graph: graph.n)
+def _synced_graph(data: Dataset) -> AttackGraph:
+    graph = _attack_graph(_lineage(data))
+    graph.sync(data.assets, data.edges, data.vulns, token=data.version)
+    return graph
+
+
+@contextmanager
+def attack_graph(data: Dataset):
+    """Shared attack graph of ``data``'s lineage, synced in place (incremental between versions).
+
+    The graph stays locked for the ``with`` block, so several queries see one version.
+    """
+    graph = _attack_graph(_lineage(data))
+    with graph.lock:
+        yield _synced_graph(data)
+
+
+def _lineage(data: Dataset) -> str:
+    """Key of the shared in-place structures: one for current data, one per snapshot day."""
+    return data.version.partition("@")[0] if data.version.startswith("snapshot:") else "current"
+
+
+@st.cache_resource(max_entries=len(SNAPSHOT_OFFSETS))
+def _aggregates(lineage: str) -> Aggregates:
+    return Aggregates()
+
+
+@metrics.timed("load", rows=lambda agg: agg.size)
+def _synced_aggregates(data: Dataset) -> Aggregates:
+    agg = _aggregates(_lineage(data))
+    agg.sync(data.risks, data.assets, token=data.version)
+    return agg
+
+
+@contextmanager
+def home_aggregates(data: Dataset):
+    """Materialized home-page aggregates of ``data``'s lineage, synced in place (incremental between versions).
+
+    The aggregates stay locked for the ``with`` block, so KPIs, TOP and counts come from one version.
+    """
+    agg = _aggregates(_lineage(data))
+    with agg.lock:
+        yield _synced_aggregates(data)
+
+
+@st.cache_resource
+def coverage() -> compliance.Coverage:
+    """Shared compliance coverage engine (maturity changes apply in place for every session)."""
+    return compliance.Coverage()
+
+
+@st.cache_resource(max_entries=4, show_spinner="Связывание требований с рисками…")
+def _risk_links(version: str, _risks: pd.DataFrame, _assets: pd.DataFrame) -> compliance.RiskLinks:
+    return coverage().link(_risks, _assets)
+
+
+@metrics.timed("load", rows=None)
+def risk_links(data: Dataset) -> compliance.RiskLinks:
+    """Open findings of ``data`` grouped by control scope (once per data version)."""
+    return _risk_links(data.version, data.risks, data.assets)
+
+
+@st.cache_resource
+def task_store() -> TaskStore:
+    """Task store shared by every session of the process."""
+    return TaskStore(TASKS_DB)
+
+
+@st.cache_resource
+def catalog() -> Catalog:
+    return Catalog(CATALOG_DB)
+
+
+@st.cache_resource(max_entries=2, show_spinner="Загрузка каталога…")
+def _catalog_frames(version: int):
+    return catalog().frames()
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _catalog_counts(version: int) -> dict:
+    return catalog().counts()
+
+
+def catalog_counts() -> dict:
+    return _catalog_counts(catalog().version())
+
+
+@st.cache_resource(max_entries=2, show_spinner="Обогащение находок…")
+def _enriched(version: str, catalog_version: int, _vulns: pd.DataFrame) -> pd.DataFrame:
+    return compact(enrich(_vulns, *_catalog_frames(catalog_version)), ENRICH_DTYPES)
+
+
+@metrics.timed("load")
+def enriched_vulns(data: Dataset) -> pd.DataFrame:
+    """``data.vulns`` joined with the local CVE/БДУ catalog (once per data/catalog version)."""
+    return _enriched(data.version, catalog().version(), data.vulns)
+
+
+@st.cache_resource
+def _embedding() -> tuple:
+    return make_embedder(EMBEDDER), EmbeddingCache(EMBED_CACHE)
+
+
+@st.cache_resource
+def _static_retriever() -> Retriever:
+    return Retriever(*_embedding())
+
+
+@st.cache_resource(max_entries=2, show_spinner="Индексация базы знаний (CAG)…")
+def _sync_static(catalog_version: int) -> int:
+    return _static_retriever().sync(static_documents(DEMO_MITRE, catalog().bdu_documents()), "cag:")
+
+
+@st.cache_resource(max_entries=len(SNAPSHOT_OFFSETS))
+def _dynamic_retriever(lineage: str) -> Retriever:
+    return Retriever(*_embedding())
+
+
+@metrics.timed("load", rows=None)
+def retriever(data: Dataset) -> Corpus:
+    """Shared CAG index + the dynamic context of ``data`` (one index per lineage, synced in place)."""
+    _sync_static(catalog().version())
+    dynamic = _dynamic_retriever(_lineage(data))
+    with dynamic.lock:  # синхронизация и смена токена — атомарно для всех сессий этой линии
+        if dynamic.token != data.version:
+            with st.spinner("Индексация динамического контекста…"):
+                dynamic.sync(dynamic_documents(data.assets, data.risks), "dyn:", token=data.version)
+    return Corpus(_static_retriever(), dynamic)
+
+
+@st.cache_resource
+def metrics_registry() -> metrics.Metrics:
+    """Process-wide metrics, configured from ``PKS_METRICS_*`` (endpoint started once)."""
+    registry = metrics.REGISTRY.configure(sample=METRICS_SAMPLE, path=METRICS_FILE)
+    if METRICS_PORT:
+        registry.serve(METRICS_PORT)
+    return registry
+
+
+@st.cache_resource
+def sync_log() -> SyncLog:
+    return SyncLog(SYNC_DB)
+
+
+@st.cache_resource
+def sync_scheduler():
+    """Connector scheduler of the process, started once (None without ``PKS_CONNECTORS`` or a SQLite source)."""
+    if not CONNECTORS or not DATA_SOURCE.startswith("sqlite:"):
+        return None
+    spec = CONNECTORS
+    kind, _, hosts = spec.partition(":")
+    if kind == "standin":  # локальные стенды источников (демо, нагрузочные прогоны)
+        spec = standins.spec(standins.serve(standins.Estate(int(hosts or 200)), churn_s=SYNC_INTERVAL / 2))
+    return Scheduler.from_spec(spec, DATA_SOURCE.partition(":")[2], SYNC_DB, SYNC_INTERVAL).start()
+
+
+def invalidate() -> None:
+    """Drop every cached load (e.g. after a manual data refresh)."""
+    _load.clear()
+    _load_snapshot.clear()  # снимок заимствует risk_index и связи текущих данных
+    _snapshot_diff.clear()
+
+
+# ============================
+# SNAPSHOTS
+# ============================
+
+@st.cache_resource
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore(SNAPSHOT_DIR)
+
+
+def _manifest_token() -> int:
+    p = Path(SNAPSHOT_DIR) / "manifest.json"
+    return p.stat().st_mtime_ns if p.exists() else 0
+
+
+@st.cache_resource(max_entries=8)
+def _record(_data: Dataset, version: str, day: str) -> bool:
+    return get_snapshot_store().record(date.fromisoformat(day), _data.assets, _data.risks, overwrite=True)
+
+
+@metrics.timed("load", rows=None)
+def record_snapshot(data: Dataset) -> None:
+    """Persist today's state once per data version."""
+    _record(data, data.version, date.today().isoformat())
+
+
+@st.cache_resource(max_entries=3, show_spinner="Загрузка снимка…")
+def _load_snapshot(day: str, token: int, current_version: str, _current: Dataset) -> Dataset:
+    assets, risks = get_snapshot_store().load(date.fromisoformat(day))
+    assets = compact(assets, ASSET_DTYPES)
+    risks = compact(risks, RISK_DTYPES).sort_values("risk_score", ascending=False, ignore_index=True)
+    # Версия снимка включает версию текущих данных: с ними меняются risk_index и связи (граф пересинхронизируется)
+    return Dataset(assets, risks[VULN_COLUMNS], risks, _current.risk_index, f"snapshot:{day}@{current_version}",
+                   _current.edges)
+
+
+@metrics.timed("load", rows=lambda out: len(out[0].vulns))
+def select_snapshot(data: Dataset, label: str):
+    """Re-point ``data`` at the snapshot chosen in the sidebar → (dataset, day | None)."""
+    offset = SNAPSHOT_OFFSETS.get(label, 0)
+    if not offset:
+        return data, None
+    day = get_snapshot_store().nearest(date.today() - timedelta(days=offset))
+    if day is None:
+        return data, None
+    return _load_snapshot(day.isoformat(), _manifest_token(), data.version, data), day
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _snapshot_diff(day: str, token: int) -> dict:
+    store = get_snapshot_store()
+    return store.diff(date.fromisoformat(day), store.days()[-1])
+
+
+@metrics.timed("load", rows=lambda diff: sum(map(len, diff.values())))
+def snapshot_diff(day: date) -> dict:
+    """Findings added/removed/re-scored between ``day`` and the latest snapshot."""
+    return _snapshot_diff(day.isoformat(), _manifest_token())
+
+
+# ============================
+# TRENDS
+# ============================
+
+@st.cache_resource
+def risk_series() -> RiskSeries:
+    return RiskSeries(SERIES_DB)
+
+
+@st.cache_resource(max_entries=8)
+def _record_series(_data: Dataset, version: str) -> bool:
+    store = risk_series()
+    store.backfill(_data.risk_index)  # история источника — только в пустое хранилище
+    values = risk_indices(_data.risks, _data.assets)
+    with home_aggregates(_data) as agg:
+        values.update(agg.kpis())
+    return store.append(values, version=version)
+
+
+@metrics.timed("load", rows=None)
+def record_series(data: Dataset) -> None:
+    """Append the risk index, sub-indices and KPIs once per data version."""
+    _record_series(data, data.version)
+
+
+# ============================
+# EXPORT
+# ============================
+
+@st.cache_resource
+def exporter() -> Exporter:
+    """Background export queue shared by every session (finished files are reused per data version)."""
+    return Exporter(EXPORT_DIR, workers=EXPORT_WORKERS)
+
+
+@st.cache_resource
+def importer() -> Importer:
+    """Background scanner-report import into the SQLite source (shared by every session)."""
+    return Importer(DATA_SOURCE.partition(":")[2])
+
+
+def register_source(data: Dataset):
+    """Risk register export: the register columns of ``data.risks``, sliced lazily."""
+    return frame_source(data.risks[REGISTER_COLUMNS])
+
+
+def summary_version(data: Dataset) -> str:
+    return f"{data.version}|tasks:{task_store().last_seq()}|coverage:{coverage().version}"
+
+
+def summary_source(data: Dataset):
+    """HTML summary report of ``data``: KPIs, distributions, TOP risks, compliance and tasks."""
+    tasks, engine, links = task_store(), coverage(), risk_links(data)
+
+    def build() -> str:
+        with home_aggregates(data) as agg:  # к моменту выгрузки агрегаты могли уйти на другую версию
+            k = agg.kpis()
+            top = data.risks.iloc[agg.top_rows(REPORT_TOP)][REGISTER_COLUMNS]
+            prio, status = agg.counts("priority"), agg.counts("status")
+        return summary_report(
+            "ПКС — сводный отчёт по рискам",
+            {"Находок": len(data.risks), "Открытые уязвимости": k["open_vulns"], "P1 риски": k["p1"],
+             "P2 риски": k["p2"], "Потенциальный ущерб, млн ₽": k["loss"]},
+            {
+                "Приоритеты рисков": prio,
+                "Статусы уязвимостей": status,
+                f"ТОП-{REPORT_TOP} рисков": top,
+                "Покрытие по стандартам": engine.by_framework(links),
+                "Требования ↔ меры": engine.mapping(),
+                "Задачи по статусам": pd.DataFrame({"status": STATUSES,
+                                                     "count": [tasks.count(status=s) for s in STATUSES]}),
+            },
+            meta=f"источник: {DATA_SOURCE} · версия данных: {data.version}",
+        )
+
+    return report_source(build)
@@ -0,0 +1,387 @@
+"""Background bulk export: Parquet / CSV / XLSX files and an HTML summary report.
+
+A job streams its source chunk by chunk (``chunk_rows``) into a temporary
+file on a worker thread — memory stays bounded by one chunk and the UI keeps
+serving reruns — and renames it into place when done.  The file name is
+derived from the dataset name and its data version, so a finished export is
+reused by every session (and after a restart) until the data changes; only
+the newest ``KEEP_VERSIONS`` files per dataset and format are kept.
+
+XLSX is written directly as SpreadsheetML (inline strings, a new sheet every
+``XLSX_MAX_ROWS``), so no Excel library is needed and rows are never held in
+memory.  The report is one self-contained HTML page laid out for A4
+printing ("Печать → Сохранить как PDF").
+"""
+import contextlib
+import hashlib
+import html
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pks.model import widen
+
+CHUNK_ROWS = 100_000
+KEEP_VERSIONS = 3
+XLSX_MAX_ROWS = 1_048_576  # предел листа Excel, вместе с заголовком
+STALE_TMP_S = 86_400
+
+FORMATS = {
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "csv": ("CSV", "text/csv"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "html": ("HTML-отчёт", "text/html"),
+}
+TABLE_FORMATS = ("parquet", "csv", "xlsx")
+
+
+# ============================
+# SOURCES
+# ============================
+
+def frame_source(df: pd.DataFrame):
+    """Source over a shared read-only frame: ``source(chunk_rows) → (total, chunks)`` of positional slices."""
+    def source(chunk_rows: int):
+        starts = range(0, len(df), chunk_rows) or [0]  # пустой фрейм — одна пустая порция (схема)
+        return len(df), (df.iloc[lo:lo + chunk_rows] for lo in starts)
+    return source
+
+
+def report_source(build):
+    """Source of a single-document report; ``build()`` returns the HTML text."""
+    return lambda chunk_rows: (1, iter([build()]))
+
+
+def frame_version(df: pd.DataFrame) -> str:
+    """Content hash of a small frame (version key for data without one)."""
+    return f"{int(pd.util.hash_pandas_object(df, index=False).sum()):x}"
+
+
+# ============================
+# WRITERS
+# ============================
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # Файлам — обычные значения: категории и float32 не должны менять схему от порции к порции.
+    df = widen(df)
+    cats = {c: df[c].astype(object) for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.assign(**cats) if cats else df
+
+
+class _ParquetWriter:
+    def __init__(self, path: Path):
+        self.path, self._w = path, None
+
+    def write(self, df: pd.DataFrame) -> int:
+        table = pa.Table.from_pandas(_plain(df), preserve_index=False,
+                                     schema=None if self._w is None else self._w.schema)
+        if self._w is None:
+            # Столбец без значений в первой порции — строковый, иначе следующие порции не совпадут по схеме.
+            schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema],
+                               metadata=table.schema.metadata)
+            table = table.cast(schema)
+            self._w = pq.ParquetWriter(self.path, schema, compression="zstd")
+        self._w.write_table(table)  # порция → row group
+        return len(df)
+
+    def close(self) -> None:
+        if self._w is not None:
+            self._w.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: Path):
+        # BOM: Excel открывает кириллицу в UTF-8 только с ним
+        self._f = open(path, "w", encoding="utf-8-sig", newline="")
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> int:
+        _plain(df).to_csv(self._f, index=False, header=self._header)
+        self._header = False
+        return len(df)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _HtmlWriter:
+    def __init__(self, path: Path):
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, text: str) -> int:
+        self._f.write(text)
+        return 1
+
+    def close(self) -> None:
+        self._f.close()
+
+
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_SHEET_HEAD = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{_NS}">'
+               '<sheetViews><sheetView workbookViewId="0">'
+               '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+               '<sheetData>')
+_STYLES = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{_NS}">'
+           '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+           '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+           '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+           '<fill><patternFill patternType="gray125"/></fill></fills>'
+           '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+           '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+           '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+           '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+           '</styleSheet>')
+_XML_CONTROL = "[\x00-\x08\x0b\x0c\x0e-\x1f]"
+
+
+def _xml_text(s: pd.Series) -> pd.Series:
+    s = s.astype(str).str.replace(_XML_CONTROL, "", regex=True)
+    return s.str.replace("&", "&amp;", regex=False).str.replace("<", "&lt;", regex=False) \
+            .str.replace(">", "&gt;", regex=False)
+
+
+def _xlsx_cells(s: pd.Series) -> np.ndarray:
+    """SpreadsheetML of one column's cells, vectorized over the chunk."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        cells = "<c><v>" + s.astype(str) + "</v></c>"
+        missing = ~np.isfinite(values)
+    else:
+        cells = '<c t="inlineStr"><is><t xml:space="preserve">' + _xml_text(s) + "</t></is></c>"
+        missing = s.isna().to_numpy()
+    return np.where(missing, "<c/>", cells.to_numpy(dtype=object))
+
+
+class _XlsxWriter:
+    def __init__(self, path: Path, sheet: str = "Данные"):
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._sheet_name = sheet
+        self._sheets, self._rows = 0, 0
+        self._out, self._header = None, None
+
+    def _open_sheet(self) -> None:
+        self._close_sheet()
+        self._sheets += 1
+        self._out = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", "w", force_zip64=True)
+        head = "".join(f'<c t="inlineStr" s="1"><is><t>{html.escape(c, quote=False)}</t></is></c>'
+                       for c in self._header)
+        self._out.write(f"{_SHEET_HEAD}<row>{head}</row>".encode("utf-8"))
+        self._rows = 1
+
+    def _close_sheet(self) -> None:
+        if self._out is not None:
+            self._out.write(b"</sheetData></worksheet>")
+            self._out.close()
+            self._out = None
+
+    def write(self, df: pd.DataFrame) -> int:
+        df = _plain(df)
+        if self._header is None:
+            self._header = [str(c) for c in df.columns]
+            self._open_sheet()
+        pos = 0
+        while pos < len(df):
+            if self._rows >= XLSX_MAX_ROWS:
+                self._open_sheet()
+            part = df.iloc[pos:pos + XLSX_MAX_ROWS - self._rows]
+            rows = np.full(len(part), "<row>", dtype=object)
+            for col in part.columns:
+                rows = rows + _xlsx_cells(part[col])
+            self._out.write(("</row>".join(rows) + "</row>").encode("utf-8"))
+            self._rows += len(part)
+            pos += len(part)
+        return len(df)
+
+    def close(self) -> None:
+        if self._header is None:
+            self._header = []
+            self._open_sheet()
+        self._close_sheet()
+        n = range(1, self._sheets + 1)
+        name = (lambda i: self._sheet_name if self._sheets == 1 else f"{self._sheet_name} {i}")
+        self._zip.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in n)
+            + "</Types>"))
+        self._zip.writestr("_rels/.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'))
+        self._zip.writestr("xl/workbook.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<workbook xmlns="{_NS}" xmlns:r="{_REL}"><sheets>'
+            + "".join(f'<sheet name="{html.escape(name(i))}" sheetId="{i}" r:id="rId{i}"/>' for i in n)
+            + "</sheets></workbook>"))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL}">'
+            + "".join(f'<Relationship Id="rId{i}" Type="{_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in n)
+            + f'<Relationship Id="rId{self._sheets + 1}" Type="{_REL}/styles" Target="styles.xml"/>'
+            + "</Relationships>"))
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.close()
+
+
+WRITERS = {"parquet": _ParquetWriter, "csv": _CsvWriter, "xlsx": _XlsxWriter, "html": _HtmlWriter}
+
+
+# ============================
+# REPORT
+# ============================
+
+REPORT_CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, Arial, sans-serif; color: #1b1f24; margin: 24px; }
+h1 { font-size: 22px; margin: 0 0 4px; } h2 { font-size: 16px; margin: 24px 0 8px; }
+.meta { color: #6b7280; font-size: 12px; }
+.kpis { display: flex; flex-wrap: wrap; gap: 12px; margin-top: 16px; }
+.kpi { border: 1px solid #e5e7eb; border-radius: 8px; padding: 10px 14px; min-width: 150px; }
+.kpi b { display: block; font-size: 20px; } .kpi span { color: #6b7280; font-size: 12px; }
+table { border-collapse: collapse; width: 100%; font-size: 12px; }
+th, td { border-bottom: 1px solid #e5e7eb; padding: 4px 8px; text-align: left; }
+th { background: #f3f4f6; }
+@media print { body { margin: 0; } @page { size: A4; margin: 14mm; } h2 { break-after: avoid; } tr { break-inside: avoid; } }
+"""
+
+
+def _fmt(v) -> str:
+    if isinstance(v, (float, np.floating)):
+        return f"{v:,.1f}".replace(",", " ")
+    if isinstance(v, (int, np.integer)):
+        return f"{v:,}".replace(",", " ")
+    return str(v)
+
+
+def summary_report(title: str, kpis: dict, tables: dict, meta: str = "") -> str:
+    """Self-contained HTML page: KPI cards plus one table per ``tables`` entry (``{heading: frame}``)."""
+    cards = "".join(f'<div class="kpi"><b>{html.escape(_fmt(v))}</b><span>{html.escape(k)}</span></div>'
+                    for k, v in kpis.items())
+    body = "".join(f"<h2>{html.escape(h)}</h2>"
+                   + widen(df).to_html(index=False, border=0, na_rep="—", float_format=_fmt)
+                   for h, df in tables.items())
+    generated = datetime.now().strftime("%d.%m.%Y %H:%M")
+    return (f'<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f"<style>{REPORT_CSS}</style></head><body><h1>{html.escape(title)}</h1>"
+            f'<div class="meta">Сформирован {generated}{" · " + html.escape(meta) if meta else ""}</div>'
+            f'<div class="kpis">{cards}</div>{body}</body></html>')
+
+
+# ============================
+# JOBS
+# ============================
+
+@dataclass
+class Job:
+    name: str
+    fmt: str
+    version: str
+    path: Path
+    state: str = "queued"  # queued | running | done | error
+    total: int = 0
+    done: int = 0
+    error: str = ""
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    @property
+    def progress(self) -> float:
+        if self.state == "done":
+            return 1.0
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.name}-{datetime.fromtimestamp(self.finished or time.time()):%Y%m%d-%H%M}.{self.fmt}"
+
+
+class Exporter:
+    """Process-wide export queue; one job per (dataset, format, data version)."""
+
+    def __init__(self, root, workers: int = 2, chunk_rows: int = CHUNK_ROWS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="pks-export")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str, fmt: str, version: str) -> Path:
+        digest = hashlib.sha1(f"{name}\x1f{version}".encode("utf-8")).hexdigest()[:12]
+        return self.root / f"{name}-{digest}.{fmt}"
+
+    def job(self, name: str, fmt: str, version: str):
+        """Job for this data version; a finished file on disk counts as done (None — nothing yet)."""
+        key = (name, fmt, version)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state == "done" and not job.path.exists():  # удалён при очистке
+                del self._jobs[key]
+                job = None
+            if job is None:
+                path = self._path(name, fmt, version)
+                if path.exists():
+                    mtime = path.stat().st_mtime
+                    job = self._jobs[key] = Job(name, fmt, version, path, "done", finished=mtime)
+            return job
+
+    def submit(self, name: str, fmt: str, version: str, source) -> Job:
+        """Start the export of ``source`` unless one for this version is running or done."""
+        job = self.job(name, fmt, version)
+        with self._lock:
+            if job is not None and job.state != "error":
+                return job
+            job = self._jobs[(name, fmt, version)] = Job(name, fmt, version, self._path(name, fmt, version))
+        self._pool.submit(self._run, job, source)
+        return job
+
+    def _run(self, job: Job, source) -> None:
+        job.state, job.started = "running", time.time()
+        tmp = job.path.with_name(f"{job.path.name}.{os.getpid()}.tmp")
+        try:
+            job.total, chunks = source(self.chunk_rows)
+            writer = WRITERS[job.fmt](tmp)
+            try:
+                for chunk in chunks:
+                    job.done += writer.write(chunk)
+            finally:
+                writer.close()
+            os.replace(tmp, job.path)  # файл появляется только целиком
+            job.state = "done"
+            self._prune(job)
+        except Exception as exc:
+            tmp.unlink(missing_ok=True)
+            job.error, job.state = f"{type(exc).__name__}: {exc}", "error"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self, job: Job) -> None:
+        with contextlib.suppress(OSError):  # файлы могут одновременно чистить другие процессы
+            files = sorted(self.root.glob(f"{job.name}-*.{job.fmt}"), key=lambda p: p.stat().st_mtime, reverse=True)
+            for p in files[KEEP_VERSIONS:]:
+                p.unlink(missing_ok=True)
+            cutoff = time.time() - STALE_TMP_S
+            for p in self.root.glob("*.tmp"):  # остатки прерванных процессов
+                if p.stat().st_mtime < cutoff:
+                    p.unlink(missing_ok=True)
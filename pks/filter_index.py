@@ -0,0 +1,89 @@
+"""Precomputed filter index for the vulnerabilities page.
+
+Built once per data version: categorical columns become sorted codes with
+per-value row-offset lists (CSR-style ``order``/``starts``), CVSS gets a
+sorted position array so a minimum-CVSS filter is one binary search.
+Queries return row positions; callers ``iloc`` only the matching rows.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = ("asset_id", "status", "vector")
+
+
+class FilterIndex:
+    def __init__(self, vulns: pd.DataFrame, columns=CATEGORICAL, score: str = "cvss"):
+        self.n = len(vulns)
+        self._cats = {}
+        for col in columns:
+            codes, uniques = pd.factorize(vulns[col], sort=True)
+            codes = codes.astype(np.int64)
+            # Строки каждого значения лежат подряд в order[starts[v]:starts[v+1]] (по возрастанию позиций).
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            skip = int((codes < 0).sum())  # NaN-коды (-1) стоят в начале order
+            starts = np.concatenate([[0], np.cumsum(counts)]) + skip
+            self._cats[col] = (list(uniques), {v: i for i, v in enumerate(uniques)}, order, starts, counts)
+
+        # float32 остаётся float32: порог сравнивается в той же точности, что и значения
+        dtype = np.float32 if vulns[score].dtype == np.float32 else np.float64
+        values = vulns[score].to_numpy(dtype=dtype)
+        self.score = score
+        self._scores = values
+        self._score_order = np.argsort(values, kind="stable")
+        self._score_sorted = values[self._score_order]
+        self._score_valid = int((~np.isnan(values)).sum())
+
+    # ---------- lookups ----------
+
+    def values(self, col: str) -> list:
+        return list(self._cats[col][0])
+
+    def counts(self, col: str) -> pd.DataFrame:
+        """``groupby(col).size()`` equivalent, from the precomputed offsets."""
+        uniques, _, _, _, counts = self._cats[col]
+        return pd.DataFrame({col: uniques, "count": counts})
+
+    def rows(self, col: str, value) -> np.ndarray:
+        uniques, lookup, order, starts, _ = self._cats[col]
+        i = lookup.get(value)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        return order[starts[i]:starts[i + 1]]
+
+    def rows_min_score(self, threshold: float) -> np.ndarray:
+        valid = self._score_sorted[:self._score_valid]
+        i = np.searchsorted(valid, np.asarray(threshold, dtype=valid.dtype), side="left")
+        return self._score_order[i:self._score_valid]
+
+    def score_histogram(self, nbins: int, value_range):
+        """(counts, edges) via binary search over the sorted score array."""
+        edges = np.linspace(value_range[0], value_range[1], nbins + 1)
+        valid = self._score_sorted[:self._score_valid]
+        probe = edges.astype(valid.dtype)
+        pos = np.searchsorted(valid, probe, side="left")
+        pos[-1] = np.searchsorted(valid, probe[-1], side="right")  # правая граница включительно
+        return np.diff(pos), edges
+
+    # ---------- queries ----------
+
+    def query(self, min_score=None, **equals) -> np.ndarray:
+        """Sorted row positions matching ``col == value`` for each kwarg and ``score >= min_score``."""
+        sets = [self.rows(col, v) for col, v in equals.items() if v is not None]
+        if not sets:
+            if min_score is None:
+                return np.arange(self.n)
+            return np.sort(self.rows_min_score(min_score))
+
+        sets.sort(key=len)
+        pos = sets[0]
+        for other in sets[1:]:
+            if not len(pos):
+                break
+            # Оба списка отсортированы: пересечение бинарным поиском, O(len(pos) · log len(other)).
+            at = np.minimum(np.searchsorted(other, pos), len(other) - 1)
+            pos = pos[other[at] == pos] if len(other) else other
+        if min_score is not None and len(pos):
+            # Порог проверяем только на уже отобранных строках — без прохода по всему столбцу.
+            pos = pos[self._scores[pos] >= min_score]
+        return pos
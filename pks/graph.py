@@ -0,0 +1,467 @@
+"""Asset dependency graph: attack paths, blast radius and exposure factor.
+
+Assets are nodes; an edge ``src → dst`` means "from ``src`` one can reach /
+authenticate to ``dst``".  Adjacency is kept as CSR arrays (forward and
+reverse) over integer node codes.  Attack model: the attacker enters at
+``Edge`` assets, compromises an asset only if it has an open finding and
+pivots from compromised assets along edges; ``T0`` assets are the target.
+
+* reachability and shortest attack paths Edge → T0 — frontier BFS over CSR;
+* blast radius of an asset — what an attacker reaches after compromising it:
+  exact BFS on demand, and for all assets at once either exact (small graphs)
+  or estimated with min-hash reachability sketches;
+* ``exposure()`` folds the three into a per-asset factor for ``risk_score``.
+
+Changes of edges or finding statuses are applied in place by ``sync()``:
+added edges go to a delta buffer merged into CSR in bulk, removed ones are
+tombstoned, and sketches are re-propagated only for the affected ancestors.
+
+    python -m pks.graph bench --nodes 200000 --edges 2000000
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ENTRY_ZONE = "Edge"
+CROWN_ZONE = "T0"
+
+# exposure = 1 + ENTRY·[достижим с периметра] + CROWN/(1 + шагов до T0) + BLAST·log-доля радиуса
+EXPOSURE_ENTRY = 0.2
+EXPOSURE_CROWN = 0.2
+EXPOSURE_BLAST = 0.2
+
+SKETCH_K = 8  # радиус входит в фактор логарифмически — грубой оценки достаточно
+RELAX_EDGES = 1 << 20     # рёбер на блок при min-проходе по скетчам (память: блок × K × 4 байта)
+EXACT_BLAST_NODES = 2000  # до этого размера радиус считается точно, BFS от каждого актива
+DELTA_MERGE = 0.1         # доля рёбер в дельта-буфере, после которой CSR пересобирается
+TOMBSTONE_COMPACT = 0.25
+
+EDGE_COLUMNS = ["src", "dst"]
+
+
+def empty_edges() -> pd.DataFrame:
+    return pd.DataFrame({"src": pd.Series(dtype="object"), "dst": pd.Series(dtype="object")})
+
+
+def _csr(keys: np.ndarray, n: int):
+    """Row pointers for edge rows sorted by ``keys`` (node codes)."""
+    return np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n))]).astype(np.int64)
+
+
+def _first(codes: np.ndarray, n: int) -> np.ndarray:
+    """Positions of one occurrence of every distinct code (no sort)."""
+    slot = np.empty(n, np.int64)
+    idx = np.arange(len(codes))
+    slot[codes] = idx
+    return idx[slot[codes] == idx]
+
+
+def _sorted_unique(x: np.ndarray) -> np.ndarray:
+    x = np.sort(x)
+    return x[np.concatenate([[True], x[1:] != x[:-1]])] if len(x) else x
+
+
+def _member(x: np.ndarray, sorted_ref: np.ndarray) -> np.ndarray:
+    """``np.isin`` against an already sorted reference (binary search)."""
+    if not len(sorted_ref):
+        return np.zeros(len(x), bool)
+    pos = np.minimum(np.searchsorted(sorted_ref, x), len(sorted_ref) - 1)
+    return sorted_ref[pos] == x
+
+
+def _edge_key(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    return (src.astype(np.int64) << 32) | dst.astype(np.int64)
+
+
+class AttackGraph:
+    """Attack graph over assets, kept current by ``sync()``."""
+
+    def __init__(self, seed: int = 0):
+        self.lock = threading.RLock()
+        self._rng = np.random.default_rng(seed)
+        self.ids = pd.Index([], dtype=object)
+        self.entry = np.zeros(0, bool)
+        self.crown = np.zeros(0, bool)
+        self.vulnerable = np.zeros(0, bool)
+        self._src = np.empty(0, np.int32)
+        self._dst = np.empty(0, np.int32)
+        self._alive = np.empty(0, bool)
+        self._h = np.empty((0, SKETCH_K), np.float32)
+        self._present = np.zeros(0, bool)
+        self._sketch = None
+        self._set_edges(self._src, self._dst)
+        self.token = None
+        self._dirty()
+
+    # ---------- nodes / edges ----------
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    @property
+    def m(self) -> int:
+        return int(self._alive.sum())
+
+    def _nodes(self, assets: pd.DataFrame) -> None:
+        assets = assets.drop_duplicates("asset_id", keep="last")
+        new = pd.Index(assets["asset_id"]).difference(self.ids, sort=False)
+        if len(new):
+            self.ids = self.ids.append(new)
+            grow = len(new)
+            self.entry = np.concatenate([self.entry, np.zeros(grow, bool)])
+            self.crown = np.concatenate([self.crown, np.zeros(grow, bool)])
+            self.vulnerable = np.concatenate([self.vulnerable, np.zeros(grow, bool)])
+            self._h = np.concatenate([self._h, self._rng.exponential(size=(grow, SKETCH_K)).astype(np.float32)])
+            if self._sketch is not None:
+                self._sketch = np.concatenate([self._sketch, self._h[-grow:]])
+            self._ptr = np.concatenate([self._ptr, np.full(grow, self._ptr[-1])])
+            self._rptr = np.concatenate([self._rptr, np.full(grow, self._rptr[-1])])
+        pos = self.ids.get_indexer(assets["asset_id"])
+        zone = assets["zone"].to_numpy(dtype=object)
+        present = np.zeros(self.n, bool)
+        present[pos] = True
+        self.entry[:] = False
+        self.crown[:] = False
+        self.entry[pos] = zone == ENTRY_ZONE
+        self.crown[pos] = zone == CROWN_ZONE
+        self._present = present
+
+    def _codes(self, edges: pd.DataFrame):
+        if edges is None or not len(edges):
+            return np.empty(0, np.int32), np.empty(0, np.int32)
+        src = self.ids.get_indexer(edges["src"])
+        dst = self.ids.get_indexer(edges["dst"])
+        ok = (src >= 0) & (dst >= 0) & (src != dst)
+        key = _sorted_unique(_edge_key(src[ok], dst[ok]))  # без дублей, по (src, dst)
+        return (key >> 32).astype(np.int32), (key & 0xFFFFFFFF).astype(np.int32)
+
+    def _vulnerable(self, vulns: pd.DataFrame) -> np.ndarray:
+        out = np.zeros(self.n, bool)
+        open_ids = vulns.loc[vulns["status"] == "Open", "asset_id"]
+        pos = self.ids.get_indexer(pd.unique(open_ids))
+        out[pos[pos >= 0]] = True
+        return out & self._present
+
+    def _set_edges(self, src: np.ndarray, dst: np.ndarray) -> None:
+        """(Re)build CSR from sorted unique edges; the delta buffer becomes empty."""
+        self._src, self._dst = src, dst
+        self._alive = np.ones(len(src), bool)
+        self._csr_m = len(src)
+        self._key = _edge_key(src, dst)
+        self._ptr = _csr(src, self.n)
+        self._rorder = np.argsort(dst, kind="stable")
+        self._rptr = _csr(dst, self.n)
+
+    def _merge(self) -> None:
+        keep = np.flatnonzero(self._alive)
+        key = np.sort(_edge_key(self._src[keep], self._dst[keep]))
+        self._set_edges((key >> 32).astype(np.int32), (key & 0xFFFFFFFF).astype(np.int32))
+
+    def _expand(self, frontier: np.ndarray, reverse: bool = False):
+        """All live edges leaving (``reverse``: entering) ``frontier`` → (from, to) codes."""
+        ptr = self._rptr if reverse else self._ptr
+        lo, cnt = ptr[frontier], ptr[frontier + 1] - ptr[frontier]
+        total = int(cnt.sum())
+        pos = np.repeat(lo - np.cumsum(cnt) + cnt, cnt) + np.arange(total)
+        if reverse:
+            pos = self._rorder[pos]
+        if len(self._src) > self._csr_m:
+            delta = np.arange(self._csr_m, len(self._src))
+            side = self._dst if reverse else self._src
+            mark = np.zeros(self.n, bool)
+            mark[frontier] = True
+            pos = np.concatenate([pos, delta[mark[side[delta]]]])
+        pos = pos[self._alive[pos]]
+        return (self._dst[pos], self._src[pos]) if reverse else (self._src[pos], self._dst[pos])
+
+    # ---------- traversal ----------
+
+    def _bfs(self, sources: np.ndarray, reverse: bool = False, expand_all_sources: bool = False):
+        """Attacker BFS → (hops, parent); pivoting continues only from vulnerable nodes.
+
+        Forward: hops from ``sources`` to every reached node.  Reverse: hops
+        from a node to the nearest source along a chain of compromised nodes.
+        """
+        hops = np.full(self.n, -1, np.int32)
+        parent = np.full(self.n, -1, np.int32)
+        hops[sources] = 0
+        frontier = sources if expand_all_sources or reverse else sources[self.vulnerable[sources]]
+        depth = 0
+        while len(frontier):
+            depth += 1
+            frm, to = self._expand(frontier, reverse)
+            new = hops[to] < 0
+            frm, to = frm[new], to[new]
+            keep = _first(to, self.n)
+            to = to[keep]
+            hops[to] = depth
+            parent[to] = frm[keep]
+            frontier = to[self.vulnerable[to]]
+        return hops, parent
+
+    def _ensure(self) -> None:
+        if self._entry_hops is None:
+            self._entry_hops, self._entry_parent = self._bfs(np.flatnonzero(self.entry))
+            self._crown_hops, _ = self._bfs(np.flatnonzero(self.crown), reverse=True)
+
+    def _dirty(self) -> None:
+        self._entry_hops = self._entry_parent = self._crown_hops = None
+        self._blast = None
+
+    def summary(self) -> dict:
+        with self.lock:
+            self._ensure()
+            reached = self._entry_hops >= 0
+            return {
+                "assets": self.n,
+                "edges": self.m,
+                "reachable": int((reached & ~self.entry).sum()),
+                "compromisable": int((reached & self.vulnerable).sum()),
+                "crown_reached": int((reached & self.crown).sum()),
+                "crown_total": int(self.crown.sum()),
+            }
+
+    def attack_paths(self, limit: int = 20) -> pd.DataFrame:
+        """Shortest attack paths Edge → T0, one per reachable T0 asset."""
+        with self.lock:
+            self._ensure()
+            targets = np.flatnonzero(self.crown & (self._entry_hops > 0))
+            targets = targets[np.argsort(self._entry_hops[targets], kind="stable")][:limit]
+            rows = []
+            for t in targets:
+                path = [t]
+                while self._entry_parent[path[-1]] >= 0:
+                    path.append(self._entry_parent[path[-1]])
+                names = self.ids[np.array(path[::-1])]
+                rows.append({"target": names[-1], "entry": names[0], "hops": len(path) - 1,
+                             "exploitable": bool(self.vulnerable[t]), "path": " → ".join(names)})
+            return pd.DataFrame(rows, columns=["target", "entry", "hops", "exploitable", "path"])
+
+    def blast_radius(self, asset_id: str) -> pd.DataFrame:
+        """Assets reachable after compromising ``asset_id`` (exact), nearest first."""
+        with self.lock:
+            code = self.ids.get_loc(asset_id)
+            hops, _ = self._bfs(np.array([code]), expand_all_sources=True)
+            reached = np.flatnonzero(hops > 0)
+            reached = reached[np.argsort(hops[reached], kind="stable")]
+            return pd.DataFrame({
+                "asset_id": self.ids[reached],
+                "hops": hops[reached],
+                "compromisable": self.vulnerable[reached],
+                "t0": self.crown[reached],
+            })
+
+    # ---------- blast radius for every node ----------
+
+    def _blast_all(self) -> np.ndarray:
+        if self._blast is None:
+            if self.n <= EXACT_BLAST_NODES:
+                self._blast = np.array([(self._bfs(np.array([i]), expand_all_sources=True)[0] > 0).sum()
+                                        for i in range(self.n)], dtype=np.float64)
+            else:
+                if self._sketch is None:
+                    self._sketch = self._h.copy()
+                    self._propagate(self._relax(np.arange(self.n)))
+                # неуязвимый актив: «если его всё же скомпрометируют» — один шаг от соседей
+                full = self._sketch.copy()
+                idle = np.flatnonzero(~self.vulnerable)
+                full[idle] = np.minimum(full[idle], self._rowmin(idle))
+                est = (SKETCH_K - 1) / full.sum(axis=1, dtype=np.float64)
+                self._blast = np.maximum(est - 1.0, 0.0)
+        return self._blast
+
+    def _rowmin(self, nodes: np.ndarray) -> np.ndarray:
+        """Min of successor sketches over live ``u → v`` for each ``u`` in ``nodes`` (inf if none)."""
+        out = np.full((len(nodes), SKETCH_K), np.inf, np.float32)
+        lo, cnt = self._ptr[nodes], self._ptr[nodes + 1] - self._ptr[nodes]
+        rows = np.flatnonzero(cnt)
+        ends = np.cumsum(cnt[rows])
+        cuts = np.searchsorted(ends, np.arange(RELAX_EDGES, ends[-1], RELAX_EDGES)) if len(ends) else []
+        for part in np.split(rows, cuts):
+            if not len(part):
+                continue
+            c = cnt[part]
+            starts = np.cumsum(c) - c
+            pos = np.repeat(lo[part] - starts, c) + np.arange(int(c.sum()))
+            vals = self._sketch[self._dst[pos]]
+            vals[~self._alive[pos]] = np.inf
+            out[part] = np.minimum.reduceat(vals, starts, axis=0)
+        if len(self._src) > self._csr_m:  # рёбра дельта-буфера — поштучно
+            d = np.arange(self._csr_m, len(self._src))
+            d = d[self._alive[d]]
+            where = pd.Index(nodes).get_indexer(self._src[d])
+            hit = where >= 0
+            np.minimum.at(out, where[hit], self._sketch[self._dst[d[hit]]])
+        return out
+
+    def _relax(self, nodes: np.ndarray) -> np.ndarray:
+        """``sketch[u] ← min(sketch[u], sketch[v])`` over live ``u → v`` for vulnerable ``u``.
+
+        Only compromised assets let the attacker go further, so the sketch of a
+        non-vulnerable asset stays its own hash.  Returns nodes that decreased.
+        """
+        nodes = nodes[self.vulnerable[nodes]]
+        best = np.minimum(self._sketch[nodes], self._rowmin(nodes))
+        dec = (best < self._sketch[nodes]).any(axis=1)
+        self._sketch[nodes[dec]] = best[dec]
+        return nodes[dec]
+
+    def _propagate(self, changed: np.ndarray, within: np.ndarray = None) -> None:
+        """Re-relax predecessors of ``changed`` nodes until a fixpoint."""
+        while len(changed):
+            _, preds = self._expand(changed, reverse=True)
+            preds = preds[_first(preds, self.n)]
+            if within is not None:
+                preds = preds[within[preds]]
+            changed = self._relax(preds)
+
+    def _invalidate_sketch(self, roots: np.ndarray) -> None:
+        """Reset and recompute sketches of everything whose reach may have shrunk."""
+        if self._sketch is None or not len(roots):
+            return
+        hops, _ = self._bfs(roots, reverse=True)
+        affected = hops >= 0
+        nodes = np.flatnonzero(affected)
+        if len(nodes) > self.n // 2:  # затронута большая часть графа — дешевле посчитать заново
+            self._sketch = None
+            return
+        self._sketch[nodes] = self._h[nodes]
+        self._propagate(self._relax(nodes), within=affected)
+
+    # ---------- exposure ----------
+
+    def exposure(self) -> pd.Series:
+        """Per-asset multiplier for ``risk_score`` (1.0 — изолированный актив).
+
+        Without any edges the topology is unknown and every factor is 1.0.
+        """
+        with self.lock:
+            factor = np.ones(self.n)
+            if not self.m:
+                return pd.Series(factor, index=self.ids, name="exposure")
+            self._ensure()
+            factor += EXPOSURE_ENTRY * (self._entry_hops >= 0)
+            crown = self._crown_hops >= 0
+            factor[crown] += EXPOSURE_CROWN / (1.0 + self._crown_hops[crown])
+            if self.n > 1:
+                factor += EXPOSURE_BLAST * np.log1p(self._blast_all()) / np.log1p(self.n - 1)
+            return pd.Series(np.round(factor, 3), index=self.ids, name="exposure")
+
+    # ---------- incremental updates ----------
+
+    def sync(self, assets: pd.DataFrame, edges: pd.DataFrame, vulns: pd.DataFrame, token=None) -> dict:
+        """Bring the graph to the given state in place → counts of applied changes.
+
+        ``token`` (e.g. the data version) skips the diff when already applied.
+        """
+        with self.lock:
+            if token is not None and token == self.token:
+                return {}
+            self.token = token
+            self._nodes(assets)
+            src, dst = self._codes(edges)
+            want = _edge_key(src, dst)
+            live = np.flatnonzero(self._alive)
+            have = _edge_key(self._src[live], self._dst[live])
+            gone = live[~_member(have, want)]
+            added = ~_member(want, np.sort(have))
+            vulnerable = self._vulnerable(vulns)
+            flipped = np.flatnonzero(vulnerable != self.vulnerable)
+            stats = {"edges_added": int(added.sum()), "edges_removed": len(gone), "status_changed": len(flipped)}
+            if not any(stats.values()):
+                self._dirty()  # зоны могли поменяться
+                return stats
+
+            lost = flipped[self.vulnerable[flipped]]   # перестали быть уязвимыми
+            gained = flipped[vulnerable[flipped]]
+            self._alive[gone] = False
+            self.vulnerable = vulnerable
+            if added.any():
+                self._src = np.concatenate([self._src, src[added]])
+                self._dst = np.concatenate([self._dst, dst[added]])
+                self._alive = np.concatenate([self._alive, np.ones(int(added.sum()), bool)])
+
+            # сокращение достижимости: пересчёт только предков затронутых узлов
+            self._invalidate_sketch(np.unique(np.concatenate([self._src[gone], lost])).astype(np.int64))
+            if self._sketch is not None:
+                # расширение: монотонное min-распространение от новых рёбер и узлов
+                self._propagate(self._relax(np.unique(np.concatenate([src[added], gained])).astype(np.int64)))
+
+            delta = len(self._src) - self._csr_m
+            if delta > DELTA_MERGE * max(self._csr_m, 1) or (~self._alive).sum() > TOMBSTONE_COMPACT * len(self._alive):
+                self._merge()
+            self._dirty()
+            return stats
+
+
+# ============================
+# BENCH
+# ============================
+
+def synthetic(nodes: int, edges: int, vuln_share: float = 0.3, seed: int = 0):
+    """Tiered synthetic estate: Edge → T2 → T1 → T0 with lateral edges."""
+    rng = np.random.default_rng(seed)
+    zone = rng.choice(np.array(["Edge", "T2", "T1", "T0"]), nodes, p=[0.02, 0.6, 0.33, 0.05])
+    ids = np.array([f"a{i}" for i in range(nodes)], dtype=object)
+    assets = pd.DataFrame({"asset_id": ids, "type": "Host", "zone": zone, "criticality": 3, "owner": "IT"})
+    tier = pd.Series(zone).map({"Edge": 0, "T2": 1, "T1": 2, "T0": 3}).to_numpy()
+    src = rng.integers(0, nodes, edges)
+    dst = rng.integers(0, nodes, edges)
+    # большинство рёбер ведут вглубь на один уровень, остальные — латеральные
+    ok = (tier[dst] - tier[src] <= 1) & (tier[dst] >= tier[src]) | (rng.random(edges) < 0.05)
+    edf = pd.DataFrame({"src": ids[src[ok]], "dst": ids[dst[ok]]})
+    vul = rng.random(nodes) < vuln_share
+    vulns = pd.DataFrame({"cve": "CVE-0000-0000", "asset_id": ids[vul], "cvss": 7.0,
+                          "vector": "Network", "status": "Open"})
+    return assets, edf, vulns
+
+
+def benchmark(nodes: int, edges: int) -> dict:
+    assets, edf, vulns = synthetic(nodes, edges)
+    t = time.perf_counter()
+    g = AttackGraph()
+    g.sync(assets, edf, vulns)
+    out = {"nodes": nodes, "edges": g.m, "build_s": time.perf_counter() - t}
+    t = time.perf_counter()
+    g.summary()
+    out["reachability_ms"] = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    g.attack_paths()
+    out["paths_ms"] = (time.perf_counter() - t) * 1000
+    probe = vulns["asset_id"].iloc[:20]
+    t = time.perf_counter()
+    for a in probe:
+        g.blast_radius(a)
+    out["blast_query_ms"] = (time.perf_counter() - t) * 1000 / len(probe)
+    t = time.perf_counter()
+    g.exposure()
+    out["exposure_all_s"] = time.perf_counter() - t
+    # инкремент: 1000 рёбер удалено/добавлено, 100 находок закрыто
+    edf2 = pd.concat([edf.iloc[1000:], edf.sample(1000, random_state=1).assign(dst=edf["dst"].iloc[:1000].to_numpy())])
+    vulns2 = vulns.assign(status=np.where(np.arange(len(vulns)) < 100, "Fixed", "Open"))
+    t = time.perf_counter()
+    g.sync(assets, edf2, vulns2)
+    g.exposure()
+    out["incremental_s"] = time.perf_counter() - t
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m pks.graph", description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="build/query/update timings on a synthetic estate")
+    b.add_argument("--nodes", type=int, default=200_000)
+    b.add_argument("--edges", type=int, default=2_000_000)
+    args = ap.parse_args(argv)
+    for k, v in benchmark(args.nodes, args.edges).items():
+        print(f"{k:>16}: {v:,.3f}" if isinstance(v, float) else f"{k:>16}: {v:,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""Streaming ingestion of scanner reports (Nessus ``.nessus`` v2, OpenVAS XML).
+
+Reports are parsed with ``iterparse`` and every finished element is cleared,
+so memory stays bounded by the batch size, not the file size.  Findings are
+normalized to the ``vulns`` schema and written in batches into the SQLite
+database used by :class:`pks.data.SQLiteSource`; a unique (cve, asset_id)
+index drops duplicates of earlier imports.  From the CLI, files are parsed in
+parallel by a process pool; each worker writes its own batches (SQLite
+serializes writers).  The dashboard uses :class:`Importer` instead — one
+background thread, so a Streamlit script thread never forks or waits.
+
+    python -m pks.ingest --db data.db scans/*.nessus
+"""
+import argparse
+import os
+import re
+import resource
+import sqlite3
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+
+BATCH_ROWS = 10_000
+
+VULN_COLUMNS = ["cve", "asset_id", "cvss", "vector", "status"]
+AV_VECTOR = {"N": "Network", "A": "Adjacent", "L": "Internal", "P": "Internal"}
+CVE_RE = re.compile(r"CVE-\d{4}-\d{4,}")
+AV_RE = re.compile(r"AV:([NALP])")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset_id TEXT PRIMARY KEY, type TEXT, zone TEXT, criticality INTEGER, owner TEXT
+);
+CREATE TABLE IF NOT EXISTS vulns (
+    cve TEXT NOT NULL, asset_id TEXT NOT NULL, cvss REAL, vector TEXT, status TEXT,
+    source TEXT, first_seen REAL
+);
+"""
+# Колонки, которых может не быть в базе, созданной вне пайплайна.
+EXTRA_COLUMNS = {"source": "TEXT", "first_seen": "REAL"}
+# Новые хосты из отчёта попадают в реестр с нейтральными значениями до сверки с CMDB.
+NEW_ASSET = ("Host", "Unassigned", 3, "Unassigned")
+
+
+@dataclass
+class IngestReport:
+    files: int = 0
+    parsed: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    skipped: int = 0  # находки без CVE
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.parsed / self.seconds if self.seconds else 0.0
+
+    def merge(self, other: "IngestReport") -> None:
+        for f in ("files", "parsed", "inserted", "duplicates", "skipped"):
+            setattr(self, f, getattr(self, f) + getattr(other, f))
+        self.peak_rss_mb = max(self.peak_rss_mb, other.peak_rss_mb)
+        self.errors.extend(other.errors)
+
+    def as_dict(self) -> dict:
+        out = {f.name: getattr(self, f.name) for f in fields(self)}
+        out["rows_per_s"] = round(self.rows_per_s, 1)
+        return out
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss: КБ в Linux, байты в macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def av_vector(text) -> str:
+    m = AV_RE.search(text or "")
+    return AV_VECTOR.get(m.group(1), "Network") if m else "Network"
+
+
+def _float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================
+# PARSERS
+# ============================
+
+def detect_format(path) -> str:
+    for _, elem in ET.iterparse(path, events=("start",)):
+        return "nessus" if elem.tag.startswith("NessusClientData") else "openvas"
+    raise ValueError(f"{path}: пустой XML")
+
+
+def iter_nessus(path):
+    """Yield (finding | None) per ReportItem; None = item without CVE."""
+    report_el = host_el = host = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "Report":
+                report_el = elem
+            elif elem.tag == "ReportHost":
+                host_el, host = elem, elem.get("name")
+            continue
+        if elem.tag == "ReportItem":
+            cves = [c.text.strip() for c in elem.findall("cve") if c.text]
+            if not cves:
+                yield None
+            else:
+                cvss3 = _float(elem.findtext("cvss3_base_score"))  # 0.0 — валидная оценка, не пропуск
+                cvss = cvss3 if cvss3 is not None else _float(elem.findtext("cvss_base_score"))
+                vector = av_vector(elem.findtext("cvss3_vector") or elem.findtext("cvss_vector"))
+                for cve in cves:
+                    yield {"cve": cve, "asset_id": host, "cvss": cvss, "vector": vector, "status": "Open"}
+            # Отцепляем обработанный элемент от родителя, иначе дерево растёт вместе с файлом.
+            if host_el is not None:
+                host_el.remove(elem)
+        elif elem.tag == "ReportHost" and report_el is not None:
+            report_el.remove(elem)
+
+
+def iter_openvas(path):
+    """Yield (finding | None) per OpenVAS <result>."""
+    parents = []
+    depth = 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "result":
+                depth += 1
+            elif elem.tag == "results" and not depth:
+                parents.append(elem)
+            continue
+        if elem.tag != "result":
+            continue
+        depth -= 1
+        if depth:  # вложенный <result> (например, в delta-отчётах)
+            continue
+        host_el = elem.find("host")
+        host = None
+        if host_el is not None:
+            host = (host_el.findtext("hostname") or "").strip() or (host_el.text or "").strip()
+        nvt = elem.find("nvt")
+        cves, cvss, vec_text = [], None, ""
+        if nvt is not None:
+            cves = [r.get("id") for r in nvt.iter("ref") if r.get("type") == "cve"]
+            cves += CVE_RE.findall(nvt.findtext("cve") or "")
+            cvss = _float(nvt.findtext("cvss_base"))
+            vec_text = nvt.findtext("tags") or ""
+            for sev in nvt.iter("severity"):
+                vec_text += " " + (sev.findtext("value") or "")
+        cvss = cvss if cvss is not None else _float(elem.findtext("severity"))
+        if not cves:
+            yield None
+        else:
+            vector = av_vector(vec_text)
+            for cve in dict.fromkeys(cves):
+                yield {"cve": cve, "asset_id": host, "cvss": cvss, "vector": vector, "status": "Open"}
+        if parents:
+            parents[-1].remove(elem)
+
+
+PARSERS = {"nessus": iter_nessus, "openvas": iter_openvas}
+
+
+def iter_batches(path, batch_rows: int = BATCH_ROWS, report: IngestReport = None):
+    """Yield lists of normalized findings, at most ``batch_rows`` each."""
+    batch = []
+    for row in PARSERS[detect_format(path)](path):
+        if row is None or not row["asset_id"]:
+            if report is not None:
+                report.skipped += 1
+            continue
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ============================
+# SINK
+# ============================
+
+def connect(db_path) -> sqlite3.Connection:
+    con = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.executescript(SCHEMA)
+    have = {row[1] for row in con.execute("PRAGMA table_info(vulns)")}
+    for col, typ in EXTRA_COLUMNS.items():
+        if col not in have:
+            con.execute(f"ALTER TABLE vulns ADD COLUMN {col} {typ}")
+    # Уникальный ключ — основа дедупликации между импортами.
+    if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'vulns_key'").fetchone() is None:
+        _create_key(con)
+    return con
+
+
+def _create_key(con: sqlite3.Connection) -> None:
+    # База, заполненная вне пайплайна, может содержать повторы (cve, asset_id): оставляем последнюю запись.
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        con.execute("DELETE FROM vulns WHERE rowid NOT IN (SELECT MAX(rowid) FROM vulns GROUP BY cve, asset_id)")
+        con.execute("CREATE UNIQUE INDEX IF NOT EXISTS vulns_key ON vulns(cve, asset_id)")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def write_batch(con: sqlite3.Connection, batch, source: str) -> int:
+    """Insert one batch; returns the number of new (non-duplicate) findings."""
+    now = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        before = con.total_changes
+        con.executemany(
+            "INSERT INTO vulns(cve, asset_id, cvss, vector, status, source, first_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(cve, asset_id) DO NOTHING",
+            [(r["cve"], r["asset_id"], r["cvss"], r["vector"], r["status"], source, now) for r in batch],
+        )
+        inserted = con.total_changes - before
+        con.executemany(
+            "INSERT OR IGNORE INTO assets(asset_id, type, zone, criticality, owner) VALUES (?, ?, ?, ?, ?)",
+            [(h, *NEW_ASSET) for h in {r["asset_id"] for r in batch}],
+        )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return inserted
+
+
+def ingest_file(path, db_path, batch_rows: int = BATCH_ROWS) -> IngestReport:
+    report = IngestReport(files=1)
+    con = connect(db_path)
+    try:
+        for batch in iter_batches(path, batch_rows, report):
+            new = write_batch(con, batch, os.path.basename(path))
+            report.parsed += len(batch)
+            report.inserted += new
+            report.duplicates += len(batch) - new
+    except (ET.ParseError, ValueError, OSError) as e:
+        report.errors.append(f"{path}: {e}")
+    finally:
+        con.close()
+    report.peak_rss_mb = _peak_rss_mb()
+    return report
+
+
+def _ingest_one(args):
+    return ingest_file(*args)
+
+
+def ingest(paths, db_path, workers: int = 0, batch_rows: int = BATCH_ROWS) -> IngestReport:
+    """Ingest report files into ``db_path`` (in a process pool when ``workers > 1``)."""
+    paths = [str(p) for p in paths]
+    total = IngestReport()
+    start = time.perf_counter()
+    connect(db_path).close()  # схема создаётся один раз до запуска воркеров
+    jobs = [(p, db_path, batch_rows) for p in paths]
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            for r in pool.map(_ingest_one, jobs):
+                total.merge(r)
+    else:
+        for job in jobs:
+            total.merge(_ingest_one(job))
+    total.seconds = time.perf_counter() - start
+    total.peak_rss_mb = max(total.peak_rss_mb, _peak_rss_mb())
+    return total
+
+
+# ============================
+# BACKGROUND IMPORT
+# ============================
+
+@dataclass
+class ImportJob:
+    paths: list
+    state: str = "queued"  # queued | running | done | error
+    report: IngestReport = field(default_factory=IngestReport)
+    error: str = ""
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    @property
+    def progress(self) -> float:
+        return min(self.report.files / len(self.paths), 1.0) if self.paths else 1.0
+
+
+class Importer:
+    """Process-wide background import into one database; one job at a time, files in sequence."""
+
+    def __init__(self, db_path, batch_rows: int = BATCH_ROWS):
+        self.db_path, self.batch_rows = str(db_path), batch_rows
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pks-ingest")
+        self._lock = threading.Lock()
+        self.job = None  # последний запуск (общий для всех сессий)
+
+    def submit(self, paths) -> ImportJob:
+        """Start importing ``paths`` unless an import is already running (then that job is returned)."""
+        with self._lock:
+            if self.job is not None and self.job.active:
+                return self.job
+            job = self.job = ImportJob([str(p) for p in paths])
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job: ImportJob) -> None:
+        job.state = "running"
+        start = time.perf_counter()
+        try:
+            connect(self.db_path).close()
+            for path in job.paths:
+                job.report.merge(ingest_file(path, self.db_path, self.batch_rows))
+            job.state = "done"
+        except Exception as exc:
+            job.error, job.state = f"{type(exc).__name__}: {exc}", "error"
+        finally:
+            job.report.seconds = time.perf_counter() - start
+            job.report.peak_rss_mb = max(job.report.peak_rss_mb, _peak_rss_mb())
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Импорт отчётов Nessus/OpenVAS в SQLite-источник ПКС")
+    ap.add_argument("--db", required=True, help="путь к SQLite (PKS_DATA_SOURCE=sqlite:<путь>)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--batch", type=int, default=BATCH_ROWS)
+    ap.add_argument("files", nargs="+")
+    args = ap.parse_args(argv)
+    report = ingest(args.files, args.db, args.workers, args.batch)
+    for k, v in report.as_dict().items():
+        print(f"{k}: {v}")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""Hot-path instrumentation: per-rerun spans, process-wide aggregates, export.
+
+A rerun is traced only when sampled (``Metrics.sample``) or when the
+diagnostics panel asks for it; otherwise ``span()`` hands out a shared no-op
+context and instrumented code pays one context-variable lookup.  A traced
+rerun records wall time, rows and bytes actually sent to the browser for each
+section, loader and chart/table call; finished traces are folded into
+histograms that export as Prometheus text or JSON (file and/or HTTP).
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RECENT_RERUNS = 200  # окно p50/p95 на раздел
+
+_current = contextvars.ContextVar("pks_trace", default=None)
+_full_rerun = contextvars.ContextVar("pks_full_rerun", default=False)
+# Счётчик байтов цепляется к приватному ScriptRunContext._enqueue (Streamlit 1.x, проверено на 1.53).
+METERED_STREAMLIT_MAJOR = 1
+
+
+@dataclass
+class Span:
+    kind: str      # section | load | score | build | chart | table | fragment
+    name: str
+    section: str   # объемлющая секция ("" — вне секций)
+    ms: float
+    rows: int
+    bytes: int
+
+
+class _Null:
+    """Shared no-op span for untraced reruns."""
+    rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _Null()
+
+
+class _Timer:
+    __slots__ = ("trace", "kind", "name", "rows", "_t", "_b", "_section")
+
+    def __init__(self, trace, kind: str, name: str, rows: int):
+        self.trace, self.kind, self.name, self.rows = trace, kind, name, rows
+
+    def __enter__(self):
+        self._section = self.trace.section
+        if self.kind == "section":
+            self.trace.section = self.name
+        self._b = self.trace.bytes
+        self._t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self._t) * 1000
+        trace = self.trace
+        trace.section = self._section
+        trace.spans.append(Span(self.kind, self.name, self._section, ms, int(self.rows or 0), trace.bytes - self._b))
+        return False
+
+
+class Trace:
+    """Spans of one rerun (full script or a single fragment)."""
+
+    def __init__(self, registry, page: str, kind: str, started: float):
+        self.registry, self.page, self.kind, self.started = registry, page, kind, started
+        self.spans = []
+        self.section = ""
+        self.bytes = 0
+        self.elements = {}  # тип элемента → байт
+        self.ms = 0.0
+
+    def span(self, kind: str, name: str, rows: int = 0) -> _Timer:
+        return _Timer(self, kind, name, rows)
+
+    def sent(self, msg) -> None:
+        n = msg.ByteSize()
+        self.bytes += n
+        if msg.WhichOneof("type") == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            el = msg.delta.new_element.WhichOneof("type")
+            self.elements[el] = self.elements.get(el, 0) + n
+
+
+class _Hist:
+    __slots__ = ("count", "sum_ms", "max_ms", "rows", "bytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = self.max_ms = 0.0
+        self.rows = self.bytes = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float, rows: int = 0, sent: int = 0) -> None:
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.bytes += sent
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "sum_ms": round(self.sum_ms, 3), "max_ms": round(self.max_ms, 3),
+                "rows": self.rows, "bytes": self.bytes,
+                "buckets": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], self.buckets))}
+
+
+# ============================
+# REGISTRY
+# ============================
+
+class Metrics:
+    """Process-wide aggregates; one instance shared by every session."""
+
+    def __init__(self, sample: float = 1.0, path: str = "", flush: float = 10.0):
+        self.lock = threading.Lock()
+        self.sample, self.path, self.flush = sample, path, flush
+        self.seen = 0  # все reruns, включая не попавшие в выборку (без блокировки — счётчик приблизительный)
+        self._reruns = {}  # (page, kind) → _Hist
+        self._spans = {}   # (page, kind, section, name) → _Hist
+        self._recent = {}  # page → deque(ms)
+        self._flushed = 0.0
+        self._server = None
+
+    def configure(self, sample: float = None, path: str = None, flush: float = None) -> "Metrics":
+        if sample is not None:
+            self.sample = min(max(sample, 0.0), 1.0)
+        if path is not None:
+            self.path = path
+        if flush is not None:
+            self.flush = flush
+        return self
+
+    def begin(self, page: str, kind: str = "rerun", started: float = None, force: bool = False):
+        """Start tracing this rerun if sampled (or forced) → ``Trace`` | None."""
+        self.seen += 1
+        if not force and (self.sample <= 0 or random.random() >= self.sample):
+            _current.set(None)
+            return None
+        trace = Trace(self, page or "", kind, started or time.perf_counter())
+        _current.set(trace)
+        _meter_session()
+        return trace
+
+    def end(self, trace) -> None:
+        """Close ``trace`` and fold it into the aggregates."""
+        if trace is None:
+            return
+        if _current.get() is trace:
+            _current.set(None)
+        trace.ms = (time.perf_counter() - trace.started) * 1000
+        with self.lock:
+            self._reruns.setdefault((trace.page, trace.kind), _Hist()).add(trace.ms, 0, trace.bytes)
+            self._recent.setdefault(trace.page, deque(maxlen=RECENT_RERUNS)).append(trace.ms)
+            for s in trace.spans:
+                self._spans.setdefault((trace.page, s.kind, s.section, s.name), _Hist()).add(s.ms, s.rows, s.bytes)
+        now = time.monotonic()
+        if self.path and now - self._flushed >= self.flush:
+            self._flushed = now
+            self.write()
+
+    def percentiles(self, page: str) -> dict:
+        with self.lock:
+            ms = sorted(self._recent.get(page, ()))
+        if not ms:
+            return {}
+        return {"n": len(ms), "p50": ms[len(ms) // 2], "p95": ms[min(int(len(ms) * 0.95), len(ms) - 1)]}
+
+    # ---------- export ----------
+
+    def to_json(self) -> dict:
+        with self.lock:
+            return {
+                "sample": self.sample,
+                "reruns_seen": self.seen,
+                "reruns": [{"page": p, "kind": k, **h.as_dict()} for (p, k), h in self._reruns.items()],
+                "spans": [{"page": p, "kind": k, "section": sec, "name": n, **h.as_dict()}
+                          for (p, k, sec, n), h in self._spans.items()],
+            }
+
+    def to_prometheus(self) -> str:
+        out = [
+            "# HELP pks_reruns_seen_total Script reruns, sampled or not.",
+            "# TYPE pks_reruns_seen_total counter",
+            f"pks_reruns_seen_total {self.seen}",
+            "# HELP pks_metrics_sample_ratio Fraction of reruns traced.",
+            "# TYPE pks_metrics_sample_ratio gauge",
+            f"pks_metrics_sample_ratio {self.sample}",
+        ]
+        with self.lock:
+            reruns = [({"page": p, "kind": k}, h) for (p, k), h in self._reruns.items()]
+            spans = [({"page": p, "kind": k, "section": sec, "name": n}, h)
+                     for (p, k, sec, n), h in self._spans.items()]
+        out += _histogram("pks_rerun_duration_seconds", "Traced rerun wall time.", reruns)
+        out += _counter("pks_rerun_sent_bytes_total", "Bytes sent to the browser by traced reruns.", reruns, "bytes")
+        out += _histogram("pks_span_duration_seconds", "Wall time per section/loader/render call.", spans)
+        out += _counter("pks_span_rows_total", "Rows processed per span.", spans, "rows")
+        out += _counter("pks_span_sent_bytes_total", "Bytes sent to the browser inside the span.", spans, "bytes")
+        return "\n".join(out) + "\n"
+
+    def write(self, path: str = None) -> None:
+        """Atomically write the export; ``.json`` → JSON, otherwise Prometheus text."""
+        path = path or self.path
+        body = json.dumps(self.to_json(), ensure_ascii=False) if path.endswith(".json") else self.to_prometheus()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Expose ``/metrics`` (Prometheus) and ``/metrics.json`` from a daemon thread."""
+        if self._server is None:
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.startswith("/metrics.json"):
+                        body, ctype = json.dumps(registry.to_json(), ensure_ascii=False), "application/json"
+                    elif self.path.startswith("/metrics"):
+                        body, ctype = registry.to_prometheus(), "text/plain; version=0.0.4"
+                    else:
+                        self.send_error(404)
+                        return
+                    data = body.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=self._server.serve_forever, name="pks-metrics", daemon=True).start()
+        return self._server
+
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in items.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(items, esc)) + "}"
+
+
+def _histogram(name: str, help_: str, series: list) -> list:
+    out = [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+    for labels, h in series:
+        acc = 0
+        for le, n in zip(BUCKETS_MS, h.buckets):
+            acc += n
+            out.append(f"{name}_bucket{_labels(labels, le=le / 1000)} {acc}")
+        out.append(f"{name}_bucket{_labels(labels, le='+Inf')} {h.count}")
+        out.append(f"{name}_sum{_labels(labels)} {h.sum_ms / 1000:.6f}")
+        out.append(f"{name}_count{_labels(labels)} {h.count}")
+    return out
+
+
+def _counter(name: str, help_: str, series: list, attr: str) -> list:
+    out = [f"# HELP {name} {help_}", f"# TYPE {name} counter"]
+    out += [f"{name}{_labels(labels)} {getattr(h, attr)}" for labels, h in series]
+    return out
+
+
+def _meter_session() -> None:
+    """Count bytes of every message the current session sends (hooked once per session).
+
+    Streamlit has no public hook for outgoing messages, so this wraps the
+    private ``ScriptRunContext._enqueue``.  Outside Streamlit
+    ``METERED_STREAMLIT_MAJOR`` or without that attribute nothing is hooked
+    and traces carry no byte counts.
+    """
+    try:
+        import streamlit
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return
+    if not streamlit.__version__.startswith(f"{METERED_STREAMLIT_MAJOR}."):
+        return
+    ctx = get_script_run_ctx(suppress_warning=True)
+    send = getattr(ctx, "_enqueue", None)
+    if not callable(send) or getattr(send, "_pks_metered", False):
+        return
+
+    def metered(msg):
+        trace = _current.get()
+        if trace is not None:
+            trace.sent(msg)
+        send(msg)
+
+    metered._pks_metered = True
+    ctx._enqueue = metered
+
+
+REGISTRY = Metrics()
+
+
+# ============================
+# INSTRUMENTATION API
+# ============================
+
+def active():
+    """Trace of the current rerun (None when not sampled)."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def full_rerun():
+    """Mark the block as part of a full script rerun: fragments run inside it are not reruns of their own."""
+    token = _full_rerun.set(True)
+    try:
+        yield
+    finally:
+        _full_rerun.reset(token)
+
+
+def in_full_rerun() -> bool:
+    return _full_rerun.get()
+
+
+def span(kind: str, name: str, rows: int = 0):
+    """``with span("chart", "CVSS"): ...`` — no-op unless this rerun is traced."""
+    trace = _current.get()
+    return _NULL if trace is None else trace.span(kind, name, rows)
+
+
+def _rows(value) -> int:
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+def timed(kind: str, name: str = None, rows=_rows):
+    """Decorator: record each call as a span; ``rows(result)`` gives the row count (None — 0)."""
+    def deco(fn):
+        label = name or fn.__name__.lstrip("_")
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.span(kind, label) as s:
+                out = fn(*args, **kwargs)
+                s.rows = rows(out) if rows else 0
+            return out
+        return wrapper
+    return deco
+
+
+def spans_frame(trace):
+    """Spans of ``trace`` as a DataFrame (slowest first) for the diagnostics panel."""
+    import pandas as pd
+
+    df = pd.DataFrame([asdict(s) for s in trace.spans], columns=list(Span.__dataclass_fields__))
+    df["ms"] = df["ms"].round(1)
+    return df.sort_values("ms", ascending=False, ignore_index=True)
@@ -0,0 +1,62 @@
+"""Compact, read-only layout of the shared dataset.
+
+The dataset is loaded once per process (``st.cache_resource`` in
+:mod:`pks.data`) and every analyst session reads the same frames, so their
+layout is chosen for footprint: repeated strings are categoricals (1–4 byte
+codes plus one copy of each distinct value) and numerics are narrowed
+(``float32`` CVSS, ``int8`` criticality, ``int16`` loss band).
+
+The app switches pandas copy-on-write on at startup (``app.py``; a library
+import does not flip a process-wide option): column selections, ``assign``
+and shallow copies made by a session then share the buffers of the shared
+frames until somebody writes to them.  Row filters stay position arrays; only the
+rows actually displayed are materialized with ``iloc``.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY = "category"
+
+ASSET_DTYPES = {"type": CATEGORY, "zone": CATEGORY, "criticality": np.int8, "owner": CATEGORY}
+VULN_DTYPES = {"cve": CATEGORY, "asset_id": CATEGORY, "cvss": np.float32, "vector": CATEGORY, "status": CATEGORY}
+# risk_score остаётся float64: по нему ранжируют и сравнивают снимки
+RISK_DTYPES = {**VULN_DTYPES, "criticality": np.int8, "reach": np.float32, "exposure": np.float32,
+               "priority": CATEGORY, "loss_max": np.int16}
+EDGE_DTYPES = {"src": CATEGORY, "dst": CATEGORY}
+ENRICH_DTYPES = dict.fromkeys(["cvss_vector", "vendor", "product", "bdu_id", "bdu_severity"], CATEGORY)
+
+
+def _narrow(s: pd.Series, dtype) -> pd.Series:
+    if dtype == CATEGORY:
+        return s.astype(CATEGORY)
+    if np.issubdtype(dtype, np.integer):
+        values = pd.to_numeric(s, errors="coerce")
+        info = np.iinfo(dtype)
+        if values.notna().all() and values.between(info.min, info.max).all():
+            return values.astype(dtype)
+        return values.astype(np.float32)  # пропуски или выход за диапазон — без потери значений
+    return pd.to_numeric(s, errors="coerce").astype(dtype)
+
+
+def compact(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """``df`` with the columns named in ``dtypes`` narrowed (others are shared as is)."""
+    cols = {c: _narrow(df[c], t) for c, t in dtypes.items() if c in df.columns and df[c].dtype != t}
+    return df.assign(**cols) if cols else df
+
+
+def widen(df: pd.DataFrame) -> pd.DataFrame:
+    """Output copy of a slice: only used categories, ``float32`` as ``float64``.
+
+    A categorical slice still carries every category of the shared frame (and
+    Arrow would send them all to the browser); ``float32`` is rounded to 6
+    digits (``9.4``, not ``9.3999996``).
+    """
+    cols = {}
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            cols[c] = s.cat.remove_unused_categories()
+        elif s.dtype == np.float32:
+            cols[c] = np.round(s.to_numpy(dtype=np.float64), 6)
+    return df.assign(**cols) if cols else df
+
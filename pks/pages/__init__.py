@@ -0,0 +1,23 @@
+"""Dashboard pages: one module per sidebar entry, imported on first open.
+
+Every module exposes ``render(data, snapshot_day)``.  Interactive sections are
+``st.fragment`` functions, so a widget inside them reruns only that section.
+"""
+import importlib
+
+PAGES = {
+    "Главная": "home",
+    "Активы": "assets",
+    "Уязвимости": "vulns",
+    "Риски": "risks",
+    "Compliance": "compliance",
+    "Меры и задачи": "controls",
+    "Каталоги": "catalogs",
+    "Интеграции": "integrations",
+    "LLM / RAG объяснение": "rag",
+}
+
+
+def load(label: str):
+    """Page module for a sidebar label (imported lazily, then cached by Python)."""
+    return importlib.import_module(f"{__name__}.{PAGES[label]}")
@@ -0,0 +1,20 @@
+"""Активы: реестр и срез по зонам."""
+import plotly.express as px
+import streamlit as st
+
+from pks.ui import chart, donut, section, table
+
+
+def render(data, snapshot_day=None) -> None:
+    assets = data.assets
+    st.title("🧩 Активы (демо)")
+
+    with section("Реестр активов", "🗂️"):
+        table(assets, width="stretch")
+
+    with section("Срез по зонам", "📊"):
+        zone_counts = assets.groupby("zone", observed=True).size().reset_index(name="count")
+        chart(px.bar(zone_counts, x="zone", y="count", title="Активы по зонам"), width="stretch")
+
+        # Donut по зонам
+        chart(donut(zone_counts, "zone", "count", "Распределение активов по зонам"), width="stretch")
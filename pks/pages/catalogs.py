@@ -0,0 +1,51 @@
+"""Каталоги: MITRE ATT&CK, локальный каталог CVE/БДУ, обогащённые находки."""
+import streamlit as st
+
+from pks.catalog import DEMO_BDU, DEMO_MITRE
+from pks.data import catalog, catalog_counts, enriched_vulns
+from pks.tables import paged_df, styled_df
+from pks.ui import fragment, section, table
+
+
+@fragment
+def _lookup() -> None:
+    key = st.text_input("Поиск по CVE / BDU", "")
+    if key:
+        table(catalog().lookup(key), width="stretch", hide_index=True)
+
+
+@fragment
+def _enriched(data) -> None:
+    paged_df(enriched_vulns(data), "enriched_vulns", sort_by="cvss", ascending=False)
+
+
+def render(data, snapshot_day=None) -> None:
+    st.title("📚 Каталоги (демо)")
+
+    with section("MITRE ATT&CK (витрина)", "🧠"):
+        mitre = DEMO_MITRE
+        # Переиспользуем status-style через колонку status (для бейджей)
+        mitre_view = mitre.rename(columns={"coverage": "status"})
+        table(styled_df(mitre_view), width="stretch")
+
+    with section("БДУ/уязвимости (витрина)", "🧾"):
+        counts = catalog_counts()
+        if counts["nvd"] or counts["bdu"]:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Записей NVD", f"{counts['nvd']:,}".replace(",", " "))
+            c2.metric("Записей БДУ", f"{counts['bdu']:,}".replace(",", " "))
+            c3.metric("Связей CVE ↔ БДУ", f"{counts['bdu_cve']:,}".replace(",", " "))
+        else:
+            table(DEMO_BDU, width="stretch")
+            st.caption("Локальный каталог пуст — показана демо-витрина. Импорт: python -m pks.catalog --db <путь> nvd|bdu <файлы>")
+        _lookup()
+
+    with section("Находки, обогащённые каталогом", "🧬"):
+        _enriched(data)
+
+    with section("Связка: каталоги → риски → меры", "🔗"):
+        st.markdown(
+            "- В боевой версии сюда подключаются: **CVE/NVD**, **БДУ/ФСТЭК**, vendor advisories.\n"
+            "- Затем нормализация (CAG), сопоставление с активами и расчёт **ущерба/риска**.\n"
+            "- На выходе: рекомендации по мерам + задачи в ITSM/Jira с SLA."
+        )
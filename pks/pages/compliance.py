@@ -0,0 +1,73 @@
+"""Compliance: покрытие требований мерами, разрывы и связанные с ними риски."""
+import plotly.express as px
+import streamlit as st
+
+from pks.compliance import TARGET_MATURITY
+from pks.data import REGISTER_COLUMNS, coverage, exporter, risk_links
+from pks.export import frame_source, frame_version
+from pks.tables import paged_df, styled_df
+from pks.ui import chart, donut, export_panel, fragment, section, table
+
+
+@fragment
+def _by_framework(engine, links) -> None:
+    with section("Профиль/стандарт", "🎯"):
+        fw = st.selectbox("Выберите профиль", ["(все)"] + engine.frameworks)
+        fw = None if fw == "(все)" else fw
+
+    with section("Реестр требований", "📋"):
+        table(styled_df(engine.requirements(links, fw)), width="stretch")
+        st.caption(f"status — покрытие мерами (зрелость ≥ {TARGET_MATURITY} = полное), declared — заявленный статус; "
+                   "gap_risks — открытые находки в области мер требования с разрывом.")
+
+    with section("Статусы выполнения", "📊"):
+        stat = engine.status_counts(fw)  # счётчики ведутся движком, без перегруппировки
+        c1, c2 = st.columns(2)
+        chart(px.bar(stat, x="status", y="count", title="Статусы требований (bar)"), target=c1, width="stretch")
+        chart(donut(stat, "status", "count", "Статусы требований (donut)"), target=c2, width="stretch")
+
+
+@fragment
+def _gap_risks(engine, data, links) -> None:
+    reqs = engine.requirements(links)
+    gaps = reqs[reqs["status"] != "Yes"]
+    if gaps.empty:
+        st.success("Разрывов нет: все требования покрыты мерами.")
+        return
+    labels = dict(zip(gaps["req_id"], gaps["req_id"] + " — " + gaps["requirement"]))
+    req_id = st.selectbox("Требование с разрывом", list(labels), format_func=labels.get)
+    rows = engine.gap_rows(links, req_id)
+    if not len(rows):
+        st.info("Меры требования не затрагивают открытых находок.")
+        return
+    st.caption(f"Открытых находок: {len(rows):,}".replace(",", " "))
+    paged_df(data.risks[REGISTER_COLUMNS], "gap_risks", rows=rows)
+
+
+def render(data, snapshot_day=None) -> None:
+    st.title("✅ Compliance (демо)")
+
+    engine, links = coverage(), risk_links(data)
+
+    _by_framework(engine, links)
+
+    with section("Покрытие по стандартам", "🧮"):
+        table(engine.by_framework(links), width="stretch", hide_index=True)
+
+    with section("Покрытие по мерам и владельцам", "🧱"):
+        c1, c2 = st.columns(2)
+        table(engine.by_control(links), target=c1, width="stretch", hide_index=True)
+        table(engine.by_owner(links), target=c2, width="stretch", hide_index=True)
+
+    with section("Разрывы → риски", "🎯"):
+        _gap_risks(engine, data, links)
+
+    with section("Требования ↔ меры (controls)", "🔗"):
+        merged = engine.mapping()
+        table(styled_df(merged), width="stretch")
+        export_panel(exporter(), "compliance_mapping", frame_version(merged), frame_source(merged))
+
+    st.info(
+        "Демо-логика: комплаенс связан с рисками и бюджетом мер. "
+        "Статусы No/Partially → формируют задачи и приоритет инвестиций."
+    )
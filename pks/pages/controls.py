@@ -0,0 +1,111 @@
+"""Меры и задачи: реестр мер и менеджер задач на общем SQLite-хранилище."""
+import pandas as pd
+import streamlit as st
+
+from pks.compliance import MATURITY_LEVELS, TARGET_MATURITY
+from pks.data import coverage, exporter, risk_links, task_store
+from pks.tables import styled_df
+from pks.tasks import STATUSES
+from pks.ui import export_panel, fragment, section, table
+
+TASKS_POLL_S = 5.0
+LOG_ROWS = 20
+
+
+@fragment
+def _task_manager() -> None:
+    # фильтры, форма и смена статуса перерисовывают только этот блок
+    tasks = task_store()
+
+    with section("Задачи (Task manager)", "✅"):
+        f1, f2, f3, f4 = st.columns(4)
+        st_filter = f1.selectbox("Статус", ["(все)"] + STATUSES, key="tasks_status")
+        own_filter = f2.selectbox("Ответственный", ["(все)", "IT", "SecOps", "NetSec", "DevOps", "Product"], key="tasks_owner")
+        pr_filter = f3.selectbox("Приоритет", ["(все)", "P1 (Critical)", "P2 (High)", "P3 (Medium)", "P4 (Low)"], key="tasks_prio")
+        task_filters = {
+            "status": None if st_filter == "(все)" else st_filter,
+            "owner": None if own_filter == "(все)" else own_filter,
+            "priority": None if pr_filter == "(все)" else pr_filter,
+        }
+        st.session_state["tasks_seen"] = tasks.last_seq()  # список актуален на этот seq
+        total = tasks.count(**task_filters)
+        pages = max((total - 1) // 50 + 1, 1)
+        tpage = f4.number_input("Страница", 1, pages, 1, key="tasks_page") - 1
+        task_page = tasks.page(offset=min(tpage, pages - 1) * 50, limit=50, **task_filters)
+        table(styled_df(task_page), width="stretch")
+        st.caption(f"Всего задач: {total:,}".replace(",", " "))
+
+    with section("Создать демо-задачу", "➕"):
+        with st.form("new_task_form"):
+            title = st.text_input("Название", "Проверка конфигурации обновлений")
+            pr = st.selectbox("Приоритет", ["P1 (Critical)", "P2 (High)", "P3 (Medium)", "P4 (Low)"])
+            owner = st.selectbox("Ответственный", ["IT","SecOps","NetSec","DevOps","Product"])
+            due = st.selectbox("Срок", ["3 дня","7 дней","14 дней","30 дней"])
+            linked = st.text_input("Связь (актив/риск)", "srv-app-01 / CVE-2022-3333")
+            submitted = st.form_submit_button("Создать")
+
+        if submitted:
+            new_id = tasks.add(title, pr, owner, due, linked)
+            st.success(f"Задача {new_id} создана (демо). В боевой версии: выгрузка в Jira/Service Desk и контроль SLA.")
+
+    with section("Workflow: смена статуса", "🔁"):
+        tid = st.selectbox("Задача", task_page["task_id"].tolist())
+        new_status = st.selectbox("Новый статус", STATUSES)
+        if st.button("Применить") and tid is not None:
+            tasks.set_status(tid, new_status)
+            st.success("Статус обновлён (демо).")
+
+
+
+@fragment(run_every=TASKS_POLL_S)
+def _task_log() -> None:
+    # журнал дочитывается по seq: опрос не перечитывает ни задачи, ни весь журнал
+    tasks, state = task_store(), st.session_state
+    log = state.get("tasks_log")
+    fresh = tasks.changes_since(state.get("tasks_log_seq", 0), LOG_ROWS)
+    if log is None or len(fresh) == LOG_ROWS:
+        log = fresh
+    elif len(fresh):
+        log = pd.concat([fresh, log], ignore_index=True).head(LOG_ROWS)
+    if len(log):
+        state["tasks_log_seq"] = int(log["seq"].iloc[0])
+    state["tasks_log"] = log
+
+    with section("Журнал изменений", "🕓"):
+        behind = state.get("tasks_log_seq", 0) - state.get("tasks_seen", 0)
+        if behind > 0:
+            c1, c2 = st.columns([3, 1])
+            c1.info(f"Список задач устарел: новых записей журнала — {behind}.")
+            if c2.button("Обновить список"):
+                st.rerun()
+        table(log, width="stretch", hide_index=True)
+
+
+def render(data, snapshot_day=None) -> None:
+    st.title("🧩 Меры (Controls) и задачи — демо")
+
+    engine = coverage()
+
+    with section("Реестр мер", "🧱"):
+        registry = st.empty()  # заполняется после формы: изменение зрелости видно в этом же прогоне
+
+    with section("Зрелость меры", "📶"):
+        controls = engine.controls()
+        names = dict(zip(controls["control_id"], controls["control_id"] + " — " + controls["control"]))
+        with st.form("maturity_form"):
+            c1, c2 = st.columns(2)
+            cid = c1.selectbox("Мера", list(names), format_func=names.get)
+            level = c2.select_slider("Уровень зрелости", list(MATURITY_LEVELS), value=TARGET_MATURITY)
+            submitted = st.form_submit_button("Применить")
+        if submitted and cid is not None:
+            n = engine.set_maturity(cid, level)
+            st.success(f"Зрелость {cid}: {level}. Пересчитано требований: {n} (демо).")
+
+    table(engine.by_control(risk_links(data)), target=registry, width="stretch", hide_index=True)
+
+    _task_manager()
+    _task_log()
+
+    with section("Выгрузка задач", "📤"):
+        tasks = task_store()
+        export_panel(exporter(), "tasks", f"tasks:{tasks.last_seq()}", tasks.chunks)
@@ -0,0 +1,87 @@
+"""Главная: сводные метрики, индекс риска, ТОП-риски."""
+import time
+from datetime import datetime, time as dtime, timezone
+
+import streamlit as st
+
+from pks import charts
+from pks.data import exporter, home_aggregates, risk_series, summary_source, summary_version
+from pks.tables import styled_df
+from pks.timeseries import DAY
+from pks.ui import chart, donut, export_panel, fragment, section, table
+
+RANGES = {"7 дней": 7, "30 дней": 30, "90 дней": 90, "1 год": 365, "Всё время": None}
+LEVEL_LABELS = {"raw": "исходные точки", "hour": "часы", "day": "дни", "week": "недели"}
+DIMENSION_LABELS = {"zone": "Зона", "owner": "Владелец"}
+DELTA_DAYS = 7
+
+
+def _delta(store, name: str, end: float):
+    d = store.delta(name, DELTA_DAYS, end)
+    return None if d is None else round(d)
+
+
+def _series_label(name: str) -> str:
+    if name == "index":
+        return "Общий"
+    _, dim, value = name.split(":", 2)
+    return f"{DIMENSION_LABELS.get(dim, dim)} {value}"
+
+
+@fragment
+def _risk_index(end: float) -> None:
+    store = risk_series()
+    c1, c2 = st.columns([1, 2])
+    days = RANGES[c1.selectbox("Период", list(RANGES), index=1)]
+    name = c2.selectbox("Срез", store.series("index") or ["index"], format_func=_series_label)
+    frame, level = store.query(name, None if days is None else end - days * DAY, end)
+    if frame.empty:
+        st.info("История индекса пока пуста.")
+        return
+    chart(charts.band(frame, "date", "value", "min", "max"), width="stretch")
+    delta = store.delta(name, DELTA_DAYS, end)
+    trend = "" if delta is None else f" ({delta:+.1f} за {DELTA_DAYS} дн.)"
+    st.caption(f"Индекс: {frame['value'].iloc[-1]:.1f}{trend} · агрегация: {LEVEL_LABELS[level]} · точек: {len(frame)}")
+
+
+def render(data, snapshot_day=None) -> None:
+    # Счётчики и ТОП поддерживаются инкрементально, без сканов; читаются одной версией под блокировкой
+    with home_aggregates(data) as agg:
+        k = agg.kpis()
+        top = data.risks.iloc[agg.top_rows(5)]
+        prio, status = agg.counts("priority"), agg.counts("status")
+    st.title("🛡️ ПКС — обзор рисков")
+
+    # Для снимка тренды считаются на конец его дня (UTC, как и бакеты хранилища)
+    end = time.time() if snapshot_day is None else datetime.combine(snapshot_day, dtime.max, timezone.utc).timestamp()
+    store = risk_series()  # дельты KPI — из того же хранилища трендов
+    help_ = f"Изменение за {DELTA_DAYS} дн."
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Открытые уязвимости", k["open_vulns"], delta=_delta(store, "open_vulns", end),
+                delta_color="inverse", help=help_)
+    col2.metric("P1 риски", k["p1"], delta=_delta(store, "p1", end), delta_color="inverse", help=help_)
+    col3.metric("P2 риски", k["p2"], delta=_delta(store, "p2", end), delta_color="inverse", help=help_)
+    col4.metric("Потенциальный ущерб, млн ₽", k["loss"], delta=_delta(store, "loss", end),
+                delta_color="inverse", help=help_)
+
+    with section("Индекс киберриска", "📈"):
+        _risk_index(end)
+
+    with section("ТОП-риски", "🔥"):
+        table(styled_df(top), width="stretch")
+
+    with section("Распределение", "🍩"):
+        c1, c2 = st.columns(2)
+        chart(
+            donut(prio, "priority", "count", "Приоритеты рисков"),
+            target=c1, width="stretch"
+        )
+        chart(
+            donut(status, "status", "count", "Статусы уязвимостей"),
+            target=c2, width="stretch"
+        )
+
+    with section("Сводный отчёт", "🧾"):
+        st.caption("HTML-отчёт для руководства; в PDF — через печать в браузере (стили печати встроены).")
+        export_panel(exporter(), "summary", summary_version(data), summary_source(data), formats=("html",))
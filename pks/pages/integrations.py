@@ -0,0 +1,108 @@
+"""Интеграции: матрица готовности, импорт отчётов сканера."""
+import glob
+
+import plotly.express as px
+import streamlit as st
+
+from pks.data import DATA_SOURCE, SYNC_INTERVAL, importer, invalidate, sync_log, sync_scheduler
+from pks.tables import styled_df
+from pks.ui import chart, donut, fragment, section, table
+
+READINESS_REFRESH_S = 10.0
+IMPORT_POLL_S = 1.0
+
+
+def _import_body(imp) -> bool:
+    """Import form or progress of the running import. True while it runs."""
+    job = imp.job
+    if job is not None and job.active:
+        st.progress(job.progress, text=f"Импорт: файлов {job.report.files} из {len(job.paths)}, "
+                                       f"находок {job.report.parsed:,}".replace(",", " "))
+        return True
+    pattern = st.text_input("Файлы отчётов на сервере (glob)", "scans/*.nessus")
+    if st.button("Импортировать"):
+        files = sorted(glob.glob(pattern))
+        if not files:
+            st.warning("Файлы не найдены.")
+        else:
+            imp.submit(files)
+            st.rerun()  # полный rerun переключает блок на опрос прогресса
+    if job is not None:
+        rep = job.report
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Находок разобрано", f"{rep.parsed:,}".replace(",", " "))
+        m2.metric("Новых", f"{rep.inserted:,}".replace(",", " "))
+        m3.metric("Строк/с", f"{rep.rows_per_s:,.0f}".replace(",", " "))
+        m4.metric("Пик RSS, МБ", f"{rep.peak_rss_mb:.0f}")
+        st.caption(f"Дубликаты: {rep.duplicates}, без CVE: {rep.skipped}")
+        for err in rep.errors + ([job.error] if job.error else []):
+            st.error(err)
+    return False
+
+
+@fragment
+def _import_idle(imp) -> None:
+    _import_body(imp)
+
+
+@fragment(run_every=IMPORT_POLL_S)
+def _import_running(imp) -> None:
+    if not _import_body(imp):
+        invalidate()  # версия SQLite-источника сменилась; следующий полный rerun загрузит новые данные
+        st.rerun()
+
+
+def _scanner_import() -> None:
+    if not DATA_SOURCE.startswith("sqlite:"):
+        st.info("Импорт пишет в SQLite-источник: запустите дашборд с PKS_DATA_SOURCE=sqlite:<путь>.")
+        return
+    imp = importer()  # импорт идёт в фоновом потоке; страница опрашивает прогресс, пока он идёт
+    (_import_running if imp.job is not None and imp.job.active else _import_idle)(imp)
+
+
+def _readiness(scheduler) -> None:
+    configured = set(scheduler.connectors) if scheduler is not None else ()
+    matrix = sync_log().readiness(configured, SYNC_INTERVAL)
+    with section("Матрица готовности", "🧩"):
+        if scheduler is None:
+            st.info("Коннекторы выключены: задайте PKS_CONNECTORS (адреса AD/CMDB/SIEM/ITSM или «standin») "
+                    "при SQLite-источнике PKS_DATA_SOURCE=sqlite:<путь>.")
+        elif st.button("Синхронизировать сейчас"):
+            scheduler.trigger()
+        table(styled_df(matrix), width="stretch", column_config={
+            "lag_s": st.column_config.NumberColumn("lag, с", help="С момента последнего успешного опроса"),
+            "rows_per_s": st.column_config.NumberColumn("записей/с", help="Пропускная способность за последний час"),
+        })
+        st.caption(f"Опрос каждые {SYNC_INTERVAL:.0f} с, только изменения с прошлого курсора (delta sync).")
+
+    with section("Статусы интеграций (donut)", "🍩"):
+        stat = matrix.groupby("status").size().reset_index(name="count")
+        c1, c2 = st.columns(2)
+        chart(px.bar(stat, x="status", y="count", title="Статусы (bar)"), target=c1, width="stretch")
+        chart(donut(stat, "status", "count", "Статусы (donut)"), target=c2, width="stretch")
+
+
+# Пока коннекторы работают, матрица обновляется сама
+_readiness_static = fragment(_readiness)
+_readiness_live = fragment(run_every=READINESS_REFRESH_S)(_readiness)
+
+
+def render(data=None, snapshot_day=None) -> None:
+    st.title("🔌 Интеграции (демо)")
+
+    scheduler = sync_scheduler()
+    (_readiness_static if scheduler is None else _readiness_live)(scheduler)
+
+    with section("Импорт отчётов сканера (Nessus/OpenVAS)", "📥"):
+        _scanner_import()
+
+    with section("Что происходит при разворачивании в контуре (демо)", "🏗️"):
+        st.markdown(
+            "**Авто-сбор (bootstrap) в контуре заказчика:**\n"
+            "1) Подключение к источникам: AD/CMDB/SIEM/ITSM (коннекторы) и сканер (импорт отчётов).\n"
+            "2) Сбор активов, версий ПО, ролей, зон, владельцев — инкрементально, по курсорам источников.\n"
+            "3) Нормализация данных и построение графа зависимостей.\n"
+            "4) Сопоставление с CAG (CVE/БДУ) и расчёт риска.\n"
+            "5) Публикация на дашборде + генерация задач/мер.\n\n"
+            "EDR и Repo/CI (Git) — следующие коннекторы."
+        )
@@ -0,0 +1,51 @@
+"""LLM / RAG: концепция и поиск контекста по локальному индексу."""
+import time
+
+import streamlit as st
+
+from pks.data import retriever
+from pks.ui import fragment, section, table
+
+
+@fragment
+def _ask(data) -> None:
+    q = st.text_input("Вопрос", "Почему риск по VPN критический и что делать первым?")
+    if st.button("Сгенерировать ответ (демо)"):
+        rag = retriever(data)
+        t0 = time.perf_counter()
+        hits = rag.search(q, k=5)
+        took = (time.perf_counter() - t0) * 1000
+        if hits.empty:
+            st.warning("В базе знаний нет релевантного контекста.")
+        else:
+            st.success(
+                "**Контекст для ответа (top-3):**\n\n"
+                + "\n".join(f"- *{h.source}*: {h.text}" for h in hits.head(3).itertuples())
+            )
+            table(hits, width="stretch", hide_index=True)
+        st.caption(f"Поиск: {took:.1f} мс, фрагментов в индексе: {len(rag):,}".replace(",", " "))
+
+
+def render(data, snapshot_day=None) -> None:
+    st.title("🤖 LLM + RAG (демо-концепт)")
+
+    with section("Зачем LLM здесь", "🧠"):
+        st.markdown(
+            "- **Пояснение риска** на языке ЛПР: “что случится”, “сколько стоит”, “что делать первым”.\n"
+            "- **Авто-генерация мер/задач** по типовым паттернам (hardening, segmentation, patch SLA).\n"
+            "- **Q&A по инфраструктуре**: ответы на вопросы по активам/рискам/мероприятиям.\n"
+        )
+
+    with section("Как не “ломать RAG” при изменениях инфраструктуры", "🧱"):
+        st.markdown(
+            "**Ключевая идея:** RAG не должен хранить “снимок инфраструктуры” как статичный текст.\n\n"
+            "✅ Делай **двухконтурную модель знаний:**\n"
+            "1) **CAG (статическая база знаний)**: CVE/БДУ/ATT&CK, типовые конфиги, стандарты (ISO/КИИ-профиль), playbooks.\n"
+            "2) **Dynamic Context (динамический контекст)**: активы/версии/топология/события берутся из коннекторов и БД *на запрос*.\n\n"
+            "То есть при изменениях в инфраструктуре — обновляются **данные/граф/индексы**, а не “переписывается RAG-архив”."
+        )
+
+    with section("Пример ответа LLM (демо)", "🗣️"):
+        _ask(data)
+
+    st.caption("Это демо. В боевой версии: вызов LLM, RAG над CAG, подтягивание динамического контекста из БД/графа.")
@@ -0,0 +1,130 @@
+"""Риски: реестр, карта, граф атак, изменения по снимку, Монте-Карло."""
+import pandas as pd
+import streamlit as st
+
+from pks import charts
+from pks.data import REGISTER_COLUMNS, attack_graph, exporter, register_source, simulator, snapshot_diff
+from pks.simulation import MEASURES, Scope, modal_factor
+from pks.tables import paged_df, styled_df
+from pks.ui import chart, donut, export_panel, fragment, section, table
+
+
+@fragment
+def _register(risks) -> None:
+    paged_df(risks[REGISTER_COLUMNS], "risk_register")
+
+
+@fragment
+def _risk_map(risks) -> None:
+    score_range = charts.zoom_slider(st, risks, "risk_score", key="risk_map_zoom")
+    fig = charts.scatter(
+        risks,
+        x="risk_score",
+        y="loss_max",
+        hover_data=["asset_id","cve","priority","cvss","vector"],
+        title="Риск-скор vs Потенциальный ущерб",
+        x_range=score_range,
+    )
+    chart(fig, width="stretch")
+
+
+@fragment
+def _blast_radius(data) -> None:
+    risks = data.risks
+    target = st.text_input("Радиус поражения для актива", risks["asset_id"].iloc[0] if len(risks) else "")
+    with attack_graph(data) as graph:
+        blast = graph.blast_radius(target) if target in graph.ids else None
+    if blast is not None:
+        st.caption(f"При компрометации {target}: достижимо {len(blast)} активов, из них T0 — {int(blast['t0'].sum())}")
+        table(blast.head(1000), width="stretch")
+    elif target:
+        st.warning("Актив не найден.")
+
+
+@fragment
+def _simulation(data) -> None:
+    risks, assets = data.risks, data.assets
+    engine = simulator(data)
+    measures = st.multiselect("Меры", list(MEASURES), default=["Патч/обновление"])
+    portfolio = []
+    for col, measure in zip(st.columns(max(len(measures), 1)), measures):
+        zones = col.multiselect(f"{measure}: зоны", engine.zones(), key=f"sim_zones_{measure}")
+        owners = col.multiselect(f"{measure}: владельцы", engine.owners(), key=f"sim_owners_{measure}")
+        portfolio.append(Scope(measure, frozenset(zones), frozenset(owners)))
+
+    with st.spinner("Монте-Карло…"):
+        before, after = engine.run(), engine.run(portfolio)
+
+    cA, cB, cC, cD = st.columns(4)
+    cA.metric("Ожид. ущерб ДО, млн ₽", f"{before.mean:.0f}")
+    cB.metric("Ожид. ущерб ПОСЛЕ, млн ₽", f"{after.mean:.0f}",
+              delta=f"{after.mean - before.mean:.0f}", delta_color="inverse")
+    cC.metric("VaR 95% ДО, млн ₽", f"{before.var(95):.0f}")
+    cD.metric("VaR 95% ПОСЛЕ, млн ₽", f"{after.var(95):.0f}",
+              delta=f"{after.var(95) - before.var(95):.0f}", delta_color="inverse")
+
+    chart(
+        charts.compare_histograms({"ДО": before.losses, "ПОСЛЕ": after.losses},
+                                  x="Ущерб за год, млн ₽", title=f"Распределение ущерба ({engine.trials:,} испытаний)".replace(",", " ")),
+        width="stretch"
+    )
+    table(
+        pd.DataFrame([before.summary(), after.summary()], index=["ДО", "ПОСЛЕ"]).round(1),
+        width="stretch"
+    )
+
+    # Иллюстрация на ТОП-10: модальный эффект мер по каждой находке
+    sim = risks.head(10)[["priority","asset_id","cve","risk_score","loss_max","status"]]
+    meta = assets.set_index("asset_id")
+    factor = modal_factor(sim["asset_id"].map(meta["zone"]), sim["asset_id"].map(meta["owner"]), portfolio)
+    sim.insert(4, "risk_score_new", (sim["risk_score"] * factor).round(1))
+    sim.insert(6, "loss_new", (sim["loss_max"] * factor).round(1))
+    table(styled_df(sim), width="stretch")
+
+
+def render(data, snapshot_day=None) -> None:
+    risks = data.risks
+    st.title("📌 Риски и потенциальный ущерб (демо)")
+
+    with section("Риск-реестр", "🧾"):
+        _register(risks)
+        st.caption("Выгрузка реестра целиком — в фоне; готовый файл переиспользуется, пока данные не изменились.")
+        export_panel(exporter(), "risk_register", data.version, register_source(data))
+
+    with section("Карта риска", "🗺️"):
+        _risk_map(risks)
+
+    with section("Граф атак: пути к T0 и радиус поражения", "🕸️"):
+        with attack_graph(data) as graph:  # сводка и пути — по одной версии графа
+            g = graph.summary() if graph.m else None
+            paths = graph.attack_paths() if graph.m else None
+        if g is None:
+            st.info("Связи между активами не загружены (edges) — граф не строится, exposure = 1.0.")
+        else:
+            gA, gB, gC, gD = st.columns(4)
+            gA.metric("Связей в графе", f"{g['edges']:,}".replace(",", " "))
+            gB.metric("Достижимо с периметра", g["reachable"])
+            gC.metric("Можно скомпрометировать", g["compromisable"])
+            gD.metric("T0 под угрозой", f"{g['crown_reached']} / {g['crown_total']}")
+            st.caption("Кратчайшие пути атаки Edge → T0 (переход дальше — только через активы с открытыми уязвимостями)")
+            table(paths, width="stretch")
+            _blast_radius(data)
+
+    with section("Приоритеты (donut)", "🍩"):
+        prio_counts = risks.groupby("priority", observed=True).size().reset_index(name="count")
+        chart(donut(prio_counts, "priority", "count", "Распределение рисков по приоритетам"), width="stretch")
+
+    if snapshot_day is not None:
+        with section("Изменения: снимок → текущее состояние", "🔀"):
+            changes = snapshot_diff(snapshot_day)
+            cA, cB, cC = st.columns(3)
+            cA.metric("Новые находки", len(changes["added"]))
+            cB.metric("Закрытые/удалённые", len(changes["removed"]))
+            cC.metric("Пересчитан риск-скор", len(changes["rescored"]))
+            tA, tB, tC = st.tabs(["Добавлены", "Удалены", "Пересчитаны"])
+            table(styled_df(changes["added"].head(1000)), "added", target=tA, width="stretch")
+            table(styled_df(changes["removed"].head(1000)), "removed", target=tB, width="stretch")
+            table(changes["rescored"].head(1000), "rescored", target=tC, width="stretch")
+
+    with section("Симуляция эффекта мер", "🧪"):
+        _simulation(data)
@@ -0,0 +1,50 @@
+"""Уязвимости: фильтры по индексу, постраничный список, распределения."""
+import streamlit as st
+
+from pks import charts
+from pks.data import vuln_index
+from pks.tables import paged_df
+from pks.ui import chart, donut, fragment, section
+
+
+@fragment
+def _filtered_list(data) -> None:
+    vidx = vuln_index(data)
+
+    with section("Фильтры", "🎛️"):
+        c1, c2, c3 = st.columns(3)
+        asset_filter = c1.selectbox("Актив", ["(все)"] + vidx.values("asset_id"))
+        status_filter = c2.selectbox("Статус", ["(все)"] + vidx.values("status"))
+        min_cvss = c3.slider("Минимальный CVSS", 0.0, 10.0, 7.0, 0.1)
+
+    pos = vidx.query(
+        min_score=min_cvss,
+        asset_id=None if asset_filter == "(все)" else asset_filter,
+        status=None if status_filter == "(все)" else status_filter,
+    )
+
+    with section("Список уязвимостей", "📋"):
+        # Отбор — позиции в общем фрейме; копируется только видимая страница
+        paged_df(data.vulns, "vulns_table", sort_by="cvss", ascending=False, rows=pos)
+
+
+@fragment
+def _cvss_histogram(data) -> None:
+    # Histogram CVSS — из отсортированного индекса, без прохода по vulns
+    vidx = vuln_index(data)
+    cvss_range = charts.zoom_slider(st, data.vulns, "cvss", key="cvss_zoom", bounds=(0.0, 10.0))
+    counts, edges = vidx.score_histogram(10 if cvss_range is None else 40, cvss_range or (0.0, 10.0))
+    chart(charts.binned_histogram(counts, edges, "cvss", "Распределение CVSS"), width="stretch")
+
+
+def render(data, snapshot_day=None) -> None:
+    st.title("🧨 Уязвимости (демо CAG)")
+
+    _filtered_list(data)
+
+    with section("Визуализация", "📈"):
+        _cvss_histogram(data)
+
+        # Donut по вектору
+        vec = vuln_index(data).counts("vector")
+        chart(donut(vec, "vector", "count", "Вектор атаки (Network / Internal / Adjacent)"), width="stretch")
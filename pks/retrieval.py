@@ -0,0 +1,542 @@
+"""Offline retrieval for the "LLM / RAG" page.
+
+Pipeline: documents → word-window chunks → embeddings (pluggable; a hashing
+embedder needs no model files) cached on disk by content hash → NumPy vector
+index.  The index answers top-k by exact inner product, or, for large corpora,
+by IVF-PQ (coarse k-means lists + 8-bit product-quantized codes, exact
+re-rank of the shortlist).  Documents are upserted/removed incrementally, so
+infrastructure changes re-embed only the documents whose text changed.  The
+static CAG corpus and each dataset's dynamic context live in separate
+retrievers; :class:`Corpus` searches them together.
+
+    python -m pks.retrieval bench --n 200000      # recall/latency: exact vs IVF-PQ
+"""
+import argparse
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pks.model import widen
+
+DIM = 384
+CHUNK_WORDS = 80
+CHUNK_OVERLAP = 20
+# Ниже этого размера точный перебор быстрее и точнее приближённого индекса.
+APPROX_MIN = 50_000
+NLIST = 256
+PQ_M = 48
+NPROBE = 8
+RERANK = 32
+
+TOKEN_RE = re.compile(r"[\w\-.:]+", re.UNICODE)
+STOPWORDS = frozenset(
+    "и в во на по с со к ко о об от до за из у же ли не ни но а или что как какой почему где когда "
+    "это этот то тот для при над под делать первым первый есть the a an of to in and or is for".split()
+)
+
+
+@dataclass(frozen=True)
+class Document:
+    doc_id: str
+    source: str
+    text: str
+
+
+# ============================
+# CHUNKING
+# ============================
+
+def chunk_text(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list:
+    toks = text.split()
+    if len(toks) <= words:
+        return [text.strip()] if text.strip() else []
+    step = max(words - overlap, 1)
+    return [" ".join(toks[i:i + words]) for i in range(0, max(len(toks) - overlap, 1), step)]
+
+
+# ============================
+# EMBEDDERS
+# ============================
+
+class HashingEmbedder:
+    """Signed feature hashing of tokens, 5-char stems and bigrams (no model files)."""
+    name = f"hash-{DIM}"
+    dim = DIM
+
+    def _features(self, text: str):
+        toks = [t.strip(".:-") for t in TOKEN_RE.findall(text.lower())]
+        toks = [t for t in toks if t and t not in STOPWORDS]
+        feats = list(toks)
+        feats += [p for t in toks if "-" in t or "." in t for p in re.split(r"[\-.:]", t) if p]  # gw-vpn-01 → vpn
+        feats += [t[:5] for t in toks if len(t) > 5]  # грубая нормализация словоформ
+        feats += [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+        return feats
+
+    def embed(self, texts) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            h = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in self._features(text)), dtype=np.uint32)
+            if not len(h):
+                continue
+            sign = np.where(h & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[i], (h % self.dim).astype(np.intp), sign)
+        return _normalize(out)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model: str):
+        from sentence_transformers import SentenceTransformer  # noqa: WPS433 — опциональная зависимость
+        self._model = SentenceTransformer(model)
+        self.name = f"st-{model}"
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts) -> np.ndarray:
+        vecs = self._model.encode(list(texts), batch_size=64, show_progress_bar=False)
+        return _normalize(np.asarray(vecs, dtype=np.float32))
+
+
+def make_embedder(spec: str = "hash"):
+    """``"hash"`` or ``"st:<model>"``; falls back to hashing if the model is unavailable."""
+    if spec.startswith("st:"):
+        try:
+            return SentenceTransformerEmbedder(spec[3:])
+        except Exception:  # нет пакета/модели в контуре — работаем на хешировании
+            return HashingEmbedder()
+    return HashingEmbedder()
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(x, axis=1, keepdims=True)
+    norm[norm == 0] = 1.0
+    return x / norm
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings keyed by (embedder, content hash)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._con().execute("CREATE TABLE IF NOT EXISTS emb (model TEXT, hash TEXT, vec BLOB, "
+                            "PRIMARY KEY (model, hash)) WITHOUT ROWID")
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def embed(self, embedder, texts) -> np.ndarray:
+        hashes = [content_hash(t) for t in texts]
+        found = {}
+        con = self._con()
+        for i in range(0, len(hashes), 500):
+            part = hashes[i:i + 500]
+            q = f"SELECT hash, vec FROM emb WHERE model = ? AND hash IN ({','.join('?' * len(part))})"
+            found.update(con.execute(q, [embedder.name, *part]).fetchall())
+        missing = [i for i, h in enumerate(hashes) if h not in found]
+        out = np.empty((len(texts), embedder.dim), dtype=np.float32)
+        if missing:
+            vecs = embedder.embed([texts[i] for i in missing])
+            con.execute("BEGIN")
+            con.executemany("INSERT OR REPLACE INTO emb(model, hash, vec) VALUES (?, ?, ?)",
+                            [(embedder.name, hashes[i], v.tobytes()) for i, v in zip(missing, vecs)])
+            con.execute("COMMIT")
+            for i, v in zip(missing, vecs):
+                found[hashes[i]] = v
+        for i, h in enumerate(hashes):
+            v = found[h]
+            out[i] = np.frombuffer(v, dtype=np.float32) if isinstance(v, bytes) else v
+        return out
+
+
+# ============================
+# VECTOR INDEX
+# ============================
+
+def kmeans(x: np.ndarray, k: int, iters: int = 12, seed: int = 0, sample: int = 50_000) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if len(x) > sample:
+        x = x[rng.choice(len(x), sample, replace=False)]
+    k = min(k, len(x))
+    cent = x[rng.choice(len(x), k, replace=False)].copy()
+    xx = (x * x).sum(1, keepdims=True)
+    for _ in range(iters):
+        d = xx - 2 * x @ cent.T + (cent * cent).sum(1)
+        lab = d.argmin(1)
+        sums = np.zeros_like(cent)
+        np.add.at(sums, lab, x)
+        cnt = np.bincount(lab, minlength=k)
+        empty = cnt == 0
+        cent[~empty] = sums[~empty] / cnt[~empty, None]
+        if empty.any():  # пустой кластер — переинициализируем случайной точкой
+            cent[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return cent
+
+
+class IVFPQ:
+    """Inverted lists over k-means cells + product-quantized codes."""
+
+    def __init__(self, dim: int, nlist: int = NLIST, m: int = PQ_M):
+        while dim % m:
+            m -= 1
+        self.dim, self.nlist, self.m, self.ds = dim, nlist, m, dim // m
+        self.coarse = None
+        self.books = None  # (m, 256, ds)
+        self.assign = np.empty(0, dtype=np.int32)
+        self.codes = np.empty((0, m), dtype=np.uint8)
+        self._order = self._starts = None
+
+    def train(self, x: np.ndarray) -> None:
+        self.coarse = _normalize(kmeans(x, self.nlist))
+        self.nlist = len(self.coarse)
+        # PQ кодирует остаток от центроида списка — точнее, чем сам вектор.
+        res = x - self.coarse[(x @ self.coarse.T).argmax(1)]
+        self.books = np.stack([kmeans(res[:, j * self.ds:(j + 1) * self.ds], 256, iters=8, seed=j, sample=20_000)
+                               if len(x) >= 256 else np.zeros((256, self.ds), np.float32)
+                               for j in range(self.m)])
+
+    def encode(self, x: np.ndarray):
+        assign = (x @ self.coarse.T).argmax(1).astype(np.int32)
+        res = x - self.coarse[assign]
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = res[:, j * self.ds:(j + 1) * self.ds]
+            b = self.books[j]
+            codes[:, j] = ((sub * sub).sum(1, keepdims=True) - 2 * sub @ b.T + (b * b).sum(1)).argmin(1)
+        return assign, codes
+
+    def set_rows(self, assign: np.ndarray, codes: np.ndarray) -> None:
+        self.assign, self.codes = assign, codes
+        self._order = None
+
+    def append(self, assign: np.ndarray, codes: np.ndarray) -> None:
+        self.assign = np.concatenate([self.assign, assign])
+        self.codes = np.concatenate([self.codes, codes])
+        self._order = None  # списки перестроятся при следующем поиске
+
+    def _lists(self):
+        if self._order is None:
+            self._order = np.argsort(self.assign, kind="stable")
+            self._starts = np.searchsorted(self.assign[self._order], np.arange(self.nlist + 1))
+        return self._order, self._starts
+
+    def candidates(self, q: np.ndarray, nprobe: int):
+        order, starts = self._lists()
+        cs = self.coarse @ q
+        probe = np.argsort(-cs)[:nprobe]
+        rows = np.concatenate([order[starts[c]:starts[c + 1]] for c in probe]) if len(probe) else order[:0]
+        lut = np.einsum("mkd,md->mk", self.books, q.reshape(self.m, self.ds))
+        approx = cs[self.assign[rows]] + lut[np.arange(self.m), self.codes[rows]].sum(1)
+        return rows, approx
+
+
+class VectorIndex:
+    """Id-addressable vector store with exact and IVF-PQ search and tombstone deletes."""
+
+    def __init__(self, dim: int, approx_min: int = APPROX_MIN):
+        self.dim, self.approx_min = dim, approx_min  # порог автообучения IVF-PQ
+        self._vecs = np.empty((1024, dim), dtype=np.float32)
+        self._n = 0
+        self._ids = []
+        self._row = {}
+        self._alive = np.zeros(1024, dtype=bool)
+        self.ivf = None
+        self._trained_rows = 0  # строки после неё — «свежий» сегмент, ищется точно
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def add(self, ids, vecs: np.ndarray) -> None:
+        self.remove([i for i in ids if i in self._row])
+        n = len(ids)
+        if self._n + n > len(self._vecs):
+            cap = max(2 * len(self._vecs), self._n + n)
+            self._vecs = np.resize(self._vecs, (cap, self.dim))
+            self._alive = np.concatenate([self._alive, np.zeros(cap - len(self._alive), bool)])
+        rows = np.arange(self._n, self._n + n)
+        self._vecs[rows] = vecs
+        self._alive[rows] = True
+        for r, i in zip(rows, ids):
+            self._row[i] = int(r)
+        self._ids.extend(ids)
+        self._n += n
+        if self.ivf is not None:
+            self.ivf.append(*self.ivf.encode(vecs))
+        fresh = self._n - self._trained_rows
+        if len(self) >= self.approx_min and (self.ivf is None or fresh > 0.25 * self._trained_rows):
+            self.train()
+
+    def remove(self, ids) -> None:
+        for i in ids:
+            r = self._row.pop(i, None)
+            if r is not None:
+                self._alive[r] = False
+        if self._n and (self._n - len(self._row)) > 0.25 * self._n:
+            self._compact()
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[:self._n])
+        self._vecs[:len(keep)] = self._vecs[keep]
+        self._ids = [self._ids[r] for r in keep]
+        self._row = {i: r for r, i in enumerate(self._ids)}
+        self._alive[:] = False
+        self._alive[:len(keep)] = True
+        self._n = len(keep)
+        self._trained_rows = int(np.searchsorted(keep, self._trained_rows))
+        if self.ivf is not None:
+            self.ivf.set_rows(self.ivf.assign[keep], self.ivf.codes[keep])
+
+    def train(self, nlist: int = NLIST, m: int = PQ_M) -> None:
+        live = self._vecs[:self._n][self._alive[:self._n]]
+        if not len(live):
+            return
+        self.ivf = IVFPQ(self.dim, nlist=min(nlist, max(len(live) // 39, 1)), m=m)
+        self.ivf.train(live)
+        self.ivf.set_rows(*self.ivf.encode(self._vecs[:self._n]))
+        self._trained_rows = self._n
+
+    def search(self, q: np.ndarray, k: int = 5, mode: str = "auto", nprobe: int = NPROBE, approx_min: int = None):
+        """Top-k (ids, scores) by inner product; ``mode`` = exact | approx | auto (approx from ``approx_min`` rows)."""
+        if not self._n:
+            return [], np.empty(0, np.float32)
+        approx_min = self.approx_min if approx_min is None else approx_min
+        approx = mode == "approx" or (mode == "auto" and len(self) >= approx_min)
+        if approx and self.ivf is None:
+            self.train()
+        if approx and self.ivf is not None:
+            rows, scores = self.ivf.candidates(q, nprobe)
+            keep = self._alive[rows]
+            rows, scores = rows[keep], scores[keep]
+            short = rows[np.argsort(-scores)[:k * RERANK]]
+            fresh = np.arange(self._trained_rows, self._n)
+            # Свежие строки уже есть и в списках IVF — без unique одна строка попала бы в ТОП дважды
+            short = np.unique(np.concatenate([short, fresh[self._alive[fresh]]]))
+            exact = self._vecs[short] @ q  # точная переоценка короткого списка
+            top = short[np.argsort(-exact)[:k]]
+        else:
+            scores = self._vecs[:self._n] @ q
+            scores[~self._alive[:self._n]] = -np.inf
+            k = min(k, len(self))
+            top = np.argpartition(-scores, k - 1)[:k] if k < self._n else np.arange(self._n)
+            top = top[np.argsort(-scores[top])]
+            top = top[np.isfinite(scores[top])]
+        return [self._ids[r] for r in top], self._vecs[top] @ q
+
+
+# ============================
+# RETRIEVER
+# ============================
+
+class Retriever:
+    """Chunks, embeds (with disk cache) and indexes documents; answers top-k queries."""
+
+    def __init__(self, embedder, cache: EmbeddingCache, mode: str = "auto", approx_min: int = APPROX_MIN):
+        self.embedder, self.cache, self.mode = embedder, cache, mode
+        self.index = VectorIndex(embedder.dim, approx_min)
+        self._chunks = {}  # chunk_id → (doc_id, source, text)
+        self._docs = {}    # doc_id → (content hash, [chunk_id, …])
+        self.lock = threading.RLock()
+        self.token = None  # версия данных, с которой синхронизирован корпус
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def upsert(self, docs) -> int:
+        """Index new/changed documents; returns how many were (re)embedded."""
+        with self.lock:
+            changed = [d for d in docs if self._docs.get(d.doc_id, (None,))[0] != content_hash(d.text)]
+            if not changed:
+                return 0
+            self._drop([d.doc_id for d in changed])
+            ids, texts = [], []
+            for d in changed:
+                cids = []
+                for j, part in enumerate(chunk_text(d.text)):
+                    cid = f"{d.doc_id}#{j}"
+                    self._chunks[cid] = (d.doc_id, d.source, part)
+                    cids.append(cid)
+                    ids.append(cid)
+                    texts.append(part)
+                self._docs[d.doc_id] = (content_hash(d.text), cids)
+            for i in range(0, len(texts), 10_000):
+                self.index.add(ids[i:i + 10_000], self.cache.embed(self.embedder, texts[i:i + 10_000]))
+            return len(changed)
+
+    def remove(self, doc_ids) -> None:
+        with self.lock:
+            self._drop(doc_ids)
+
+    def _drop(self, doc_ids) -> None:
+        gone = []
+        for doc_id in doc_ids:
+            _, cids = self._docs.pop(doc_id, (None, []))
+            gone.extend(cids)
+            for c in cids:
+                self._chunks.pop(c, None)
+        if gone:
+            self.index.remove(gone)
+
+    def sync(self, docs, prefix: str, token=None) -> int:
+        """Make the ``prefix``-scoped document set equal to ``docs`` (incremental); remembers ``token``."""
+        docs = list(docs)
+        live = {d.doc_id for d in docs}
+        with self.lock:
+            stale = [d for d in self._docs if d.startswith(prefix) and d not in live]
+            self._drop(stale)
+            changed = self.upsert(docs) + len(stale)
+            self.token = token
+        return changed
+
+    def hits(self, q: np.ndarray, k: int = 5, approx_min: int = None) -> list:
+        """Top-``k`` documents for an embedded query, one chunk per document."""
+        with self.lock:
+            ids, scores = self.index.search(q, k * 3, self.mode, approx_min=approx_min)
+            rows, seen = [], set()
+            for cid, s in zip(ids, scores):
+                doc_id, source, text = self._chunks[cid]
+                if doc_id in seen:  # по одному фрагменту на документ
+                    continue
+                seen.add(doc_id)
+                rows.append({"score": round(float(s), 3), "source": source, "doc_id": doc_id, "text": text})
+        return rows[:k]
+
+    def search(self, query: str, k: int = 5, approx_min: int = None) -> pd.DataFrame:
+        return Corpus(self).search(query, k, approx_min)
+
+
+class Corpus:
+    """Read-only union of retrievers sharing one embedder (e.g. the shared CAG index + one dataset's context)."""
+
+    def __init__(self, *parts: Retriever):
+        self.parts = parts
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self.parts)
+
+    def search(self, query: str, k: int = 5, approx_min: int = None) -> pd.DataFrame:
+        q = self.parts[0].embedder.embed([query])[0]
+        rows = [r for p in self.parts for r in p.hits(q, k, approx_min)]
+        rows.sort(key=lambda r: -r["score"])
+        return pd.DataFrame(rows[:k], columns=["score", "source", "doc_id", "text"])
+
+
+# ============================
+# CORPUS
+# ============================
+
+PLAYBOOKS = {
+    "patch": "Патч/обновление: установить исправление вендора на уязвимый актив, проверить версию после обновления, "
+             "зафиксировать SLA устранения (P1 — 7 дней, P2 — 14 дней). Снижает риск-скор на 45–60%. "
+             "Для периметра (Edge, VPN, веб-приложения) — в первую очередь.",
+    "segmentation": "Сегментация: изолировать зоны T0/T1/T2, ограничить межзонные потоки и доступ к административным "
+                    "интерфейсам. Снижает достижимость (reach) уязвимостей из сети на 25%.",
+    "access": "Ограничение доступа: JML-процесс, пересмотр прав, MFA и контроль привилегированных учётных записей "
+              "(Valid Accounts, T1078). Снижает риск на ~20%.",
+    "hardening-ci": "Hardening CI: защита репозиториев и пайплайнов, сканирование секретов, SBOM, подпись артефактов. "
+                    "Снижает риск цепочки поставки на ~15%.",
+    "two-contour": "RAG не хранит снимок инфраструктуры как статичный текст: CAG (CVE/БДУ/ATT&CK, стандарты, playbooks) "
+                   "индексируется один раз, а динамический контекст (активы, риски) обновляется инкрементально.",
+}
+
+
+def static_documents(mitre: pd.DataFrame, bdu: pd.DataFrame) -> list:
+    """CAG corpus: ATT&CK techniques, БДУ records and playbooks."""
+    docs = [Document(f"cag:playbook:{k}", "Playbook", v) for k, v in PLAYBOOKS.items()]
+    docs += [Document(f"cag:mitre:{r.technique}", "MITRE ATT&CK",
+                      f"{r.technique} {r.name}. Покрытие: {r.coverage}. {r.note}")
+             for r in mitre.itertuples(index=False)]
+    docs += [Document(f"cag:bdu:{r.bdu_id}", "БДУ ФСТЭК",
+                      " ".join(filter(None, [r.bdu_id, r.name, r.vendor, r.product]))
+                      + f". Опасность: {r.severity or 'н/д'}. CVE: {r.cves or 'нет'}")
+             for r in bdu.itertuples(index=False)]
+    return docs
+
+
+# Динамический контекст: все активы и самые рискованные находки (risks отсортирован по убыванию).
+DYNAMIC_ASSETS = 50_000
+DYNAMIC_RISKS = 20_000
+
+
+def dynamic_documents(assets: pd.DataFrame, risks: pd.DataFrame) -> list:
+    meta = assets.drop_duplicates("asset_id").set_index("asset_id")
+    docs = [Document(f"dyn:asset:{r.asset_id}", "Актив",
+                     f"Актив {r.asset_id}: тип {r.type}, зона {r.zone}, критичность {r.criticality}, владелец {r.owner}.")
+            for r in assets.head(DYNAMIC_ASSETS).itertuples(index=False)]
+    top = widen(risks.head(DYNAMIC_RISKS))  # CVSS в тексте — как в источнике, без хвоста float32
+    kind = top["asset_id"].map(meta["type"]) if len(meta) else top["asset_id"]
+    zone = top["asset_id"].map(meta["zone"]) if len(meta) else top["asset_id"]
+    for r, t, z in zip(top.itertuples(index=False), kind, zone):
+        docs.append(Document(
+            f"dyn:risk:{r.cve}|{r.asset_id}", "Риск",
+            f"Риск {r.priority} по активу {r.asset_id} ({t}, зона {z}): уязвимость {r.cve}, CVSS {r.cvss}, "
+            f"вектор {r.vector}, статус {r.status}, риск-скор {r.risk_score}, потенциальный ущерб до {r.loss_max} млн ₽.",
+        ))
+    return docs
+
+
+# ============================
+# BENCHMARK
+# ============================
+
+def benchmark(n: int = 200_000, dim: int = 128, queries: int = 200, k: int = 10, seed: int = 0) -> pd.DataFrame:
+    """Recall@k and per-query latency of exact vs IVF-PQ on clustered synthetic vectors."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 500, 8), dim)).astype(np.float32)
+    x = _normalize(centers[rng.integers(0, len(centers), n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32))
+    q = _normalize(x[rng.choice(n, queries, replace=False)] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32))
+
+    idx = VectorIndex(dim, approx_min=n + 1)  # не обучать IVF автоматически во время add
+    idx.add(list(range(n)), x)
+    t = time.perf_counter()
+    idx.train()
+    train_s = time.perf_counter() - t
+
+    rows, truth = [], []
+    t = time.perf_counter()
+    for v in q:
+        truth.append(set(idx.search(v, k, "exact")[0]))
+    rows.append({"mode": "exact", "nprobe": None, "recall@k": 1.0,
+                 "ms/query": 1000 * (time.perf_counter() - t) / queries, "train_s": 0.0})
+    for nprobe in (2, 8, 32):
+        hits = 0
+        t = time.perf_counter()
+        for v, tr in zip(q, truth):
+            hits += len(tr & set(idx.search(v, k, "approx", nprobe)[0]))
+        rows.append({"mode": "ivf-pq", "nprobe": nprobe, "recall@k": hits / (k * queries),
+                     "ms/query": 1000 * (time.perf_counter() - t) / queries, "train_s": train_s})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Бенчмарк векторного индекса ПКС")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench")
+    b.add_argument("--n", type=int, default=200_000)
+    b.add_argument("--dim", type=int, default=128)
+    b.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args(argv)
+    print(benchmark(args.n, args.dim, args.queries).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
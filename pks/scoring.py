@@ -0,0 +1,211 @@
+"""Vectorized risk-scoring engine (``cvss * criticality * reach * exposure``).
+
+``exposure`` is the per-asset attack-graph factor from :mod:`pks.graph`
+(1.0 when no dependency graph is known).
+
+Priority thresholds and loss bands are NumPy bins equivalent to the original
+row-wise rules; input is processed in bounded chunks.  A full rescore is a
+few vectorized passes (≈0.3 s per million findings), so the process pool and
+partial rescoring only engage above ``POOL_MIN_ROWS`` / ``RESCORE_MIN_ROWS``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REACH = {"Network": 1.0, "Adjacent": 0.7, "Internal": 0.5}
+
+# score >= 30 → P1, >= 20 → P2, >= 12 → P3, иначе P4
+PRIO_EDGES = np.array([12.0, 20.0, 30.0])
+PRIO_LABELS = np.array(["P4 (Low)", "P3 (Medium)", "P2 (High)", "P1 (Critical)"], dtype=object)
+
+# score > 30 → 120, > 20 → 40, иначе 10 (строгие границы)
+LOSS_EDGES = np.array([20.0, 30.0])
+LOSS_VALUES = np.array([10, 40, 120], dtype=np.int64)
+
+CHUNK_ROWS = 1_000_000
+# Ниже порогов пул процессов (сериализация порций) и выравнивание с прошлой версией дороже полного пересчёта
+POOL_MIN_ROWS = 4_000_000
+RESCORE_MIN_ROWS = 10_000_000
+INPUT_COLUMNS = ["asset_id", "cvss", "vector"]
+
+
+def score_arrays(cvss, criticality, reach, exposure=1.0):
+    """Score aligned arrays → (risk_score, priority, loss_max)."""
+    score = np.round(np.asarray(cvss, dtype=np.float64) * np.asarray(criticality, dtype=np.float64)
+                     * np.asarray(reach, dtype=np.float64) * np.asarray(exposure, dtype=np.float64), 1)
+    nan = np.isnan(score)
+    # NaN-скор (неизвестный актив/вектор) трактуется как P4 / минимальный ущерб, как и раньше.
+    prio_code = np.digitize(score, PRIO_EDGES, right=False)
+    loss_code = np.digitize(score, LOSS_EDGES, right=True)
+    prio_code[nan] = 0
+    loss_code[nan] = 0
+    return score, PRIO_LABELS[prio_code], LOSS_VALUES[loss_code]
+
+
+def _lookup(keys: pd.Series, mapping: pd.Series) -> np.ndarray:
+    """Vectorized ``keys.map(mapping)`` to float64 (NaN for misses)."""
+    pos = mapping.index.get_indexer(keys)
+    out = mapping.to_numpy(dtype=np.float64)[pos]
+    out[pos < 0] = np.nan
+    return out
+
+
+def _criticality(assets: pd.DataFrame) -> pd.Series:
+    return assets.drop_duplicates("asset_id", keep="last").set_index("asset_id")["criticality"]
+
+
+def _reach() -> pd.Series:
+    return pd.Series(REACH, dtype=np.float64)
+
+
+def _exposure(keys: pd.Series, exposure) -> np.ndarray:
+    if exposure is None:
+        return np.ones(len(keys))
+    out = _lookup(keys, exposure)
+    out[np.isnan(out)] = 1.0
+    return out
+
+
+def _score_partition(args):
+    return score_arrays(*args)
+
+
+def _cvss(frame: pd.DataFrame) -> np.ndarray:
+    cvss = frame["cvss"].to_numpy(dtype=np.float64)
+    if frame["cvss"].dtype == np.float32:  # уже сжатый фрейм: CVSS задан с точностью 0.1, хвост float32 убираем
+        cvss = np.round(cvss, 1)
+    return cvss
+
+
+def score_frame(vulns: pd.DataFrame, assets: pd.DataFrame, chunk_rows: int = CHUNK_ROWS,
+                exposure: pd.Series = None, workers: int = 0) -> pd.DataFrame:
+    """Return ``vulns`` + criticality/reach/exposure/risk_score/priority/loss_max.
+
+    Intermediates are bounded by ``chunk_rows``; ``workers > 1`` scores the
+    chunks in a process pool from ``POOL_MIN_ROWS`` rows on.  A ``float32``
+    CVSS column (compact layout) is scored at its one-decimal value, exactly
+    as the ``float64`` source.
+    """
+    crit_map, reach_map = _criticality(assets), _reach()
+    n = len(vulns)
+    crit = np.empty(n, dtype=np.float64)
+    reach = np.empty(n, dtype=np.float64)
+    expo = np.empty(n, dtype=np.float64)
+    score = np.empty(n, dtype=np.float64)
+    prio = np.empty(n, dtype=object)
+    loss = np.empty(n, dtype=np.int64)
+
+    bounds = [(i, min(i + chunk_rows, n)) for i in range(0, n, max(chunk_rows, 1))]
+    for lo, hi in bounds:
+        crit[lo:hi] = _lookup(vulns["asset_id"].iloc[lo:hi], crit_map)
+        reach[lo:hi] = _lookup(vulns["vector"].iloc[lo:hi], reach_map)
+        expo[lo:hi] = _exposure(vulns["asset_id"].iloc[lo:hi], exposure)
+
+    cvss = _cvss(vulns)
+    parts = [(cvss[lo:hi], crit[lo:hi], reach[lo:hi], expo[lo:hi]) for lo, hi in bounds]
+    workers = min(workers, os.cpu_count() or 1)
+    if workers > 1 and len(parts) > 1 and n >= POOL_MIN_ROWS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_score_partition, parts))
+    else:
+        results = map(_score_partition, parts)
+    for (lo, hi), (s, p, l) in zip(bounds, results):
+        score[lo:hi], prio[lo:hi], loss[lo:hi] = s, p, l
+
+    out = vulns.copy(deep=False)  # исходные столбцы общие (copy-on-write)
+    out["criticality"] = _as_crit_dtype(crit, assets)
+    out["reach"] = reach
+    out["exposure"] = expo
+    out["risk_score"] = score
+    out["priority"] = prio
+    out["loss_max"] = loss
+    return out
+
+
+def _as_crit_dtype(crit: np.ndarray, assets: pd.DataFrame):
+    # Series.map сохранял целочисленный dtype, если все активы найдены.
+    if not np.isnan(crit).any() and pd.api.types.is_integer_dtype(assets["criticality"]):
+        return crit.astype(assets["criticality"].dtype)
+    return crit
+
+
+def rescore_changed(prev: pd.DataFrame, vulns: pd.DataFrame, assets: pd.DataFrame,
+                    exposure: pd.Series = None) -> pd.DataFrame:
+    """Like :func:`score_frame`, reusing ``prev`` scores for rows whose inputs are unchanged.
+
+    Rows are aligned on the index (any order); rows missing from ``prev`` are
+    scored.  ``prev`` may be in the compact layout.
+    """
+    pos = prev.index.get_indexer(vulns.index)
+    crit = _lookup(vulns["asset_id"], _criticality(assets))
+    reach = _lookup(vulns["vector"], _reach())
+    expo = _exposure(vulns["asset_id"], exposure)
+    cvss = _cvss(vulns)
+
+    # reach берётся из таблицы REACH, её значения различимы и во float32; exposure сравнивается точно
+    reach_as_prev = reach.astype(prev["reach"].dtype).astype(np.float64)
+    changed = pos < 0
+    for old, new in [(_cvss(prev), cvss), (prev["criticality"], crit), (prev["reach"], reach_as_prev),
+                     (prev["exposure"], expo)]:
+        changed |= ~_same(_take(old, pos), new)
+
+    score = _take(prev["risk_score"], pos)
+    prio = prev["priority"].to_numpy(dtype=object)[pos]
+    loss = prev["loss_max"].to_numpy(dtype=np.int64)[pos]
+    if changed.any():
+        score[changed], prio[changed], loss[changed] = score_arrays(cvss[changed], crit[changed], reach[changed],
+                                                                    expo[changed])
+
+    out = vulns.copy(deep=False)
+    out["criticality"] = _as_crit_dtype(crit, assets)
+    out["reach"] = reach
+    out["exposure"] = expo
+    out["risk_score"] = score
+    out["priority"] = prio
+    out["loss_max"] = loss
+    return out
+
+
+def _take(values, pos: np.ndarray) -> np.ndarray:
+    out = np.asarray(values, dtype=np.float64)[pos]
+    out[pos < 0] = np.nan
+    return out
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+# ============================
+# INDEX / KPI (тренды)
+# ============================
+
+# Индекс 0–100: активный скор относительно максимума (cvss 10 × criticality 5 × reach 1.0)
+INDEX_SCORE_MAX = 50.0
+ACTIVE_STATUSES = ["Open", "In progress"]
+INDEX_DIMENSIONS = ("zone", "owner")
+
+
+def _index(score_sum: float, n: int) -> float:
+    return round(min(100.0, 100.0 * score_sum / (n * INDEX_SCORE_MAX)), 2) if n else 0.0
+
+
+def risk_indices(risks: pd.DataFrame, assets: pd.DataFrame) -> dict:
+    """Cyber-risk index overall and per zone/owner → ``{"index": …, "index:zone:T0": …}``.
+
+    Mitigated findings stay in the denominator, so closing them lowers the index.
+    """
+    active = risks["status"].isin(ACTIVE_STATUSES).to_numpy()
+    score = np.where(active, np.nan_to_num(risks["risk_score"].to_numpy(dtype=np.float64)), 0.0)
+    out = {"index": _index(score.sum(), len(risks))}
+    meta = assets.drop_duplicates("asset_id", keep="last").set_index("asset_id")
+    for dim in INDEX_DIMENSIONS:
+        codes, uniques = pd.factorize(meta[dim].reindex(risks["asset_id"]).to_numpy())
+        known = codes >= 0
+        sums = np.bincount(codes[known], weights=score[known], minlength=len(uniques))
+        counts = np.bincount(codes[known], minlength=len(uniques))
+        out.update({f"index:{dim}:{u}": _index(s, n) for u, s, n in zip(uniques, sums, counts)})
+    return out
+
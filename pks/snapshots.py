@@ -0,0 +1,258 @@
+"""Daily infrastructure snapshots: Arrow IPC base files + compressed deltas.
+
+Layout under ``root``::
+
+    manifest.json                      {"days": {"2026-10-17": "base-2026-10-01", …}}
+    base-2026-10-01/{assets,risks}.arrow         full tables, uncompressed → mmap
+    2026-10-17/{assets,risks}.upsert.arrow       new/changed rows, zstd
+    2026-10-17/{assets,risks}.delete.arrow       removed keys, zstd
+
+Each day is stored as one delta against its base (not chained), so loading a
+day touches at most two files per table, and a diff between two days that
+share a base only looks at the rows named in their deltas.
+"""
+import json
+import os
+import shutil
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+RETENTION_DAYS = 90
+# Дельта больше этой доли от таблицы → пишем новую базу.
+REBASE_RATIO = 0.3
+
+TABLE_KEYS = {
+    "assets": ["asset_id"],
+    "risks": ["cve", "asset_id"],
+}
+KEY_SEP = "\x1f"
+DIFF_COLUMNS = ["risk_score", "priority", "loss_max", "status"]
+
+
+def _key_array(table: pa.Table, name: str) -> pa.Array:
+    cols = [pc.cast(table[c], pa.string()) for c in TABLE_KEYS[name]]
+    if len(cols) == 1:
+        return cols[0]
+    return pc.binary_join_element_wise(*cols, KEY_SEP)
+
+
+def _key_index(df: pd.DataFrame, name: str) -> pd.Index:
+    cols = TABLE_KEYS[name]
+    if len(cols) == 1:
+        return pd.Index(df[cols[0]].astype(str))
+    return pd.Index(df[cols[0]].astype(str).str.cat(df[cols[1:]].astype(str), sep=KEY_SEP))
+
+
+def _table(df: pd.DataFrame) -> pa.Table:
+    """pandas → Arrow; categoricals are stored as plain values so every file shares one schema."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def _write(path: Path, table: pa.Table, compression=None) -> None:
+    # Через временный файл: читатели держат файлы через mmap, перезапись на месте испортила бы их буферы
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    opts = ipc.IpcWriteOptions(compression=compression)
+    try:
+        with ipc.new_file(str(tmp), table.schema, options=opts) as w:
+            w.write_table(table)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _read(path: Path) -> pa.Table:
+    # memory_map: буферы базы не копируются в память процесса при чтении.
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """Arrow → pandas without copying string/numeric buffers where possible."""
+    return table.to_pandas(
+        split_blocks=True,
+        self_destruct=False,
+        types_mapper={pa.string(): pd.ArrowDtype(pa.string()),
+                      pa.large_string(): pd.ArrowDtype(pa.large_string())}.get,
+    )
+
+
+def _same(a: pd.Series, b: pd.Series) -> np.ndarray:
+    eq = (a == b).to_numpy(dtype=bool, na_value=False)
+    return eq | (a.isna().to_numpy() & b.isna().to_numpy())
+
+
+class SnapshotStore:
+    def __init__(self, root, retention_days: int = RETENTION_DAYS, rebase_ratio: float = REBASE_RATIO):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.rebase_ratio = rebase_ratio
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.root / "manifest.json"
+
+    # ---------- manifest ----------
+
+    def _manifest(self) -> dict:
+        if self._manifest_path.exists():
+            return json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        return {"days": {}}
+
+    def _save_manifest(self, manifest: dict) -> None:
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+        tmp.replace(self._manifest_path)
+
+    def days(self) -> list:
+        return sorted(date.fromisoformat(d) for d in self._manifest()["days"])
+
+    def nearest(self, day: date):
+        """Latest stored day not after ``day`` (None if there is none)."""
+        candidates = [d for d in self.days() if d <= day]
+        return candidates[-1] if candidates else None
+
+    # ---------- write ----------
+
+    def record(self, day: date, assets: pd.DataFrame, risks: pd.DataFrame, overwrite: bool = False) -> bool:
+        """Persist ``day``; returns False if it already exists and ``overwrite`` is off."""
+        manifest = self._manifest()
+        iso = day.isoformat()
+        if iso in manifest["days"] and not overwrite:
+            return False
+
+        frames = {"assets": assets.reset_index(drop=True), "risks": risks.reset_index(drop=True)}
+        base = self._latest_base(manifest, day)
+        deltas = None
+        if base is not None:
+            deltas = {name: self._delta(base, name, df) for name, df in frames.items()}
+            touched = sum(len(u) + len(d) for u, d in deltas.values())
+            if touched > self.rebase_ratio * max(sum(len(df) for df in frames.values()), 1):
+                deltas = None
+
+        day_dir = self.root / iso  # при перезаписи все четыре файла дня заменяются атомарно
+        day_dir.mkdir(exist_ok=True)
+        if deltas is None:
+            base = f"base-{iso}"
+            base_dir = self.root / base
+            base_dir.mkdir(exist_ok=True)
+            for name, df in frames.items():
+                _write(base_dir / f"{name}.arrow", _table(df))
+                empty = _table(df.iloc[:0])
+                _write(day_dir / f"{name}.upsert.arrow", empty, "zstd")
+                _write(day_dir / f"{name}.delete.arrow", pa.table({"key": pa.array([], pa.string())}), "zstd")
+        else:
+            for name, (upserts, deletes) in deltas.items():
+                _write(day_dir / f"{name}.upsert.arrow", _table(upserts), "zstd")
+                _write(day_dir / f"{name}.delete.arrow", pa.table({"key": pa.array(deletes, pa.string())}), "zstd")
+
+        manifest["days"][iso] = base
+        self._prune(manifest, day)
+        self._save_manifest(manifest)
+        return True
+
+    def _latest_base(self, manifest: dict, day: date):
+        earlier = sorted((d, b) for d, b in manifest["days"].items() if d <= day.isoformat())
+        return earlier[-1][1] if earlier else None
+
+    def _delta(self, base: str, name: str, df: pd.DataFrame):
+        old = _read(self.root / base / f"{name}.arrow").to_pandas()
+        old.index = _key_index(old, name)
+        new = df.copy(deep=False)
+        new.index = _key_index(new, name)
+        old = old[~old.index.duplicated(keep="last")]
+        new = new[~new.index.duplicated(keep="last")]
+
+        deletes = old.index.difference(new.index).tolist()
+        common = new.index.intersection(old.index)
+        changed = np.zeros(len(common), dtype=bool)
+        for col in new.columns:
+            if col not in old.columns:
+                changed[:] = True
+                break
+            changed |= ~_same(new.loc[common, col], old.loc[common, col])
+        upsert_keys = new.index.difference(old.index).append(common[changed])
+        return new.loc[upsert_keys].reset_index(drop=True), deletes
+
+    def _prune(self, manifest: dict, today: date) -> None:
+        cutoff = (today - timedelta(days=self.retention_days)).isoformat()
+        for iso in [d for d in manifest["days"] if d < cutoff]:
+            del manifest["days"][iso]
+            shutil.rmtree(self.root / iso, ignore_errors=True)
+        live = set(manifest["days"].values())
+        for p in self.root.glob("base-*"):
+            if p.name not in live:
+                shutil.rmtree(p, ignore_errors=True)
+
+    # ---------- read ----------
+
+    def _parts(self, day: date, name: str):
+        iso = day.isoformat()
+        base = self._manifest()["days"][iso]
+        return (_read(self.root / base / f"{name}.arrow"),
+                _read(self.root / iso / f"{name}.upsert.arrow"),
+                _read(self.root / iso / f"{name}.delete.arrow")["key"],
+                base)
+
+    def load_table(self, day: date, name: str) -> pa.Table:
+        base, upserts, deletes, _ = self._parts(day, name)
+        if upserts.num_rows == 0 and len(deletes) == 0:
+            return base  # день = база: полностью zero-copy
+        drop = pa.concat_arrays([deletes.combine_chunks(), _key_array(upserts, name).combine_chunks()])
+        kept = base.filter(pc.invert(pc.is_in(_key_array(base, name), value_set=drop)))
+        return pa.concat_tables([kept, upserts.cast(kept.schema)])
+
+    def load(self, day: date):
+        """Return (assets, risks) frames for a stored day."""
+        return to_frame(self.load_table(day, "assets")), to_frame(self.load_table(day, "risks"))
+
+    # ---------- diff ----------
+
+    def diff(self, old_day: date, new_day: date, name: str = "risks") -> dict:
+        """Findings added / removed / re-scored between two stored days."""
+        base_o, ups_o, del_o, base_id_o = self._parts(old_day, name)
+        base_n, ups_n, del_n, base_id_n = self._parts(new_day, name)
+        if base_id_o != base_id_n:
+            return self._full_diff(self.load_table(old_day, name), self.load_table(new_day, name), name)
+
+        # Общая база: строки, не упомянутые ни в одной дельте, совпадают.
+        touched = pa.concat_arrays([
+            del_o.combine_chunks(), del_n.combine_chunks(),
+            _key_array(ups_o, name).combine_chunks(), _key_array(ups_n, name).combine_chunks(),
+        ]).unique()
+        base_rows = base_o.filter(pc.is_in(_key_array(base_o, name), value_set=touched))
+        return self._full_diff(self._state(base_rows, ups_o, del_o, name),
+                               self._state(base_rows, ups_n, del_n, name), name)
+
+    def _state(self, base_rows: pa.Table, upserts: pa.Table, deletes, name: str) -> pa.Table:
+        drop = pa.concat_arrays([deletes.combine_chunks(), _key_array(upserts, name).combine_chunks()])
+        kept = base_rows.filter(pc.invert(pc.is_in(_key_array(base_rows, name), value_set=drop)))
+        return pa.concat_tables([kept, upserts.cast(kept.schema)])
+
+    def _full_diff(self, old: pa.Table, new: pa.Table, name: str) -> dict:
+        o, n = old.to_pandas(), new.to_pandas()
+        o.index, n.index = _key_index(o, name), _key_index(n, name)
+        o = o[~o.index.duplicated(keep="last")]
+        n = n[~n.index.duplicated(keep="last")]
+        added = n.loc[n.index.difference(o.index)]
+        removed = o.loc[o.index.difference(n.index)]
+        common = n.index.intersection(o.index)
+        cols = [c for c in DIFF_COLUMNS if c in n.columns and c in o.columns]
+        both = n.loc[common, TABLE_KEYS[name]].copy()
+        for c in cols:
+            both[f"{c}_old"] = o.loc[common, c]
+            both[f"{c}_new"] = n.loc[common, c]
+        score = "risk_score" if "risk_score" in cols else None
+        changed = ~_same(n.loc[common, score], o.loc[common, score]) if score else np.zeros(len(common), bool)
+        return {
+            "added": added.reset_index(drop=True),
+            "removed": removed.reset_index(drop=True),
+            "rescored": both[changed].reset_index(drop=True),
+        }
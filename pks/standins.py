@@ -0,0 +1,347 @@
+"""Local stand-ins for the connector sources (tests, demos, benchmarks).
+
+One synthetic estate is served by four HTTP servers, each speaking the delta
+dialect of the real source:
+
+* ``ad``   — Microsoft Graph ``/devices/delta`` (delta/skip tokens);
+* ``cmdb`` — ServiceNow Table API (``sys_updated_on`` watermark + offset);
+* ``siem`` — Wazuh indexer vulnerability states (``search_after``);
+* ``itsm`` — Jira ``/rest/api/2/search`` (JQL ``updated`` watermark + ``startAt``).
+
+``Estate.mutate`` changes a few records per call, so every poll has a delta.
+Servers can throttle (429 + ``Retry-After``), fail (503) and add latency to
+exercise the client's retry/backoff.
+
+    python -m pks.standins --hosts 5000 --churn 5   # печатает PKS_CONNECTORS=...
+"""
+import argparse
+import bisect
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+
+ZONES = {"Edge": 0.05, "T0": 0.02, "T1": 0.33, "T2": 0.60}
+OWNERS = ["IT", "SecOps", "NetSec", "DevOps", "Product"]
+CLASSES = {"Edge": "cmdb_ci_netgear", "T0": "cmdb_ci_win_server", "T1": "cmdb_ci_linux_server", "T2": "cmdb_ci_computer"}
+OS = {"Edge": "FortiOS", "T0": "Windows Server 2022", "T1": "Ubuntu 22.04", "T2": "Windows 11"}
+AV = ["AV:N", "AV:N", "AV:A", "AV:L"]
+VULNS_PER_HOST = 4
+TICKET_SHARE = 0.3
+JIRA_STATUSES = ["To Do", "In Progress", "Done"]
+SNOW_USER_TZ = timezone(timedelta(hours=3))  # пояс пользователя интеграции: display_value ≠ value
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "+0000"
+
+
+def _snow(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _snow_field(ts: float) -> dict:
+    """Date field as returned with ``sysparm_display_value=all``."""
+    return {"display_value": datetime.fromtimestamp(ts, SNOW_USER_TZ).strftime("%d.%m.%Y %H:%M:%S"), "value": _snow(ts)}
+
+
+def _parse_utc(text: str, fmt: str) -> float:
+    return datetime.strptime(text, fmt).replace(tzinfo=timezone.utc).timestamp()
+
+
+class ChangeLog:
+    """Records of one collection in change order; an update supersedes the previous version."""
+
+    def __init__(self):
+        self._seq, self._ts, self._ids = [], [], []
+        self._live = {}  # id → (seq, record)
+
+    def put(self, rid: str, record: dict, seq: int, ts: float) -> None:
+        self._seq.append(seq)
+        self._ts.append(ts)
+        self._ids.append(rid)
+        self._live[rid] = (seq, record)
+
+    def get(self, rid: str):
+        entry = self._live.get(rid)
+        return None if entry is None else entry[1]
+
+    def ids(self) -> list:
+        return list(self._live)
+
+    def _iter(self, start: int):
+        for i in range(start, len(self._seq)):
+            seq, record = self._live[self._ids[i]]
+            if seq == self._seq[i]:  # устаревшие версии пропускаются
+                yield self._seq[i], self._ts[i], record
+
+    def after_seq(self, seq: int, limit: int) -> list:
+        out = []
+        for item in self._iter(bisect.bisect_right(self._seq, seq)):
+            out.append(item)
+            if len(out) == limit:
+                break
+        return out
+
+    def since_ts(self, ts: float, offset: int, limit: int) -> list:
+        out = []
+        for n, item in enumerate(self._iter(bisect.bisect_left(self._ts, ts))):
+            if n >= offset:
+                out.append(item)
+                if len(out) == limit:
+                    break
+        return out
+
+
+class Estate:
+    """Synthetic estate behind the four stand-ins (thread-safe)."""
+
+    def __init__(self, hosts: int = 200, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.seq, self.ts = 0, time.time() - hosts * 0.01  # начальная загрузка — «в прошлом»
+        self.devices, self.cis, self.vulns, self.issues = ChangeLog(), ChangeLog(), ChangeLog(), ChangeLog()
+        self.n_hosts = self.n_issues = 0
+        self._clock = lambda: 0.0
+        with self.lock:
+            for _ in range(hosts):
+                self._add_host()
+        self._clock = time.time
+
+    def _tick(self):
+        self.seq += 1
+        self.ts = round(max(self._clock(), self.ts + 0.001), 3)  # строго возрастающее, с точностью до мс
+        return self.seq, self.ts
+
+    def _add_host(self) -> None:
+        rng, i = self.rng, self.n_hosts
+        self.n_hosts += 1
+        zone = str(rng.choice(list(ZONES), p=list(ZONES.values())))
+        name, owner = f"node-{i:06d}", OWNERS[int(rng.integers(len(OWNERS)))]
+        seq, ts = self._tick()
+        self.devices.put(name, {
+            "id": f"dev-{i:06d}", "displayName": name.upper(), "operatingSystem": OS[zone],
+            "onPremisesDistinguishedName": f"CN={name.upper()},OU={zone},OU=Computers,DC=corp,DC=local",
+            "extensionAttributes": {"extensionAttribute1": owner},
+        }, seq, ts)
+        self._put_ci(name, {"sys_id": f"{i:032x}", "name": name, "sys_class_name": CLASSES[zone], "u_zone": zone,
+                            "u_criticality": str(int(rng.integers(4, 6) if zone in ("Edge", "T0") else rng.integers(1, 6))),
+                            "support_group": {"display_value": owner}})
+        for _ in range(VULNS_PER_HOST):
+            self._add_vuln(name)
+
+    def _put_ci(self, name: str, ci: dict) -> None:
+        seq, ts = self._tick()
+        self.cis.put(name, {**ci, "sys_updated_on": _snow_field(ts)}, seq, ts)
+
+    def _add_vuln(self, host: str) -> None:
+        rng = self.rng
+        cve = f"CVE-{int(rng.integers(2018, 2026))}-{int(rng.integers(1000, 60000)):05d}"
+        score = round(float(np.clip(rng.normal(7.0, 1.5), 0.1, 10.0)), 1)
+        self._put_vuln(f"{host}_{cve}", {"agent": {"name": host}, "vulnerability": {
+            "id": cve, "score": {"base": score, "vector": f"CVSS:3.1/{rng.choice(AV)}/AC:L/PR:N/UI:N"},
+            "status": "Active"}})
+        if rng.random() < TICKET_SHARE:
+            self.n_issues += 1
+            self._put_issue(f"SEC-{self.n_issues}", {"status": {"name": "To Do"}, "labels": [cve, host],
+                                                     "summary": f"{cve} на {host}"})
+
+    def _put_vuln(self, vid: str, source: dict) -> None:
+        seq, ts = self._tick()
+        source = {**source, "@timestamp": _iso(ts)}
+        self.vulns.put(vid, {"_id": vid, "_source": source, "sort": [round(ts * 1000), vid]}, seq, ts)
+
+    def _put_issue(self, key: str, fields: dict) -> None:
+        seq, ts = self._tick()
+        self.issues.put(key, {"key": key, "fields": {**fields, "updated": _iso(ts)}}, seq, ts)
+
+    def mutate(self, changes: int = 10) -> None:
+        """Random churn: new hosts and findings, fixes, ticket progress, CMDB edits."""
+        rng = self.rng
+        with self.lock:
+            for _ in range(changes):
+                kind = rng.random()
+                if kind < 0.1:
+                    self._add_host()
+                elif kind < 0.4:
+                    self._add_vuln(f"node-{int(rng.integers(self.n_hosts)):06d}")
+                elif kind < 0.6:
+                    ids = self.vulns.ids()
+                    vid = ids[int(rng.integers(len(ids)))]
+                    hit = self.vulns.get(vid)["_source"]
+                    self._put_vuln(vid, {**hit, "vulnerability": {**hit["vulnerability"], "status": "Solved"}})
+                elif kind < 0.85 and self.n_issues:
+                    key = f"SEC-{int(rng.integers(self.n_issues)) + 1}"
+                    fields = self.issues.get(key)["fields"]
+                    status = JIRA_STATUSES[min(JIRA_STATUSES.index(fields["status"]["name"]) + 1, 2)]
+                    self._put_issue(key, {**fields, "status": {"name": status}})
+                else:
+                    name = f"node-{int(rng.integers(self.n_hosts)):06d}"
+                    self._put_ci(name, {**self.cis.get(name), "u_criticality": str(int(rng.integers(1, 6)))})
+
+    # ---------- dialects ----------
+
+    def graph_delta(self, query: dict, page_size: int) -> dict:
+        token = int(query.get("$skiptoken") or query.get("$deltatoken") or 0)
+        with self.lock:
+            rows = self.devices.after_seq(token, page_size)
+            more = len(rows) == page_size and bool(self.devices.after_seq(rows[-1][0], 1))
+            last = rows[-1][0] if rows else token
+            out = {"value": [r for _, _, r in rows]}
+            if more:
+                out["@odata.nextLink"] = "/v1.0/devices/delta?" + urlencode({"$skiptoken": last})
+            else:
+                out["@odata.deltaLink"] = "/v1.0/devices/delta?" + urlencode({"$deltatoken": max(last, token)})
+        return out
+
+    def snow_table(self, query: dict) -> dict:
+        m = re.search(r"sys_updated_on>=(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)", query.get("sysparm_query", ""))
+        since = _parse_utc(m.group(1), "%Y-%m-%d %H:%M:%S") if m else 0.0
+        with self.lock:
+            rows = self.cis.since_ts(since, int(query.get("sysparm_offset", 0)), int(query.get("sysparm_limit", 100)))
+        return {"result": [r for _, _, r in rows]}
+
+    def wazuh_search(self, query: dict) -> dict:
+        after = query.get("search_after", "")
+        ts = int(after.split(",", 1)[0]) / 1000 + 0.0005 if after else 0.0
+        with self.lock:
+            rows = self.vulns.since_ts(ts, 0, int(query.get("size", 100)))
+        return {"hits": {"hits": [r for _, _, r in rows]}}
+
+    def jira_search(self, query: dict) -> dict:
+        m = re.search(r'updated\s*>=\s*"(\d{4}/\d\d/\d\d \d\d:\d\d)"', query.get("jql", ""))
+        since = _parse_utc(m.group(1), "%Y/%m/%d %H:%M") if m else 0.0
+        start, limit = int(query.get("startAt", 0)), int(query.get("maxResults", 50))
+        with self.lock:
+            rows = self.issues.since_ts(since, start, limit)
+        return {"startAt": start, "maxResults": limit, "issues": [r for _, _, r in rows]}
+
+
+ROUTES = {
+    "ad": ("/v1.0/devices/delta", lambda e, q, h: e.graph_delta(q, _page_size(h))),
+    "cmdb": ("/api/now/table/cmdb_ci", lambda e, q, h: e.snow_table(q)),
+    "siem": ("/wazuh-states-vulnerabilities/_search", lambda e, q, h: e.wazuh_search(q)),
+    "itsm": ("/rest/api/2/search", lambda e, q, h: e.jira_search(q)),
+}
+
+
+def _page_size(headers) -> int:
+    m = re.search(r"odata\.maxpagesize=(\d+)", headers.get("Prefer", ""))
+    return int(m.group(1)) if m else 200
+
+
+class StandIn:
+    """One source on 127.0.0.1 with optional rate limit, failures and latency."""
+
+    def __init__(self, estate: Estate, kind: str, port: int = 0, rate: float = 0.0, fail_rate: float = 0.0,
+                 delay: float = 0.0, seed: int = 0):
+        self.estate, self.kind = estate, kind
+        self.rate, self.fail_rate, self.delay = rate, fail_rate, delay
+        self.requests = self.throttled = self.failed = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._tokens, self._stamp = max(rate, 1.0), time.monotonic()
+        route, handle = ROUTES[kind]
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive: клиент держит пул соединений
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != route:
+                    self._send(404, {"error": "not found"})
+                    return
+                status = stand_in._admit()
+                if status != 200:
+                    self._send(status, {"error": "throttled" if status == 429 else "unavailable"})
+                    return
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self._send(200, handle(stand_in.estate, query, self.headers))
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _admit(self) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.requests += 1
+            if self.rate > 0:
+                now = time.monotonic()
+                self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens < 1:
+                    self.throttled += 1
+                    return 429
+                self._tokens -= 1
+            if self.fail_rate and self._rng.random() < self.fail_rate:
+                self.failed += 1
+                return 503
+        return 200
+
+    def start(self) -> "StandIn":
+        threading.Thread(target=self.server.serve_forever, name=f"pks-standin-{self.kind}", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def serve(estate: Estate, churn_s: float = 0.0, **options) -> dict:
+    """Start all four stand-ins (and the churn thread if ``churn_s``) → {kind: StandIn}."""
+    servers = {kind: StandIn(estate, kind, **options).start() for kind in ROUTES}
+    if churn_s > 0:
+        def churn():
+            while True:
+                time.sleep(churn_s)
+                estate.mutate()
+
+        threading.Thread(target=churn, name="pks-standin-churn", daemon=True).start()
+    return servers
+
+
+def spec(servers: dict) -> str:
+    """``PKS_CONNECTORS`` value pointing at ``servers``."""
+    return ",".join(f"{kind}={s.url}" for kind, s in servers.items())
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m pks.standins", description=__doc__.splitlines()[0])
+    ap.add_argument("--hosts", type=int, default=200)
+    ap.add_argument("--churn", type=float, default=5.0, help="секунд между порциями изменений (0 — без изменений)")
+    ap.add_argument("--rate", type=float, default=0.0, help="лимит запросов/с на источник (0 — без лимита)")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 503")
+    ap.add_argument("--delay", type=float, default=0.0, help="задержка ответа, с")
+    args = ap.parse_args(argv)
+    servers = serve(Estate(args.hosts), churn_s=args.churn, rate=args.rate, fail_rate=args.fail_rate, delay=args.delay)
+    print(f"PKS_CONNECTORS={spec(servers)}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
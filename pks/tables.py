@@ -0,0 +1,171 @@
+"""Badge styling and a server-side paged table for large frames.
+
+Only the visible page is styled and sent to the browser, so rendering cost
+depends on the page size rather than on the table size.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pks import metrics
+from pks.model import widen
+from pks.ui import table
+
+# ============================
+# BADGES (priority / status)
+# ============================
+
+PRIO_STYLE = {
+    "P1 (Critical)": "background-color:#E74C3C;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "P2 (High)"    : "background-color:#E67E22;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "P3 (Medium)"  : "background-color:#F1C40F;color:#111;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "P4 (Low)"     : "background-color:#27AE60;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+}
+
+STATUS_STYLE = {
+    "Open": "background-color:#E74C3C;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "In progress": "background-color:#2E86DE;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Done": "background-color:#27AE60;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Blocked": "background-color:#9B59B6;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Mitigated": "background-color:#34495E;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Submitted": "background-color:#2E86DE;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Draft": "background-color:#F1C40F;color:#111;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Yes": "background-color:#27AE60;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "No": "background-color:#E74C3C;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Partially": "background-color:#E67E22;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    # статусы коннекторов (матрица готовности)
+    "OK": "background-color:#27AE60;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Lagging": "background-color:#E67E22;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Error": "background-color:#E74C3C;color:white;font-weight:700;padding:2px 10px;border-radius:999px;",
+    "Pending": "background-color:#F1C40F;color:#111;font-weight:700;padding:2px 10px;border-radius:999px;",
+}
+
+BADGE_COLUMNS = {"priority": PRIO_STYLE, "status": STATUS_STYLE}
+
+PAGE_SIZES = [25, 50, 100, 200]
+# Ниже этого размера таблица отдаётся целиком, без пагинации.
+PAGED_THRESHOLD = 1000
+
+
+def badge_css(values: pd.Series, styles: dict) -> np.ndarray:
+    """CSS per cell for a whole column in one dictionary lookup pass."""
+    codes, uniques = pd.factorize(values)
+    css = np.array([styles.get(u, "") for u in uniques] + [""], dtype=object)
+    return css[codes]  # код -1 (NaN) → последний элемент ""
+
+
+def styled_df(df: pd.DataFrame):
+    with metrics.span("build", "styled_df", len(df)):
+        df = widen(df)
+        sty = df.style
+        for col, styles in BADGE_COLUMNS.items():
+            if col in df.columns:
+                sty = sty.apply(lambda s, styles=styles: badge_css(s, styles), subset=[col])
+    return sty
+
+
+# ============================
+# SERVER-SIDE PAGING
+# ============================
+
+def _sort_keys(values: pd.Series, ascending: bool) -> np.ndarray:
+    """Numeric sort keys; NaN/None always sorts last."""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        keys = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        codes, _ = pd.factorize(values, sort=True)
+        keys = codes.astype(np.float64)
+        keys[codes < 0] = np.nan
+    if not ascending:
+        keys = -keys
+    keys[np.isnan(keys)] = np.inf
+    return keys
+
+
+def page_positions(values: pd.Series, ascending: bool, start: int, stop: int) -> np.ndarray:
+    """Row positions of sorted[start:stop] without fully sorting when possible."""
+    keys = _sort_keys(values, ascending)
+    n = len(keys)
+    stop = min(stop, n)
+    if stop <= start:
+        return np.empty(0, dtype=np.intp)
+    if stop < n // 8:
+        # Первые страницы: O(n) partition + сортировка только k элементов;
+        # равные ключи на границе берутся по позиции, как при stable-сортировке.
+        kth = np.partition(keys, stop - 1)[stop - 1]
+        less = np.flatnonzero(keys < kth)
+        less = less[np.argsort(keys[less], kind="stable")]
+        ties = np.flatnonzero(keys == kth)[: stop - len(less)]
+        return np.concatenate([less, ties])[start:stop]
+    return np.argsort(keys, kind="stable")[start:stop]
+
+
+def filter_mask(df: pd.DataFrame, query: str, rows=None) -> np.ndarray:
+    """Case-insensitive substring match over text columns (of ``rows`` only, if given)."""
+    mask = np.zeros(len(df) if rows is None else len(rows), dtype=bool)
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # Категории проверяются один раз, строки — по кодам
+            hit = s.cat.categories.astype(str).str.contains(query, case=False, regex=False)
+            codes = s.cat.codes.to_numpy()
+            mask |= np.append(hit, False)[codes if rows is None else codes[rows]]
+            continue
+        if pd.api.types.is_numeric_dtype(s):
+            continue
+        s = s if rows is None else s.iloc[rows]
+        mask |= s.astype(str).str.contains(query, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def _matching(df: pd.DataFrame, query: str, rows=None) -> np.ndarray:
+    mask = filter_mask(df, query, rows)
+    return np.flatnonzero(mask) if rows is None else np.asarray(rows)[mask]
+
+
+def page_frame(df: pd.DataFrame, sort_by=None, ascending: bool = True, query: str = "",
+               page: int = 0, page_size: int = 50, rows=None):
+    """Slice one page (after optional filter/sort) → (page_df, total_rows).
+
+    ``rows`` restricts ``df`` to these positions; only the page itself is copied out.
+    """
+    if query:
+        rows = _matching(df, query, rows)
+    total = len(df) if rows is None else len(rows)
+    start, stop = page * page_size, (page + 1) * page_size
+    if sort_by:
+        values = df[sort_by] if rows is None else df[sort_by].iloc[rows]
+        pos = page_positions(values, ascending, start, stop)
+    else:
+        pos = np.arange(start, min(stop, total))
+    return df.iloc[pos if rows is None else np.asarray(rows)[pos]], total
+
+
+def paged_df(df: pd.DataFrame, key: str, sort_by=None, ascending: bool = True, rows=None) -> None:
+    """Render ``df`` (or its ``rows`` positions) as a server-side sorted/filtered/paged, badge-styled table."""
+    total = len(df) if rows is None else len(rows)
+    if total <= PAGED_THRESHOLD:
+        if rows is not None:
+            df = df.iloc[rows]
+        if sort_by:
+            df = df.sort_values(sort_by, ascending=ascending)
+        table(styled_df(df), key, width="stretch")
+        return
+
+    cols = list(df.columns)
+    c1, c2, c3, c4 = st.columns([2, 1, 3, 1])
+    sort_col = c1.selectbox("Сортировка", cols, index=cols.index(sort_by) if sort_by in cols else 0, key=f"{key}_sort")
+    asc = c2.toggle("По возрастанию", value=ascending, key=f"{key}_asc")
+    query = c3.text_input("Поиск", "", key=f"{key}_q")
+    size = c4.selectbox("Строк", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    # Сначала фильтр: число страниц зависит от него. Строки остаются позициями в df.
+    if query:
+        rows = _matching(df, query, rows)
+    pages = max(((len(df) if rows is None else len(rows)) - 1) // size + 1, 1)
+    page = st.number_input("Страница", 1, pages, 1, key=f"{key}_page") - 1
+    part, total = page_frame(df, sort_col, asc, "", min(page, pages - 1), size, rows)
+
+    table(styled_df(part), key, width="stretch")
+    first = page * size + 1 if total else 0
+    st.caption(f"Строки {first}–{page * size + len(part)} из {total:,}".replace(",", " "))
@@ -0,0 +1,182 @@
+"""Shared remediation-task store: SQLite (WAL) with indexes and a change log.
+
+One database file serves every Streamlit session of the process (and other
+processes on the node).  Inserts and status updates touch a constant number of
+B-tree pages; the UI reads one page of tasks at a time and polls ``last_seq()``
+to notice changes made by other analysts, then tails the log with
+``changes_since()``.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+TASK_COLUMNS = ["task_id", "title", "priority", "owner", "status", "due", "linked"]
+STATUSES = ["Open", "In progress", "Done", "Blocked"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id        INTEGER PRIMARY KEY,
+    task_id   TEXT NOT NULL UNIQUE,
+    title     TEXT NOT NULL,
+    priority  TEXT NOT NULL,
+    owner     TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    due       TEXT,
+    linked    TEXT,
+    updated   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status   ON tasks(status, id);
+CREATE INDEX IF NOT EXISTS tasks_owner    ON tasks(owner, id);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks(priority, id);
+CREATE TABLE IF NOT EXISTS task_log (
+    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id  TEXT NOT NULL,
+    field    TEXT NOT NULL,
+    old      TEXT,
+    new      TEXT,
+    ts       REAL NOT NULL
+);
+"""
+
+DEMO_TASKS = [
+    {"task_id":"T-1001","title":"Патч VPN-шлюза","priority":"P1 (Critical)","owner":"NetSec","status":"Open","due":"7 дней","linked":"gw-vpn-01 / CVE-2024-1111"},
+    {"task_id":"T-1002","title":"Hardening CI и секреты","priority":"P2 (High)","owner":"DevOps","status":"In progress","due":"14 дней","linked":"srv-git-01 / CVE-2023-2222"},
+    {"task_id":"T-1003","title":"Сегментация доступа к БД","priority":"P1 (Critical)","owner":"Product","status":"Open","due":"10 дней","linked":"srv-db-01 / CVE-2023-2222"},
+]
+
+FILTERS = ("status", "owner", "priority")
+
+
+class TaskStore:
+    def __init__(self, path, seed=DEMO_TASKS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        con = self._con()
+        con.executescript(SCHEMA)
+        if seed and con.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None:
+            for t in seed:
+                self._insert(con, t)
+
+    def _con(self) -> sqlite3.Connection:
+        # Отдельное соединение на поток: Streamlit обслуживает сессии в разных потоках.
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    # ---------- writes ----------
+
+    def _insert(self, con, task: dict) -> str:
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            task_id = task.get("task_id")
+            if not task_id:
+                # MAX(id) по rowid — O(log n), без сканирования.
+                nxt = con.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+                task_id = f"T-{1000 + nxt}"
+            con.execute(
+                "INSERT INTO tasks(task_id, title, priority, owner, status, due, linked, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (task_id, task["title"], task["priority"], task["owner"], task.get("status", "Open"),
+                 task.get("due"), task.get("linked"), now),
+            )
+            con.execute("INSERT INTO task_log(task_id, field, old, new, ts) VALUES (?, 'created', NULL, ?, ?)",
+                        (task_id, task.get("status", "Open"), now))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return task_id
+
+    def add(self, title: str, priority: str, owner: str, due: str, linked: str, status: str = "Open") -> str:
+        """Insert a task and return its generated ``task_id``."""
+        return self._insert(self._con(), {"title": title, "priority": priority, "owner": owner,
+                                          "due": due, "linked": linked, "status": status})
+
+    def set_status(self, task_id: str, status: str) -> bool:
+        """Change one task's status; returns False if the task does not exist."""
+        con = self._con()
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT status FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                con.execute("ROLLBACK")
+                return False
+            if row[0] != status:
+                con.execute("UPDATE tasks SET status = ?, updated = ? WHERE task_id = ?", (status, now, task_id))
+                con.execute("INSERT INTO task_log(task_id, field, old, new, ts) VALUES (?, 'status', ?, ?, ?)",
+                            (task_id, row[0], status, now))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return True
+
+    # ---------- reads ----------
+
+    def _where(self, filters: dict):
+        parts, args = [], []
+        for col in FILTERS:
+            value = filters.get(col)
+            if value is not None:
+                parts.append(f"{col} = ?")
+                args.append(value)
+        return (" WHERE " + " AND ".join(parts) if parts else ""), args
+
+    def count(self, **filters) -> int:
+        where, args = self._where(filters)
+        return self._con().execute(f"SELECT COUNT(*) FROM tasks{where}", args).fetchone()[0]
+
+    def page(self, offset: int = 0, limit: int = 50, **filters) -> pd.DataFrame:
+        """One page of tasks (newest first) using the matching index."""
+        where, args = self._where(filters)
+        rows = self._con().execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            [*args, limit, offset],
+        ).fetchall()
+        return pd.DataFrame(rows, columns=TASK_COLUMNS)
+
+    def chunks(self, chunk_rows: int = 100_000):
+        """All tasks as ``(total, iterator of frames)``; keyset pages by id, one chunk in memory at a time."""
+        total = self.count()
+
+        def pages():
+            last = 0
+            while True:
+                rows = self._con().execute(
+                    f"SELECT id, {', '.join(TASK_COLUMNS)} FROM tasks WHERE id > ? ORDER BY id LIMIT ?",
+                    (last, chunk_rows),
+                ).fetchall()
+                yield pd.DataFrame([r[1:] for r in rows], columns=TASK_COLUMNS)
+                if len(rows) < chunk_rows:
+                    return
+                last = rows[-1][0]
+
+        return total, pages()
+
+    def last_seq(self) -> int:
+        """Sequence number of the latest change (cheap change detection for other sessions)."""
+        return self._con().execute("SELECT COALESCE(MAX(seq), 0) FROM task_log").fetchone()[0]
+
+    def changes_since(self, seq: int, limit: int = 500) -> pd.DataFrame:
+        """Log entries after ``seq``, newest first (at most ``limit``; the seq index, no scan)."""
+        rows = self._con().execute(
+            "SELECT seq, task_id, field, old, new, ts FROM task_log WHERE seq > ? ORDER BY seq DESC LIMIT ?",
+            (seq, limit),
+        ).fetchall()
+        return _log_frame(rows)
+
+
+def _log_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["seq", "task_id", "field", "old", "new", "ts"])
+    df["ts"] = pd.to_datetime(df["ts"], unit="s")
+    return df
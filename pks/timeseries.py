@@ -0,0 +1,219 @@
+"""Risk-index time series: raw points plus incrementally maintained rollups.
+
+Every append writes the raw point and folds it into hourly/daily/weekly
+min/max/sum/count buckets (UTC-aligned, weeks start on Monday) in the same transaction (SQLite upserts), so a
+chart over any range reads at most ``max_points`` pre-aggregated rows from
+the coarsest-sufficient level instead of scanning raw points.  Trend deltas
+(``delta``) are two indexed point lookups.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+HOUR, DAY, WEEK = 3600, 86400, 7 * 86400
+LEVELS = {"hour": HOUR, "day": DAY, "week": WEEK}
+MONDAY = 4 * DAY  # 1970-01-01 — четверг; недели выравниваются по понедельнику
+MAX_POINTS = 400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    series   TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    value    REAL NOT NULL,
+    version  TEXT,
+    PRIMARY KEY (series, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    level    TEXT NOT NULL,
+    series   TEXT NOT NULL,
+    bucket   INTEGER NOT NULL,
+    n        INTEGER NOT NULL,
+    sum      REAL NOT NULL,
+    min      REAL NOT NULL,
+    max      REAL NOT NULL,
+    PRIMARY KEY (level, series, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key      TEXT PRIMARY KEY,
+    value    TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Разметка бакетов; хранилища со старой (по локальному смещению узла) пересобираются из точек
+BUCKETS = "utc"
+REBUILD_ROWS = 50_000
+
+UPSERT = """
+INSERT INTO rollups(level, series, bucket, n, sum, min, max) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(level, series, bucket) DO UPDATE SET
+    n = n + excluded.n, sum = sum + excluded.sum,
+    min = MIN(min, excluded.min), max = MAX(max, excluded.max)
+"""
+
+SERIES_COLUMNS = ["date", "value", "min", "max", "n"]
+
+
+class RiskSeries:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        con = self._con()
+        con.executescript(SCHEMA)
+        self._migrate(con)
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    @staticmethod
+    def _bucket(ts, size: int):
+        # Бакеты — в UTC: границы не зависят от пояса узла и перехода на летнее время
+        shift = MONDAY if size == WEEK else 0
+        return (ts - shift) // size * size + shift
+
+    def _migrate(self, con) -> None:
+        """Rebuild rollups from raw points when they were bucketed differently."""
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = 'buckets'").fetchone()
+            if row is None or row[0] != BUCKETS:
+                con.execute("DELETE FROM rollups")
+                cur = con.execute("SELECT series, ts, value, version FROM points")
+                while chunk := cur.fetchmany(REBUILD_ROWS):
+                    self._fold(con, chunk)
+                con.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('buckets', ?)", (BUCKETS,))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    # ---------- writes ----------
+
+    def _write(self, con, points: list) -> None:
+        """Insert raw points ``(series, ts, value, version)`` and fold them into every rollup level."""
+        con.executemany("INSERT OR REPLACE INTO points(series, ts, value, version) VALUES (?, ?, ?, ?)", points)
+        self._fold(con, points)
+
+    def _fold(self, con, points) -> None:
+        for level, size in LEVELS.items():
+            agg = {}
+            for series, ts, value, _ in points:
+                key = (series, int(self._bucket(int(ts), size)))
+                a = agg.get(key)
+                agg[key] = [1, value, value, value] if a is None else \
+                    [a[0] + 1, a[1] + value, min(a[2], value), max(a[3], value)]
+            con.executemany(UPSERT, ((level, *key, *a) for key, a in agg.items()))
+
+    def append(self, values: dict, ts: float = None, version: str = None) -> bool:
+        """Append one value per series at ``ts``; a repeated ``version`` is ignored."""
+        if not values:
+            return False
+        ts = time.time() if ts is None else ts
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if version is not None and self._last_version(con) == version:
+                con.execute("ROLLBACK")
+                return False
+            self._write(con, [(name, float(ts), float(v), version) for name, v in values.items()])
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return True
+
+    def backfill(self, frame: pd.DataFrame, series: str = "index", column: str = "risk_index") -> int:
+        """Seed history from a ``date``/``column`` frame when ``series`` has no points yet."""
+        if frame is None or frame.empty:
+            return 0
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if con.execute("SELECT 1 FROM points WHERE series = ? LIMIT 1", (series,)).fetchone():
+                con.execute("ROLLBACK")
+                return 0
+            # Наивные даты — полночь UTC (как и бакеты)
+            stamps = pd.to_datetime(frame["date"])
+            stamps = stamps.dt.tz_localize("UTC") if stamps.dt.tz is None else stamps.dt.tz_convert("UTC")
+            points = [(series, d.timestamp(), float(v), None)
+                      for d, v in zip(stamps, frame[column]) if pd.notna(v)]
+            self._write(con, points)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return len(points)
+
+    def _last_version(self, con):
+        row = con.execute("SELECT version FROM points WHERE series = 'index' ORDER BY ts DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    # ---------- reads ----------
+
+    def series(self, prefix: str = "") -> list:
+        """Known series names starting with ``prefix`` (range scan over the weekly rollup)."""
+        rows = self._con().execute(
+            "SELECT DISTINCT series FROM rollups WHERE level = 'week' AND series >= ? AND series < ? ORDER BY series",
+            (prefix, prefix + "\U0010ffff"))
+        return [r[0] for r in rows]
+
+    def bounds(self, series: str):
+        """(first ts, last ts) of ``series`` or None."""
+        row = self._con().execute("SELECT MIN(ts), MAX(ts) FROM points WHERE series = ?", (series,)).fetchone()
+        return None if row[0] is None else (row[0], row[1])
+
+    def level_for(self, series: str, start: float, end: float, max_points: int = MAX_POINTS) -> str:
+        """Finest level that fits ``max_points`` over [start, end]: "raw" | "hour" | "day" | "week"."""
+        span = max(end - start, 1.0)
+        if span / HOUR <= max_points:
+            n = self._con().execute(
+                "SELECT COALESCE(SUM(n), 0) FROM rollups WHERE level = 'hour' AND series = ? AND bucket BETWEEN ? AND ?",
+                (series, int(self._bucket(start, HOUR)), int(end))).fetchone()[0]
+            if n <= max_points:
+                return "raw"
+        for level, size in LEVELS.items():
+            if span / size <= max_points:
+                return level
+        return "week"
+
+    def query(self, series: str, start: float = None, end: float = None, max_points: int = MAX_POINTS):
+        """Points of ``series`` over [start, end] → (frame ``SERIES_COLUMNS``, level)."""
+        b = self.bounds(series)
+        if b is None:
+            return pd.DataFrame(columns=SERIES_COLUMNS), "raw"
+        start = b[0] if start is None else max(start, b[0])
+        end = b[1] if end is None else min(end, b[1])
+        level = self.level_for(series, start, end, max_points)
+        con = self._con()
+        if level == "raw":
+            rows = con.execute("SELECT ts, value, value, value, 1 FROM points WHERE series = ? AND ts BETWEEN ? AND ? "
+                               "ORDER BY ts", (series, start, end)).fetchall()
+        else:
+            rows = con.execute("SELECT bucket, sum / n, min, max, n FROM rollups WHERE level = ? AND series = ? "
+                               "AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                               (level, series, int(self._bucket(start, LEVELS[level])), int(end))).fetchall()
+        df = pd.DataFrame(rows, columns=SERIES_COLUMNS)
+        df["date"] = pd.to_datetime(df["date"], unit="s")  # UTC, как и бакеты
+        return df, level
+
+    def value_at(self, series: str, ts: float = None):
+        """Last value of ``series`` at or before ``ts`` (None if there is none)."""
+        ts = time.time() if ts is None else ts
+        row = self._con().execute("SELECT value FROM points WHERE series = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                                  (series, ts)).fetchone()
+        return row[0] if row else None
+
+    def delta(self, series: str, days: float, at: float = None):
+        """Change of ``series`` over ``days`` ending at ``at`` (None without history)."""
+        at = time.time() if at is None else at
+        now, past = self.value_at(series, at), self.value_at(series, at - days * DAY)
+        return None if now is None or past is None else now - past
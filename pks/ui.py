@@ -0,0 +1,260 @@
+"""Shared UI helpers: theme, section containers and small chart shortcuts.
+
+``section``, ``donut``, ``chart``, ``table`` and ``fragment`` are the
+instrumented entry points (see ``pks.metrics``): on a traced rerun each one
+records its wall time, rows and bytes sent.  ``export_panel`` drives the
+background exports of :mod:`pks.export`.
+"""
+import functools
+import json
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+import streamlit as st
+
+from pks import metrics
+from pks.export import FORMATS, TABLE_FORMATS
+from pks.model import widen
+
+# ============================
+# GLOBAL STYLE / THEME
+# ============================
+
+PALETTE = [
+    "#2E86DE",  # blue
+    "#E74C3C",  # red
+    "#F1C40F",  # yellow
+    "#27AE60",  # green
+    "#9B59B6",  # purple
+    "#E67E22",  # orange
+    "#16A085",  # teal
+    "#34495E",  # dark gray
+]
+
+
+THEMES = {
+    "Светлая": "plotly_white",
+    "Тёмная": "plotly_dark",
+}
+
+# ============================
+# STREAMLIT UI THEMES
+# ============================
+STREAMLIT_UI = {
+    "Светлая": {
+        "bg": "#FFFFFF",
+        "fg": "#111827",
+        "card": "#F8FAFC",
+        "border": "rgba(17,24,39,0.12)",
+        "sidebar": "#F3F4F6",
+    },
+    "Тёмная": {
+        "bg": "#0E1117",
+        "fg": "#E5E7EB",
+        "card": "#111827",
+        "border": "rgba(229,231,235,0.14)",
+        "sidebar": "#0B1220",
+    },
+}
+
+@lru_cache(maxsize=None)
+def _theme_css(theme_choice: str) -> str:
+    ui = STREAMLIT_UI.get(theme_choice, STREAMLIT_UI["Светлая"])
+    return f"""
+<style>
+/* Page */
+.stApp {{
+  background: {ui['bg']};
+  color: {ui['fg']};
+}}
+
+/* Sidebar */
+section[data-testid="stSidebar"] > div {{
+  background: {ui['sidebar']};
+}}
+
+/* Containers / cards */
+div[data-testid="stVerticalBlockBorderWrapper"] {{
+  border-color: {ui['border']} !important;
+  background: {ui['card']} !important;
+}}
+
+/* Metric cards */
+div[data-testid="stMetric"] {{
+  background: {ui['card']};
+  border: 1px solid {ui['border']};
+  border-radius: 12px;
+  padding: 10px 12px;
+}}
+
+/* Tables */
+div[data-testid="stDataFrame"] {{
+  border: 1px solid {ui['border']};
+  border-radius: 12px;
+  overflow: hidden;
+}}
+
+</style>
+        """
+
+
+def apply_ui_theme(theme_choice: str) -> None:
+    """Apply Plotly template + lightweight Streamlit UI CSS theme.
+
+    The CSS string is built once per theme and Plotly defaults are touched
+    only when the theme changes; fragment reruns skip this entirely.
+    """
+    tpl = THEMES.get(theme_choice, "plotly_white")
+    if pio.templates.default != tpl or px.defaults.template != tpl:
+        px.defaults.template = tpl
+        px.defaults.color_discrete_sequence = PALETTE
+        pio.templates.default = tpl
+    # CSS — элемент страницы: при полном rerun его нужно отправить снова, иначе он исчезнет
+    st.markdown(_theme_css(theme_choice), unsafe_allow_html=True)
+
+def donut(df, names, values, title):
+    with metrics.span("build", "donut", len(df)):
+        fig = px.pie(df, names=names, values=values, hole=0.55, title=title)
+        fig.update_traces(textposition="inside", textinfo="percent+label")
+        fig.update_layout(legend_title_text="", template=px.defaults.template)
+    return fig
+
+
+class section:
+    """``with section("Title", "🔥"):`` — bordered container, timed as one span."""
+
+    def __init__(self, title, icon=""):
+        self.title = title
+        self.box = st.container(border=True)
+        with self.box:
+            st.markdown(f"### {icon} {title}")
+
+    def __enter__(self):
+        self._span = metrics.span("section", self.title)
+        self._span.__enter__()
+        return self.box.__enter__()
+
+    def __exit__(self, *exc):
+        suppress = self.box.__exit__(*exc)
+        self._span.__exit__(*exc)
+        return suppress
+
+
+def _title(fig) -> str:
+    return fig.layout.title.text or "chart"
+
+
+def chart(fig, name: str = None, target=st, **kwargs):
+    """``st.plotly_chart`` (or ``target.plotly_chart``) with the Plotly serialization timed."""
+    with metrics.span("chart", name or _title(fig)):
+        return target.plotly_chart(fig, **kwargs)
+
+
+def table(data, name: str = "table", target=st, **kwargs):
+    """``st.dataframe`` (or ``target.dataframe``) timed, with the row count recorded."""
+    rows = len(getattr(data, "data", data))  # Styler → исходный фрейм
+    if isinstance(data, pd.DataFrame):
+        data = widen(data)
+    with metrics.span("table", name, rows):
+        return target.dataframe(data, **kwargs)
+
+
+def fragment(fn=None, *, run_every=None):
+    """``st.fragment`` whose standalone reruns are traced like full reruns."""
+    if fn is None:
+        return functools.partial(fragment, run_every=run_every)
+    name = fn.__name__.lstrip("_")
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        if metrics.in_full_rerun():  # часть полного rerun: только спан (no-op вне выборки)
+            with metrics.span("fragment", name):
+                return fn(*args, **kwargs)
+        state = st.session_state
+        trace = metrics.REGISTRY.begin(state.get("page", ""), kind="fragment", force=state.get("diagnostics", False))
+        try:
+            with metrics.span("fragment", name):
+                return fn(*args, **kwargs)
+        finally:
+            metrics.REGISTRY.end(trace)
+
+    return st.fragment(run, run_every=run_every)
+
+
+def diagnostics(box, trace) -> None:
+    """Sidebar panel: spans of the last traced rerun, page percentiles, exports."""
+    with box.expander("Диагностика", expanded=True):
+        if trace is None:
+            st.caption("Rerun не попал в выборку.")
+            return
+        st.caption(f"Rerun: {trace.ms:.0f} мс · отправлено {trace.bytes / 1024:,.0f} КБ".replace(",", " "))
+        top = sorted(trace.elements.items(), key=lambda kv: -kv[1])[:3]
+        if top:
+            st.caption(" · ".join(f"{el}: {n / 1024:,.0f} КБ" for el, n in top).replace(",", " "))
+        pct = metrics.REGISTRY.percentiles(trace.page)
+        if pct:
+            st.caption(f"Раздел за {pct['n']} reruns: p50 {pct['p50']:.0f} мс · p95 {pct['p95']:.0f} мс")
+        st.dataframe(metrics.spans_frame(trace), hide_index=True, width="stretch")
+        c1, c2 = st.columns(2)
+        c1.download_button("Prometheus", metrics.REGISTRY.to_prometheus(), "pks-metrics.prom", "text/plain")
+        c2.download_button("JSON", json.dumps(metrics.REGISTRY.to_json(), ensure_ascii=False),
+                           "pks-metrics.json", "application/json")
+
+
+# ============================
+# EXPORT
+# ============================
+
+EXPORT_POLL_S = 1.0
+
+
+def _export_body(exporter, name: str, version: str, source, formats) -> bool:
+    """One column per format: start button, progress or download. True while a job is running."""
+    running = False
+    for col, fmt in zip(st.columns(len(formats)), formats):
+        label, mime = FORMATS[fmt]
+        job = exporter.job(name, fmt, version)
+        if job is not None and job.active:
+            running = True
+            text = f"{label}: {job.done:,} из {job.total:,} строк".replace(",", " ") if job.total else f"{label}: в очереди"
+            col.progress(job.progress, text=text)
+        elif job is not None and job.state == "done":
+            # Файл читается только по нажатию, а не на каждом rerun
+            col.download_button(f"Скачать {label}", job.path.read_bytes, file_name=job.file_name, mime=mime,
+                                key=f"export_{name}_{fmt}_dl", on_click="ignore")
+            size = job.path.stat().st_size if job.path.exists() else 0
+            size = f"{size / 1e6:.1f} МБ" if size >= 1e6 else f"{size / 1e3:.0f} КБ"
+            col.caption(f"{size} · {datetime.fromtimestamp(job.finished):%d.%m %H:%M}")
+        else:
+            if col.button(f"Сформировать {label}", key=f"export_{name}_{fmt}"):
+                exporter.submit(name, fmt, version, source)
+                st.rerun()  # полный rerun переключает панель на опрос прогресса
+            if job is not None and job.state == "error":
+                col.caption(f"⚠️ {job.error}")
+    return running
+
+
+@fragment
+def _export_idle(exporter, name, version, source, formats) -> None:
+    _export_body(exporter, name, version, source, formats)
+
+
+@fragment(run_every=EXPORT_POLL_S)
+def _export_running(exporter, name, version, source, formats) -> None:
+    if not _export_body(exporter, name, version, source, formats):
+        st.rerun()  # всё готово — возвращаемся к панели без опроса
+
+
+def export_panel(exporter, name: str, version: str, source, formats=TABLE_FORMATS) -> None:
+    """Background export of ``source`` (see :mod:`pks.export`); finished files are reused while ``version`` holds.
+
+    Progress is polled by a ``run_every`` fragment only while a job is running.
+    """
+    jobs = (exporter.job(name, fmt, version) for fmt in formats)
+    if any(job is not None and job.active for job in jobs):
+        _export_running(exporter, name, version, source, formats)
+    else:
+        _export_idle(exporter, name, version, source, formats)
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from pks.data import compute_risks, synthetic_data
+
+FINDINGS = 3_000
+
+
+@pytest.fixture(scope="session")
+def estate():
+    """Synthetic (assets, vulns) with plain object/float64 columns, as a source delivers them."""
+    assets, vulns, _, _ = synthetic_data(FINDINGS, seed=7)
+    return assets, vulns
+
+
+@pytest.fixture(scope="session")
+def risks(estate):
+    """Scored, compacted findings in score order, as ``Dataset.risks``."""
+    assets, vulns = estate
+    return compute_risks(assets, vulns)
+
+
+def edited(vulns: pd.DataFrame, drop: int = 30, close: int = 40, add: int = 10) -> pd.DataFrame:
+    """Next version of ``vulns``: ``drop`` findings gone, ``close`` mitigated, ``add`` new ones."""
+    out = vulns.iloc[drop:].copy()
+    out.loc[out.index[:close], "status"] = "Mitigated"
+    new = vulns.iloc[:add].assign(cve=[f"CVE-2099-{i:05d}" for i in range(add)])
+    return pd.concat([out, new], ignore_index=True)
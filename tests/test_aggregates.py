@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pks.aggregates import DIMENSIONS, Aggregates
+from pks.data import compute_risks
+
+from conftest import edited
+
+
+def _counts(risks, assets, dim):
+    values = risks["asset_id"].astype(object).map(assets.set_index("asset_id")["zone"]) if dim == "zone" \
+        else risks[dim].astype(object)
+    out = values.value_counts().rename_axis(dim).reset_index(name="count")
+    return out.sort_values(dim, ignore_index=True)
+
+
+def _check(agg, risks, assets):
+    for dim in DIMENSIONS:
+        pd.testing.assert_frame_equal(agg.counts(dim).astype({dim: object}), _counts(risks, assets, dim),
+                                      check_dtype=False)
+    is_open = (risks["status"] == "Open").to_numpy()
+    assert agg.kpis() == {
+        "open_vulns": int(is_open.sum()),
+        "p1": int((risks["priority"] == "P1 (Critical)").sum()),
+        "p2": int((risks["priority"] == "P2 (High)").sum()),
+        "loss": int(round(risks["loss_max"].to_numpy(np.float64)[is_open].sum())),
+    }
+    top = risks["risk_score"].iloc[agg.top_rows(10)].to_numpy()
+    np.testing.assert_array_equal(top, np.sort(risks["risk_score"].to_numpy())[::-1][:10])
+
+
+def test_rebuild(estate, risks):
+    assets, _ = estate
+    agg = Aggregates()
+    agg.sync(risks, assets, token="v1")
+    _check(agg, risks, assets)
+    assert agg.sync(risks, assets, token="v1") == {}  # та же версия — без работы
+
+
+def test_incremental_sync_matches_rebuild(estate, risks):
+    assets, vulns = estate
+    agg = Aggregates()
+    agg.sync(risks, assets, token="v1")
+    nxt = compute_risks(assets, edited(vulns))
+    stats = agg.sync(nxt, assets, token="v2")
+    assert "rebuilt" not in stats
+    assert (stats["added"], stats["removed"]) == (10, 30)
+    _check(agg, nxt, assets)
+
+
+def test_upsert_and_remove(estate, risks):
+    assets, _ = estate
+    agg = Aggregates()
+    agg.sync(risks, assets, token="v1")
+    before = agg.kpis()
+    agg.upsert("CVE-2099-00001", "host-0000000", "P1 (Critical)", "Open", "Network", "Edge", 120, 99.0)
+    assert agg.kpis() == {**before, "open_vulns": before["open_vulns"] + 1, "p1": before["p1"] + 1,
+                          "loss": before["loss"] + 120}
+    assert agg.top(1).tolist() == [len(risks)]  # новая находка — вне фрейма, но первая в ТОПе
+    assert agg.remove("CVE-2099-00001", "host-0000000")
+    assert not agg.remove("CVE-2099-00001", "host-0000000")
+    assert agg.kpis() == before
+
+
+@pytest.mark.parametrize("k", [1, 5, 300])
+def test_top_beyond_candidates(estate, risks, k):
+    assets, _ = estate
+    agg = Aggregates()
+    agg.sync(risks, assets)
+    top = risks["risk_score"].iloc[agg.top_rows(k)].to_numpy()
+    np.testing.assert_array_equal(top, np.sort(risks["risk_score"].to_numpy())[::-1][:k])
@@ -0,0 +1,44 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from pks import catalog
+from pks.catalog import Catalog
+
+
+def _feed(path, items):
+    path.write_text(json.dumps({"vulnerabilities": [
+        {"cve": {"id": cve, "lastModified": modified,
+                 "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "vectorString": "AV:N"}}]}}}
+        for cve, score, modified in items]}), encoding="utf-8")
+    return path
+
+
+def test_import_lookup_and_version(tmp_path):
+    cat = Catalog(tmp_path / "catalog.db")
+    assert cat.version() == 0
+    assert cat.import_nvd(_feed(tmp_path / "nvd.json", [("CVE-2026-0001", 9.8, "2026-03-01"),
+                                                         ("CVE-2026-0002", 5.0, "2026-03-01")])) == 2
+    assert cat.import_nvd(_feed(tmp_path / "old.json", [("CVE-2026-0001", 1.0, "2026-01-01")])) == 1
+    assert cat.version() == 2
+    assert cat.lookup("cve-2026-0001")["cvss"].tolist() == [9.8]  # старая запись не перезаписала новую
+    assert cat.counts()["nvd"] == 2
+
+
+def test_connection_per_thread_and_rollback(tmp_path, monkeypatch):
+    cat = Catalog(tmp_path / "catalog.db")
+    assert cat._con() is cat._con()
+    other = []
+    t = threading.Thread(target=lambda: other.append(cat._con()))
+    t.start()
+    t.join()
+    assert other[0] is not cat._con()
+
+    monkeypatch.setattr(catalog, "iter_nvd", lambda path: iter([("CVE-1", 1.0, None, None, None, None),
+                                                               ("CVE-2", 2.0, None, None, None, None, "лишнее")]))
+    with pytest.raises(sqlite3.ProgrammingError):  # неверное число полей
+        cat.import_nvd("broken.json")
+    assert not cat._con().in_transaction  # пачка откатена, соединение пригодно
+    assert cat.counts()["nvd"] == 0
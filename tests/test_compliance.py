@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from pks.compliance import CONTROL_SCOPES, Coverage, frames
+
+
+def _fresh(maturity: dict) -> Coverage:
+    reqs, controls, req_map = frames()
+    controls["maturity"] = controls["control_id"].map(maturity).fillna(controls["maturity"])
+    return Coverage(reqs, controls, req_map, CONTROL_SCOPES)
+
+
+def _same(engine, fresh, links):
+    pd.testing.assert_frame_equal(engine.requirements(links), fresh.requirements(links))
+    pd.testing.assert_frame_equal(engine.status_counts(), fresh.status_counts())
+    for fw in engine.frameworks:
+        pd.testing.assert_frame_equal(engine.status_counts(fw), fresh.status_counts(fw))
+    pd.testing.assert_frame_equal(engine.by_framework(links), fresh.by_framework(links))
+    pd.testing.assert_frame_equal(engine.by_control(links), fresh.by_control(links), check_dtype=False)
+
+
+@pytest.fixture
+def links(estate, risks):
+    assets, _ = estate
+    return Coverage().link(risks, assets)
+
+
+def test_set_maturity_matches_fresh_engine(links):
+    engine, applied = Coverage(), {}
+    for control_id, maturity in [("C-03", 3), ("C-01", 5), ("C-03", 0), ("C-02", 2), ("C-05", 4)]:
+        touched = engine.set_maturity(control_id, maturity)
+        applied[control_id] = maturity
+        _same(engine, _fresh(applied), links)
+        assert touched == len(frames()[2].query("control_id == @control_id"))
+
+
+def test_set_maturity_moves_status(links):
+    engine = Coverage()
+    before = engine.requirements(links).set_index("req_id")
+    assert before.loc["A.12.6", "status"] == "Partially"
+    engine.set_maturity("C-03", 3)
+    after = engine.requirements(links).set_index("req_id")
+    assert after.loc["A.12.6", "status"] == "Yes"
+    assert after.loc["A.12.6", "gap_risks"] == 0
+    assert engine.set_maturity("C-05", 5) == 0  # мера без требований — пересчитывать нечего
@@ -0,0 +1,125 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from pks import standins
+from pks.connectors import Batch, ConnectorConfig, Scheduler, ServiceNowCmdb, WatermarkConnector
+
+HOSTS = 120
+
+
+@pytest.fixture
+def estate():
+    return standins.Estate(HOSTS, seed=1)
+
+
+@pytest.fixture
+def servers(estate):
+    running = {}
+
+    def start(**options):
+        running.update(standins.serve(estate, **options))
+        return running
+
+    yield start
+    for server in running.values():
+        server.stop()
+
+
+def _sync(tmp_path, servers, kinds=None):
+    kinds = kinds or list(servers)
+    scheduler = Scheduler.from_spec(standins.spec({k: servers[k] for k in kinds}), tmp_path / "data.db",
+                                    tmp_path / "sync.db")
+    return {s.connector: s for s in asyncio.run(scheduler.run_once())}
+
+
+def _rows(tmp_path, sql, *args):
+    with sqlite3.connect(tmp_path / "data.db") as con:
+        return con.execute(sql, args).fetchall()
+
+
+def test_sync_round(tmp_path, estate, servers):
+    stats = _sync(tmp_path, servers())
+    assert {name: s.error for name, s in stats.items()} == dict.fromkeys(standins.ROUTES)
+    assert _rows(tmp_path, "SELECT COUNT(*) FROM assets") == [(HOSTS,)]
+    assert _rows(tmp_path, "SELECT COUNT(*) FROM vulns") == [(len(estate.vulns.ids()),)]
+    # CMDB — источник истины для полей актива
+    ci = estate.cis.get("node-000007")
+    assert _rows(tmp_path, "SELECT zone, criticality FROM assets WHERE asset_id = 'node-000007'") == \
+        [(ci["u_zone"], int(ci["u_criticality"]))]
+
+
+def test_retries_on_failures(tmp_path, servers):
+    running = servers(fail_rate=0.5, seed=3)  # при этом зерне первые два ответа каждого стенда — 503
+    stats = _sync(tmp_path, running)
+    assert all(s.error is None for s in stats.values())
+    assert all(s.retries >= 2 for s in stats.values())
+    assert sum(s.retries for s in stats.values()) == sum(s.failed for s in running.values())
+
+
+def test_second_round_applies_nothing(tmp_path, servers):
+    running = servers()
+    # Что применит каждый источник, зависит от порядка (CMDB раньше AD — каталогу дополнять нечего)
+    first = _sync(tmp_path, running)
+    assert all(s.error is None for s in first.values()) and sum(s.applied for s in first.values())
+    again = _sync(tmp_path, running)
+    assert all(s.error is None for s in again.values())
+    assert {name: s.applied for name, s in again.items()} == dict.fromkeys(standins.ROUTES, 0)
+
+
+def test_ticket_status_before_finding(tmp_path, estate, servers):
+    running = servers()
+    with estate.lock:
+        fields = estate.issues.get("SEC-1")["fields"]
+        estate._put_issue("SEC-1", {**fields, "status": {"name": "Done"}})
+    cve, host = fields["labels"]
+    _sync(tmp_path, running, ["itsm"])  # находки ещё нет: курсор ITSM уходит дальше тикета
+    assert _rows(tmp_path, "SELECT status FROM vulns WHERE cve = ? AND asset_id = ?", cve, host) == []
+    _sync(tmp_path, running, ["siem"])
+    assert _rows(tmp_path, "SELECT status FROM vulns WHERE cve = ? AND asset_id = ?", cve, host) == [("Mitigated",)]
+
+
+def test_cmdb_watermark_is_internal_value():
+    item = {"sys_updated_on": {"display_value": "01.05.2024 15:34:56", "value": "2024-05-01 12:34:56"}}
+    assert ServiceNowCmdb(ConnectorConfig("cmdb", "http://127.0.0.1")).watermark(item) == "2024-05-01 12:34:56"
+
+
+class _Moving(WatermarkConnector):
+    """In-memory ``updated >= since`` source whose first record is updated after the first page."""
+
+    def __init__(self, marks):
+        super().__init__(ConnectorConfig("test", "http://127.0.0.1", page_size=3))
+        self.rows = {key: mark for key, mark in marks}
+        self.calls = 0
+
+    async def query(self, since, offset):
+        self.calls += 1
+        if self.calls == 2:
+            self.rows["a"] = "9"
+        rows = sorted((mark, key) for key, mark in self.rows.items() if mark >= since)
+        return [{"mark": mark, "key": key} for mark, key in rows[offset:offset + self.config.page_size]]
+
+    def watermark(self, item):
+        return item["mark"]
+
+    def normalize(self, items):
+        return Batch(received=len(items), assets=[i["key"] for i in items])
+
+
+async def _keys(connector, cursor=None):
+    keys = set()
+    async for batch, cursor in connector.pages(cursor):
+        keys.update(batch.assets)
+    return keys, cursor
+
+
+@pytest.mark.parametrize("marks", [
+    [("a", "1"), ("b", "2"), ("c", "3"), ("d", "4"), ("e", "5"), ("f", "6"), ("g", "7")],
+    [("a", "1"), ("b", "1"), ("c", "1"), ("d", "1"), ("e", "2"), ("f", "2"), ("g", "3")],  # равные отметки
+])
+def test_watermark_paging_survives_updates(marks):
+    source = _Moving(marks)
+    keys, cursor = asyncio.run(_keys(source))
+    assert keys == set(source.rows)
+    assert cursor == {"since": "9", "offset": 0}
@@ -0,0 +1,91 @@
+import re
+import time
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from pks import export
+from pks.export import WRITERS, Exporter, frame_source, frame_version, summary_report
+
+COLUMNS = ["cve", "asset_id", "cvss", "vector", "status", "risk_score", "priority"]
+
+
+@pytest.fixture(scope="module")
+def frame(risks):
+    return risks[COLUMNS].head(250)
+
+
+def _write(fmt, path, frame, chunk_rows=100):
+    writer = WRITERS[fmt](path)
+    _, chunks = frame_source(frame)(chunk_rows)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+
+
+def _plain(frame):
+    return export._plain(frame).reset_index(drop=True)
+
+
+def test_parquet_roundtrip(tmp_path, frame):
+    _write("parquet", tmp_path / "out.parquet", frame)
+    f = pq.ParquetFile(tmp_path / "out.parquet")
+    assert f.metadata.num_row_groups == 3  # порция → row group
+    pd.testing.assert_frame_equal(f.read().to_pandas(), _plain(frame))
+
+
+def test_csv_roundtrip(tmp_path, frame):
+    _write("csv", tmp_path / "out.csv", frame)
+    assert (tmp_path / "out.csv").read_bytes().startswith(b"\xef\xbb\xbf")  # BOM для Excel
+    back = pd.read_csv(tmp_path / "out.csv", encoding="utf-8-sig")
+    pd.testing.assert_frame_equal(back, _plain(frame), check_dtype=False)
+
+
+def _sheets(path):
+    with zipfile.ZipFile(path) as z:
+        names = sorted(n for n in z.namelist() if n.startswith("xl/worksheets/"))
+        return [re.findall(r"<row>(.*?)</row>", z.read(n).decode("utf-8")) for n in names]
+
+
+def test_xlsx_rows_and_sheet_split(tmp_path, frame, monkeypatch):
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 101)  # заголовок + 100 строк на лист
+    _write("xlsx", tmp_path / "out.xlsx", frame, chunk_rows=70)
+    sheets = _sheets(tmp_path / "out.xlsx")
+    assert [len(rows) for rows in sheets] == [101, 101, 51]
+    assert all(COLUMNS[0] in rows[0] for rows in sheets)  # заголовок на каждом листе
+    first = re.findall(r"<t[^>]*>(.*?)</t>|<v>(.*?)</v>", sheets[0][1])
+    plain = _plain(frame)
+    assert [t or v for t, v in first][:3] == [plain["cve"][0], plain["asset_id"][0], str(plain["cvss"][0])]
+    assert str(plain["cvss"][0]) == str(round(float(frame["cvss"].iloc[0]), 1))  # без хвоста float32
+
+
+def test_xlsx_escapes_text(tmp_path):
+    _write("xlsx", tmp_path / "out.xlsx", pd.DataFrame({"name": ["a < b & c", "ctl\x07"], "n": [1, None]}))
+    rows = _sheets(tmp_path / "out.xlsx")[0]
+    assert "a &lt; b &amp; c" in rows[1] and "ctl<" in rows[2]
+    assert rows[2].endswith("<c/>")
+
+
+def test_empty_frame_keeps_schema(tmp_path, frame):
+    _write("parquet", tmp_path / "out.parquet", frame.head(0))
+    assert pq.read_schema(tmp_path / "out.parquet").names == COLUMNS
+
+
+def test_exporter_job_is_reused(tmp_path, frame):
+    exporter = Exporter(tmp_path, chunk_rows=64)
+    version = frame_version(frame)
+    job = exporter.submit("register", "csv", version, frame_source(frame))
+    deadline = time.monotonic() + 30
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (job.state, job.done, job.progress) == ("done", len(frame), 1.0)
+    assert exporter.submit("register", "csv", version, frame_source(frame)) is job
+    assert Exporter(tmp_path).job("register", "csv", version).state == "done"  # файл переживает перезапуск
+
+
+def test_summary_report():
+    html = summary_report("Отчёт <1>", {"P1": 3, "Ущерб": 1234.5}, {"ТОП": pd.DataFrame({"a": [1.25]})}, meta="v1")
+    assert "<title>Отчёт &lt;1&gt;</title>" in html
+    assert "1 234.5" in html and "<h2>ТОП</h2>" in html
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pks.filter_index import FilterIndex
+
+
+@pytest.fixture(scope="module")
+def index(risks):
+    return FilterIndex(risks)
+
+
+@pytest.mark.parametrize("min_score, equals", [
+    (None, {}),
+    (6.5, {}),
+    (None, {"status": "Open"}),
+    (7.0, {"status": "Open", "vector": "Network"}),
+    (0.0, {"asset_id": "host-0000003", "status": "In progress"}),
+    (9.5, {"status": "Open", "vector": "Adjacent"}),
+    (None, {"status": "Unknown"}),
+])
+def test_query_matches_mask(risks, index, min_score, equals):
+    mask = np.ones(len(risks), bool)
+    for col, value in equals.items():
+        mask &= (risks[col].astype(object) == value).to_numpy()
+    if min_score is not None:
+        mask &= (risks["cvss"] >= min_score).to_numpy()
+    np.testing.assert_array_equal(index.query(min_score, **equals), np.flatnonzero(mask))
+
+
+def test_counts_and_values(risks, index):
+    expected = risks["status"].astype(object).value_counts().sort_index()
+    counts = index.counts("status")
+    assert counts["status"].tolist() == expected.index.tolist()
+    assert counts["count"].tolist() == expected.tolist()
+    assert index.values("vector") == sorted(risks["vector"].astype(object).unique())
+
+
+def test_score_histogram(risks, index):
+    counts, edges = index.score_histogram(20, (0.0, 10.0))
+    expected, expected_edges = np.histogram(risks["cvss"].to_numpy(np.float32), bins=20, range=(0.0, 10.0))
+    np.testing.assert_array_equal(edges, expected_edges)
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_missing_scores():
+    vulns = pd.DataFrame({"asset_id": ["a", "b", "c"], "status": ["Open"] * 3, "vector": ["Network"] * 3,
+                          "cvss": [5.0, np.nan, 9.0]})
+    index = FilterIndex(vulns)
+    assert index.query(0.0).tolist() == [0, 2]
+    assert index.query(6.0, status="Open").tolist() == [2]
@@ -0,0 +1,102 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from pks.ingest import IngestReport, Importer, connect, detect_format, ingest, iter_batches, iter_nessus, iter_openvas
+
+FIXTURES = Path(__file__).parent / "fixtures"
+NESSUS = FIXTURES / "scan.nessus"
+OPENVAS = FIXTURES / "scan-openvas.xml"
+
+
+def _vulns(db):
+    with sqlite3.connect(db) as con:
+        return {(cve, asset): (cvss, vector) for cve, asset, cvss, vector in
+                con.execute("SELECT cve, asset_id, cvss, vector FROM vulns")}
+
+
+def test_detect_format():
+    assert detect_format(NESSUS) == "nessus"
+    assert detect_format(OPENVAS) == "openvas"
+
+
+def test_nessus_parsing():
+    rows = list(iter_nessus(NESSUS))
+    assert rows.count(None) == 1  # без CVE
+    found = {}
+    for r in filter(None, rows):
+        found.setdefault((r["cve"], r["asset_id"]), r)
+    assert found["CVE-2020-0001", "srv-app-01"]["cvss"] == 0.0  # CVSSv3 0.0 не подменяется v2
+    assert found["CVE-2022-0003", "srv-app-01"]["cvss"] == 9.8  # несколько CVE в одном ReportItem
+    assert found["CVE-2021-0004", "srv-db-01"]["vector"] == "Internal"  # CVSSv2-вектор AV:L
+
+
+def test_openvas_parsing():
+    rows = list(iter_openvas(OPENVAS))
+    assert rows.count(None) == 1
+    found = {(r["cve"], r["asset_id"]): r for r in rows if r}
+    assert set(found) == {("CVE-2024-1111", "gw-vpn-01"), ("CVE-2022-3333", "10.0.0.21")}
+    assert found["CVE-2024-1111", "gw-vpn-01"]["vector"] == "Network"
+    assert found["CVE-2022-3333", "10.0.0.21"]["vector"] == "Adjacent"
+    assert found["CVE-2022-3333", "10.0.0.21"]["cvss"] == 6.1
+
+
+def test_bounded_batches():
+    report = IngestReport()
+    batches = list(iter_batches(NESSUS, batch_rows=2, report=report))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert report.skipped == 1
+
+
+def test_reimport_is_deduplicated(tmp_path):
+    db = tmp_path / "data.db"
+    first = ingest([NESSUS, OPENVAS], db, batch_rows=2)
+    assert not first.errors
+    assert (first.parsed, first.inserted, first.duplicates, first.skipped) == (7, 6, 1, 2)
+    again = ingest([NESSUS, OPENVAS], db, batch_rows=2)
+    assert (again.parsed, again.inserted, again.duplicates) == (7, 0, 7)
+    vulns = _vulns(db)
+    assert len(vulns) == 6
+    assert vulns["CVE-2020-0001", "srv-app-01"] == (0.0, "Network")
+    assert vulns["CVE-2021-0004", "srv-db-01"] == (7.5, "Internal")  # повтор в отчёте не перезаписывает
+    with sqlite3.connect(db) as con:
+        hosts = {r[0] for r in con.execute("SELECT asset_id FROM assets")}
+    assert hosts == {"srv-app-01", "srv-db-01", "gw-vpn-01", "10.0.0.21"}
+
+
+def test_existing_duplicates_are_collapsed(tmp_path):
+    db = tmp_path / "legacy.db"
+    with sqlite3.connect(db) as con:
+        con.execute("CREATE TABLE vulns (cve TEXT, asset_id TEXT, cvss REAL, vector TEXT, status TEXT)")
+        con.executemany("INSERT INTO vulns VALUES (?, ?, ?, ?, ?)", [
+            ("CVE-2021-0004", "srv-db-01", 7.5, "Internal", "Open"),
+            ("CVE-2021-0004", "srv-db-01", 7.5, "Internal", "Mitigated"),
+        ])
+    connect(db).close()
+    with sqlite3.connect(db) as con:
+        assert con.execute("SELECT status FROM vulns").fetchall() == [("Mitigated",)]
+    report = ingest([NESSUS], db)
+    assert not report.errors and report.inserted == 3
+
+
+def test_broken_file_is_reported(tmp_path):
+    bad = tmp_path / "bad.nessus"
+    bad.write_text("<NessusClientData_v2><Report>")
+    report = ingest([bad], tmp_path / "data.db")
+    assert len(report.errors) == 1
+
+
+def test_background_importer(tmp_path):
+    imp = Importer(tmp_path / "data.db", batch_rows=2)
+    job = imp.submit([NESSUS, OPENVAS])
+    imp._pool.shutdown(wait=True)
+    assert job.state == "done" and job.progress == 1.0
+    assert job.report.inserted == 6 and job.report.files == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_workers_give_same_rows(tmp_path, workers):
+    db = tmp_path / "data.db"
+    ingest([NESSUS, OPENVAS], db, workers=workers)
+    assert len(_vulns(db)) == 6
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from pks.retrieval import VectorIndex
+
+DIM = 48
+
+
+def _vectors(n, seed):
+    x = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def index():
+    idx = VectorIndex(DIM, approx_min=10**9)  # обучение — только явное
+    idx.add(list(range(2_000)), _vectors(2_000, 0))
+    idx.train()
+    idx.add(list(range(2_000, 2_400)), _vectors(400, 1))  # свежий сегмент, без переобучения
+    return idx
+
+
+def test_approx_search_after_add_returns_unique_ids(index):
+    assert index._trained_rows == 2_000
+    for q in _vectors(40, 2):
+        ids, scores = index.search(q, k=10, mode="approx")
+        assert len(ids) == len(set(ids)) == 10
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_fresh_rows_are_found_exactly(index):
+    fresh = _vectors(400, 1)
+    for i in (0, 199, 399):
+        ids, _ = index.search(fresh[i], k=1, mode="approx")
+        assert ids == [2_000 + i]
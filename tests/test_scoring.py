@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from pks import scoring
+from pks.model import ASSET_DTYPES, RISK_DTYPES, VULN_DTYPES, compact
+from pks.scoring import REACH, rescore_changed, score_frame
+
+
+def _row_score(cvss, crit, vector, exposure=1.0):
+    """The original row-wise rules."""
+    score = round(cvss * crit * REACH.get(vector, math.nan) * exposure, 1)
+    if math.isnan(score):
+        return score, "P4 (Low)", 10
+    prio = ("P1 (Critical)" if score >= 30 else "P2 (High)" if score >= 20 else
+            "P3 (Medium)" if score >= 12 else "P4 (Low)")
+    return score, prio, 120 if score > 30 else 40 if score > 20 else 10
+
+
+def _expected(vulns, assets, exposure=None):
+    crit = assets.set_index("asset_id")["criticality"]
+    rows = [_row_score(c, crit.get(a, math.nan), v, 1.0 if exposure is None else exposure.get(a, 1.0))
+            for c, a, v in zip(vulns["cvss"], vulns["asset_id"], vulns["vector"])]
+    return pd.DataFrame(rows, columns=["risk_score", "priority", "loss_max"])
+
+
+def test_parity_with_row_rules(estate):
+    assets, vulns = estate
+    out = score_frame(vulns, assets)
+    exp = _expected(vulns, assets)
+    np.testing.assert_array_equal(out["risk_score"].to_numpy(), exp["risk_score"].to_numpy())
+    assert out["priority"].tolist() == exp["priority"].tolist()
+    assert out["loss_max"].tolist() == exp["loss_max"].tolist()
+    assert out["criticality"].dtype == assets["criticality"].dtype
+
+
+def test_thresholds_are_inclusive_and_strict():
+    assets = pd.DataFrame({"asset_id": ["a"], "criticality": [1]})
+    vulns = pd.DataFrame({"cve": ["CVE-1"] * 5, "asset_id": ["a"] * 5,
+                          "cvss": [12.0, 20.0, 20.1, 30.0, 30.1], "vector": ["Network"] * 5})
+    out = score_frame(vulns, assets)
+    assert out["priority"].tolist() == ["P3 (Medium)", "P2 (High)", "P2 (High)", "P1 (Critical)", "P1 (Critical)"]
+    assert out["loss_max"].tolist() == [10, 10, 40, 40, 120]
+
+
+def test_unknown_asset_or_vector(estate):
+    assets, _ = estate
+    vulns = pd.DataFrame({"cve": ["CVE-1", "CVE-2"], "asset_id": ["nowhere", assets["asset_id"][0]],
+                          "cvss": [9.8, 9.8], "vector": ["Network", "Bluetooth"]})
+    out = score_frame(vulns, assets)
+    assert out["risk_score"].isna().all()
+    assert out["priority"].tolist() == ["P4 (Low)"] * 2
+    assert out["loss_max"].tolist() == [10, 10]
+
+
+def test_chunking_and_exposure(estate):
+    assets, vulns = estate
+    exposure = pd.Series(np.linspace(0.5, 1.5, len(assets)), index=assets["asset_id"])
+    whole = score_frame(vulns, assets, exposure=exposure)
+    chunked = score_frame(vulns, assets, chunk_rows=7, exposure=exposure)
+    pd.testing.assert_frame_equal(whole, chunked)
+    exp = _expected(vulns, assets, exposure)
+    np.testing.assert_array_equal(whole["risk_score"].to_numpy(), exp["risk_score"].to_numpy())
+
+
+def test_compacted_input_scores_exactly(estate):
+    assets, vulns = estate
+    grid = pd.DataFrame([(c / 10, f"a{k}", v) for c in range(1, 101) for k in range(1, 6) for v in REACH],
+                        columns=["cvss", "asset_id", "vector"]).assign(cve="CVE-1", status="Open")
+    grid_assets = pd.DataFrame({"asset_id": [f"a{k}" for k in range(1, 6)], "criticality": range(1, 6)})
+    for frame, owner in [(vulns, assets), (grid, grid_assets)]:
+        wide = score_frame(frame, owner)
+        narrow = score_frame(compact(frame, VULN_DTYPES), compact(owner, ASSET_DTYPES))
+        np.testing.assert_array_equal(narrow["risk_score"].to_numpy(), wide["risk_score"].to_numpy())
+        assert narrow["priority"].tolist() == wide["priority"].tolist()
+        assert narrow["loss_max"].tolist() == wide["loss_max"].tolist()
+
+
+def test_process_pool_matches_serial(estate, monkeypatch):
+    assets, vulns = estate
+    monkeypatch.setattr(scoring, "POOL_MIN_ROWS", 0)
+    monkeypatch.setattr(scoring.os, "cpu_count", lambda: 2)
+    pooled = score_frame(vulns, assets, chunk_rows=len(vulns) // 3, workers=2)
+    pd.testing.assert_frame_equal(pooled, score_frame(vulns, assets))
+
+
+def test_rescore_changed_matches_full_rescore(estate):
+    assets, vulns = estate
+    exposure = pd.Series(np.linspace(0.5, 1.5, len(assets)), index=assets["asset_id"])
+    prev = compact(score_frame(vulns, assets, exposure=exposure), RISK_DTYPES).sort_values("risk_score")
+    new = vulns.drop(vulns.index[::50]).copy()
+    new.loc[new.index[::7], "cvss"] = (new["cvss"].iloc[::7] + 0.3).clip(upper=10.0).round(1)
+    new.loc[new.index[::11], "vector"] = "Adjacent"
+    new = pd.concat([new, vulns.head(40).set_axis(range(10**6, 10**6 + 40))])  # новые строки
+    crit = assets.assign(criticality=np.where(assets.index % 5 == 0, 5, assets["criticality"]))
+    for owner, expo in [(assets, exposure), (crit, exposure), (assets, exposure * 1.1)]:
+        out = rescore_changed(prev, new, owner, expo)
+        full = score_frame(new, owner, exposure=expo)
+        np.testing.assert_array_equal(out["risk_score"].to_numpy(), full["risk_score"].to_numpy())
+        assert out["priority"].tolist() == full["priority"].tolist()
+        assert out["loss_max"].tolist() == full["loss_max"].tolist()
+
+
+def test_rescore_changed_reuses_unchanged_rows(estate):
+    assets, vulns = estate
+    prev = compact(score_frame(vulns, assets), RISK_DTYPES).assign(risk_score=-1.0)
+    edited = vulns.copy()
+    edited.loc[edited.index[:10], "cvss"] = 0.1
+    out = rescore_changed(prev, edited, assets)
+    assert (out["risk_score"].iloc[10:] == -1.0).all()  # взято из prev, не пересчитано
+    assert (out["risk_score"].iloc[:10] >= 0).all()
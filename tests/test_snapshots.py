@@ -0,0 +1,23 @@
+from datetime import date
+
+import pandas as pd
+
+from pks.snapshots import SnapshotStore
+
+DAY = date(2026, 10, 1)
+
+
+def test_overwrite_keeps_mapped_base_intact(tmp_path, estate, risks):
+    assets, _ = estate
+    store = SnapshotStore(tmp_path)
+    store.record(DAY, assets, risks)
+    mapped = store.load_table(DAY, "risks")  # день = база: буферы из mmap
+    before = mapped.to_pandas()
+
+    changed = risks.head(100).assign(status="Mitigated")
+    assert store.record(DAY, assets.head(10), changed, overwrite=True)
+    pd.testing.assert_frame_equal(mapped.to_pandas(), before)  # старое отображение не испорчено
+
+    _, again = store.load(DAY)
+    assert len(again) == 100 and (again["status"] == "Mitigated").all()
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,80 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pks.timeseries import DAY, HOUR, WEEK, RiskSeries
+
+START = datetime(2026, 3, 2, tzinfo=timezone.utc).timestamp()  # понедельник
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(5)
+    ts = np.sort(START + rng.uniform(0, 40 * DAY, 2_000)).round(3)
+    return pd.DataFrame({"ts": ts, "value": rng.normal(50, 10, len(ts)).round(2)})
+
+
+@pytest.fixture
+def store(tmp_path, points):
+    s = RiskSeries(tmp_path / "series.db")
+    for ts, value in zip(points["ts"], points["value"]):
+        s.append({"index": value}, ts=ts)
+    return s
+
+
+def _rollup(points, size):
+    bucket = (points["ts"] - START) // size * size + START
+    g = points.groupby(bucket)["value"]
+    return pd.DataFrame({"date": pd.to_datetime(g.mean().index, unit="s"), "value": g.mean().to_numpy(),
+                         "min": g.min().to_numpy(), "max": g.max().to_numpy(), "n": g.size().to_numpy()})
+
+
+@pytest.mark.parametrize("level, size, max_points", [("day", DAY, 60), ("week", WEEK, 10), ("hour", HOUR, 1_000)])
+def test_rollups_match_raw_points(store, points, level, size, max_points):
+    frame, got = store.query("index", max_points=max_points)
+    assert got == level
+    pd.testing.assert_frame_equal(frame, _rollup(points, size), check_dtype=False)
+
+
+def test_raw_level_for_short_ranges(store, points):
+    end = points["ts"].iloc[40]
+    frame, level = store.query("index", points["ts"].iloc[0], end)
+    assert level == "raw"
+    assert frame["value"].tolist() == points["value"].iloc[:41].tolist()
+
+
+def test_buckets_are_utc_weeks_from_monday(store):
+    frame, _ = store.query("index", max_points=10)
+    assert (frame["date"].dt.dayofweek == 0).all()
+    assert (frame["date"].dt.hour == 0).all()
+
+
+def test_delta_and_repeated_version(tmp_path):
+    s = RiskSeries(tmp_path / "series.db")
+    assert s.append({"index": 40.0}, ts=START, version="v1")
+    assert not s.append({"index": 41.0}, ts=START + DAY, version="v1")  # та же версия данных
+    assert s.append({"index": 55.0}, ts=START + 8 * DAY, version="v2")
+    assert s.delta("index", 7, at=START + 8 * DAY) == 15.0
+    assert s.delta("index", 30, at=START + 8 * DAY) is None
+
+
+def test_backfill_dates_are_utc_days(tmp_path):
+    s = RiskSeries(tmp_path / "series.db")
+    frame = pd.DataFrame({"date": pd.date_range("2026-03-02", periods=10).date, "risk_index": np.arange(10.0)})
+    assert s.backfill(frame) == 10
+    assert s.backfill(frame) == 0  # история уже есть
+    got, level = s.query("index", max_points=30)
+    assert level == "day"
+    assert got["date"].tolist() == pd.date_range("2026-03-02", periods=10).tolist()
+
+
+def test_rollups_rebuilt_for_old_layout(tmp_path, store, points):
+    path = store.path
+    with sqlite3.connect(path) as con:
+        con.execute("UPDATE rollups SET bucket = bucket - 3 * 3600")  # бакеты по смещению UTC+3
+        con.execute("DELETE FROM meta")
+    frame, _ = RiskSeries(path).query("index", max_points=60)
+    pd.testing.assert_frame_equal(frame, _rollup(points, DAY), check_dtype=False)